@@ -0,0 +1,192 @@
+# ai_worker.py - Running an AI controller off the main thread
+#
+# AIWorker is a controller that hands a state snapshot to another controller
+# running on a worker thread or process and never waits for the answer: each
+# frame it picks up any answer that has arrived without blocking, and sends the
+# current state once the previous request is answered. Until an answer arrives
+# the fighter keeps doing whatever the last one said, so a slow search never
+# stalls the game loop. A worker process is preferred for pure Python
+# searches: a thread shares the GIL with the game loop.
+#
+# Measure how a search AI keeps up when run in a worker process:
+#   python ai_worker.py --difficulty hard --process --deadline 1
+
+import argparse
+import collections
+import functools
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+
+from constants import *
+from controllers import Controller, SearchController, DIFFICULTIES
+from simulation import Simulation
+
+def worker_loop(factory, requests, results):
+    """
+    Answer decision requests until told to stop
+
+    Requests are ("reset", seed, player), ("decide", match, frame, snapshot)
+    or None. Each decision is answered with (match, frame, actions).
+    """
+    sim = None
+    controller = None
+    fighter = None
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+
+        if request[0] == "reset":
+            seed, player = request[1:]
+            sim = Simulation("versus", seed=seed)
+            controller = factory()
+            controller.reset(sim, player)
+            fighter = (sim.player1, sim.player2)[player]
+        else:
+            match, frame, snapshot = request[1:]
+            sim.restore(snapshot)
+            results.put((match, frame, frozenset(controller(fighter))))
+
+class AIWorker(Controller):
+    def __init__(self, factory, deadline_frames=1, process=False):
+        """
+        Run a controller on a worker thread (or process) without waiting for it
+
+        One request is in flight at a time, for the newest state when it is
+        sent, so requests never pile up behind a slow search.
+
+        Args:
+            factory: Picklable callable creating the controller to run, e.g.
+                functools.partial(SearchController, "hard")
+            deadline_frames: Frames after a request by which its answer counts
+                as on time; later answers are still used but count as misses
+            process: Use a worker process instead of a thread, so a pure
+                Python search runs in parallel with the game
+        """
+        self.factory = factory
+        self.deadline = deadline_frames
+        self.process = process
+        self.worker = None
+        self.requests = None
+        self.results = None
+
+        self.actions = frozenset()  # Last answer received
+        self.match = 0  # Counts resets; answers echo it so stale ones are recognised
+        self.in_flight = None  # (frame, time sent) of the unanswered request
+        self.missed = False  # Whether the request in flight has been counted as a miss
+
+        # Statistics
+        self.decisions = 0
+        self.misses = 0
+        self.stale = 0
+        self.latencies = collections.deque(maxlen=1000)
+
+    def start(self):
+        if self.process:
+            self.requests = multiprocessing.Queue()
+            self.results = multiprocessing.Queue()
+            self.worker = multiprocessing.Process(target=worker_loop, daemon=True,
+                                                  args=(self.factory, self.requests, self.results))
+        else:
+            self.requests = queue.Queue()
+            self.results = queue.Queue()
+            self.worker = threading.Thread(target=worker_loop, daemon=True,
+                                           args=(self.factory, self.requests, self.results))
+        self.worker.start()
+
+    def close(self):
+        if self.worker is not None:
+            self.requests.put(None)
+            self.worker.join(1.0)
+            self.worker = None
+
+    def reset(self, sim, player):
+        super().reset(sim, player)
+        if self.worker is None:
+            self.start()
+        self.match += 1
+        self.in_flight = None
+        self.actions = frozenset()
+        self.requests.put(("reset", sim.seed, player))
+
+    @property
+    def queue_depth(self):
+        """Requests sent but not answered yet"""
+        return 0 if self.in_flight is None else 1
+
+    def __call__(self, fighter):
+        frame = self.sim.frame
+        self.poll()
+
+        if self.in_flight is None:
+            self.in_flight = (frame, time.perf_counter())
+            self.missed = False
+            self.requests.put(("decide", self.match, frame, self.sim.snapshot()))
+        elif not self.missed and frame - self.in_flight[0] > self.deadline:
+            self.misses += 1
+            self.missed = True
+        return self.actions
+
+    def poll(self):
+        """Take every answer that has arrived, without waiting"""
+        while True:
+            try:
+                match, frame, actions = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if match != self.match or self.in_flight is None or frame != self.in_flight[0]:
+                self.stale += 1  # Answer for a previous match
+                continue
+            self.decisions += 1
+            self.latencies.append(time.perf_counter() - self.in_flight[1])
+            self.actions = actions
+            self.in_flight = None
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+        return {
+            "decisions": self.decisions,
+            "deadline_misses": self.misses,
+            "stale_answers": self.stale,
+            "queue_depth": self.queue_depth,
+            "latency_ms_p50": percentile(0.5),
+            "latency_ms_p95": percentile(0.95),
+            "latency_ms_max": latencies[-1] * 1000 if latencies else 0.0
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the search AI in a worker against the built-in CPU")
+    parser.add_argument("--difficulty", choices=tuple(DIFFICULTIES), default="hard")
+    parser.add_argument("--process", action="store_true", help="use a worker process instead of a thread")
+    parser.add_argument("--deadline", type=int, default=1, help="frames each answer may take before it counts as late")
+    parser.add_argument("--frames", type=int, default=1800)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    worker = AIWorker(functools.partial(SearchController, args.difficulty), args.deadline, args.process)
+    sim = Simulation("solo", (worker, None), args.seed)
+
+    # Play in real time so late answers matter the way they do in the game
+    slowest = 0.0
+    next_tick = time.perf_counter()
+    while sim.frame < args.frames and not sim.over:
+        start = time.perf_counter()
+        sim.step()
+        slowest = max(slowest, time.perf_counter() - start)
+        next_tick += TIMESTEP
+        time.sleep(max(0.0, next_tick - time.perf_counter()))
+    worker.close()
+
+    print(f"frame {sim.frame}, winner {sim.winner}, slowest step {slowest * 1000:.2f} ms")
+    for key, value in worker.stats().items():
+        print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+# animation.py - Keyframed stickman animation baked into per-frame pose tables
+#
+# Each action is a list of keyframes over its progress from 0 to 1 (the
+# fighter's action_time / action_duration). A keyframe gives joint angles for
+# a fighter facing right: torso lean and crouch, and two segments (upper and
+# lower) for each limb. Facing left mirrors the angles. Every move starts and
+# ends on the idle pose, so actions blend into each other instead of snapping.
+#
+# Animations are baked once per fighter height: every frame of every action is
+# interpolated ahead of time into a stickman.Pose of integer joint offsets,
+# with the rectangle it can cover. Each frame is drawn once into a sprite kept
+# in an LRU stickman.PoseCache, so drawing a fighter is a lookup and a blit.
+# Poses for a render scale other than 1 are baked separately at that scale's
+# pixel size (see renderer.py).
+
+import math
+
+import pygame
+
+from constants import *
+from moves import DURATION
+from stickman import Pose, PoseCache, add_face, draw_pose, crop_sprite, CIRCLE, POLYLINE, SPARKS, FLAMES, SHIELD
+
+# Limbs of a keyframe; each is (angle, length, angle, length) for the upper and
+# lower segment, in degrees (0 points forward, 90 down) and fractions of the
+# limb's full length
+LIMBS = ("back_arm", "front_arm", "back_leg", "front_leg")
+
+def keyframe(back_arm, front_arm, back_leg, front_leg, lean=0.0, crouch=0.0):
+    """
+    Joint angles of one pose facing right
+
+    Args:
+        back_arm, front_arm, back_leg, front_leg: (angle, length, angle, length)
+        lean: Hip offset forward, as a fraction of the fighter height
+        crouch: Fraction of the torso length the upper body drops by
+    """
+    return {"back_arm": back_arm, "front_arm": front_arm, "back_leg": back_leg, "front_leg": front_leg,
+            "lean": lean, "crouch": crouch}
+
+def straight(angle, length):
+    """A limb held straight: both segments share the angle"""
+    return (angle, length / 2, angle, length / 2)
+
+IDLE = keyframe(straight(160, 1.0), straight(20, 1.0), straight(120, 0.5), straight(60, 0.5))
+
+# Keyframes per action as (progress, pose); hits land halfway through a move
+KEYFRAMES = {
+    "idle": [(0.0, IDLE)],
+    "punch": [
+        (0.0, IDLE),
+        (0.3, keyframe((170, 0.4, 120, 0.4), (120, 0.5, -60, 0.45), straight(115, 0.5), straight(65, 0.5),
+                       lean=-0.02)),
+        (0.5, keyframe(straight(190, 0.8), straight(0, 1.3), straight(110, 0.5), straight(70, 0.5), lean=0.04)),
+        (0.7, keyframe(straight(185, 0.8), (10, 0.6, 0, 0.6), straight(110, 0.5), straight(70, 0.5), lean=0.03)),
+        (1.0, IDLE)
+    ],
+    "kick": [
+        (0.0, IDLE),
+        (0.3, keyframe(straight(150, 1.0), straight(50, 1.0), straight(95, 0.8), (10, 0.35, 90, 0.35),
+                       lean=-0.04)),
+        (0.5, keyframe(straight(150, 1.0), straight(45, 1.0), straight(100, 0.8), straight(0, 1.3), lean=0.08)),
+        (0.7, keyframe(straight(150, 1.0), straight(45, 1.0), straight(100, 0.8), (20, 0.4, 70, 0.4),
+                       lean=0.05)),
+        (1.0, IDLE)
+    ],
+    "block": [
+        (0.0, IDLE),
+        (0.15, keyframe((135, 0.6, 80, 0.6), (45, 0.6, 100, 0.6), straight(110, 0.5), straight(70, 0.5),
+                        crouch=0.25)),
+        (0.85, keyframe((135, 0.6, 80, 0.6), (45, 0.6, 100, 0.6), straight(110, 0.5), straight(70, 0.5),
+                        crouch=0.25)),
+        (1.0, IDLE)
+    ],
+    "special": [
+        (0.0, IDLE),
+        (0.25, keyframe((120, 0.6, 60, 0.6), (60, 0.6, 120, 0.6), straight(125, 0.45), straight(55, 0.45),
+                        crouch=0.2)),
+        (0.5, keyframe((150, 0.6, 210, 0.6), (30, 0.6, -30, 0.6), straight(120, 0.5), straight(60, 0.5),
+                       lean=-0.04)),
+        (0.85, keyframe((150, 0.6, 210, 0.6), (30, 0.6, -30, 0.6), straight(120, 0.5), straight(60, 0.5),
+                        lean=-0.04)),
+        (1.0, IDLE)
+    ]
+}
+
+# Special effects of each action: (kind, anchor, color). Anchors are "head",
+# "shoulder" or the end of a limb.
+ACTION_EFFECTS = {
+    "punch": (SPARKS, "front_arm", YELLOW),
+    "kick": (SPARKS, "front_leg", ORANGE),
+    "block": (SHIELD, "shoulder", BLUE),
+    "special": (FLAMES, "head", None)
+}
+
+# Actions whose front hand is drawn as a fist
+FISTS = ("punch",)
+
+# Limbs drawn with thicker lines during an action
+THICK_LIMBS = {"punch": ("front_arm",), "kick": ("front_leg",), "block": ("back_arm", "front_arm")}
+
+def lerp_angle(a, b, t):
+    """Interpolate between angles in degrees the short way round"""
+    return a + ((b - a + 180) % 360 - 180) * t
+
+def interpolate(keys, progress):
+    """The pose at progress through an action's keyframes"""
+    if progress <= keys[0][0]:
+        return keys[0][1]
+    for (start, first), (end, second) in zip(keys, keys[1:]):
+        if progress <= end:
+            t = (progress - start) / (end - start)
+            pose = {"lean": first["lean"] + (second["lean"] - first["lean"]) * t,
+                    "crouch": first["crouch"] + (second["crouch"] - first["crouch"]) * t}
+            for limb in LIMBS:
+                a1, l1, a2, l2 = first[limb]
+                b1, m1, b2, m2 = second[limb]
+                pose[limb] = (lerp_angle(a1, b1, t), l1 + (m1 - l1) * t, lerp_angle(a2, b2, t), l2 + (m2 - l2) * t)
+            return pose
+    return keys[-1][1]
+
+class Animations:
+    def __init__(self, height, keyframes=KEYFRAMES, durations=DURATION, scale=1.0):
+        """
+        Baked poses of every action for one fighter height
+
+        Args:
+            height: Fighter height in logical pixels
+            keyframes: {action: [(progress, keyframe), ...]}
+            durations: Frames each action lasts; actions missing from it
+                (such as idle) get a single frame
+            scale: Render scale; offsets and line widths are in render pixels
+        """
+        self.scale = scale
+        self.height = height = height * scale
+        self.head_radius = int(height * 0.15)
+        self.torso_length = int(height * 0.3)
+        self.arm_length = int(height * 0.25)
+        self.leg_length = int(height * 0.4)
+
+        # {(action, direction): [(Pose, (left, top, width, height)) per frame]}
+        self.frames = {}
+        for action, keys in keyframes.items():
+            count = durations.get(action, 1)
+            for direction in ("left", "right"):
+                self.frames[action, direction] = [
+                    self.bake(action, interpolate(keys, frame / count), direction == "right")
+                    for frame in range(count)]
+
+    def bake(self, action, angles, right):
+        """Build the Pose and bounding box of one interpolated keyframe"""
+        height = self.height
+        head_radius = self.head_radius
+        side = 1 if right else -1
+
+        # Crouching lowers the head and shoulders; the hips and feet stay put
+        drop = round(self.torso_length * angles["crouch"])
+
+        scale = self.scale
+        pose = Pose(scale)
+        head = pose.joint(0, head_radius + drop)
+        shoulder = pose.joint(0, head_radius * 2 + drop)
+        hip = pose.joint(round(side * angles["lean"] * height), head_radius * 2 + self.torso_length)
+
+        ends = {"head": head, "shoulder": shoulder}
+        effect = ACTION_EFFECTS.get(action)
+
+        pose.circle(head, head_radius)
+        if effect is not None and effect[0] == FLAMES:
+            pose.ops.append((FLAMES, head))
+        pose.line(shoulder, hip, self.width(3))
+
+        thick = THICK_LIMBS.get(action, ())
+        for limb in LIMBS:
+            start = shoulder if limb.endswith("arm") else hip
+            length = self.arm_length if limb.endswith("arm") else self.leg_length
+            width = self.width(3 if limb in thick else 2)
+            a1, l1, a2, l2 = angles[limb]
+
+            dx, dy, crouched = pose.joints[start]
+            elbow_x = dx + side * length * l1 * math.cos(math.radians(a1))
+            elbow_y = dy + length * l1 * math.sin(math.radians(a1))
+            end_x = elbow_x + side * length * l2 * math.cos(math.radians(a2))
+            end_y = elbow_y + length * l2 * math.sin(math.radians(a2))
+
+            # A straight limb is one line; a bent one is drawn through a copy
+            # of its start joint so that its joints are consecutive
+            if round(a1, 3) == round(a2, 3):
+                end = pose.joint(round(end_x), round(end_y))
+                pose.line(start, end, width)
+            else:
+                first = pose.joint(dx, dy)
+                pose.joint(round(elbow_x), round(elbow_y))
+                end = pose.joint(round(end_x), round(end_y))
+                pose.ops.append((POLYLINE, first, end + 1, width))
+            ends[limb] = end
+
+        if action in FISTS:
+            pose.circle(ends["front_arm"], self.width(5))
+        if effect is not None and effect[0] == SPARKS:
+            pose.ops.append((SPARKS, ends[effect[1]], side, effect[2]))
+        elif effect is not None and effect[0] == SHIELD:
+            pose.ops.append((SHIELD, pose.joint(side * int(30 * scale), head_radius * 2 + drop)))
+
+        add_face(pose, head_radius, right, drop)
+        pose.finish()
+        return pose, self.bounds(pose)
+
+    def width(self, width):
+        """A line width or radius at the render scale"""
+        return max(1, round(width * self.scale))
+
+    def bounds(self, pose):
+        """Offsets (left, top, width, height) of everything a pose can draw, effects included"""
+        scale = self.scale
+        left = top = 0
+        right = bottom = 0
+
+        def cover(x0, y0, x1, y1):
+            nonlocal left, top, right, bottom
+            left, top = min(left, x0), min(top, y0)
+            right, bottom = max(right, x1), max(bottom, y1)
+
+        pad = self.width(3)
+        for dx, dy in pose.offsets:
+            cover(dx - pad, dy - pad, dx + pad, dy + pad)
+        for op in pose.ops:
+            if op[0] == CIRCLE:
+                dx, dy = pose.offsets[op[1]]
+                cover(dx - op[2], dy - op[2], dx + op[2], dy + op[2])
+            elif op[0] == SPARKS:
+                dx, dy = pose.offsets[op[1]]
+                reach = op[2] * math.ceil(23 * scale)
+                cover(min(dx, dx + reach), dy - math.ceil(13 * scale), max(dx, dx + reach), dy + math.ceil(13 * scale))
+            elif op[0] == FLAMES:
+                dx, dy = pose.offsets[op[1]]
+                cover(dx - math.ceil(45 * scale), dy - math.ceil(55 * scale),
+                      dx + math.ceil(45 * scale), dy + math.ceil(55 * scale))
+            elif op[0] == SHIELD:
+                dx, dy = pose.offsets[op[1]]
+                cover(dx - math.ceil(30 * scale), dy - math.ceil(30 * scale),
+                      dx + math.ceil(30 * scale), dy + math.ceil(50 * scale))
+        return (left, top, right - left + 1, bottom - top + 1)
+
+    def pose(self, action, direction, action_time=0):
+        """The baked (Pose, bounds) of a frame of an action"""
+        frames = self.frames.get((action, direction)) or self.frames["idle", direction]
+        return frames[min(action_time, len(frames) - 1)]
+
+# Animations by fighter height and render scale, baked on first use
+animations = {}
+
+def get_animations(height, scale=1.0):
+    baked = animations.get((height, scale))
+    if baked is None:
+        baked = animations[height, scale] = Animations(height, scale=scale)
+    return baked
+
+# Sprites of baked frames; two fighters use at most a few hundred
+frame_cache = PoseCache(max_poses=512)
+
+def draw_animated(surface, x, y, width, height, color, action, direction, action_time=0, special=False, scale=1.0):
+    """
+    Draw a stickman on frame action_time of its action's animation
+
+    Takes the same arguments as stickman.draw_stickman plus the frame and
+    the render scale, and returns the rect drawn in render pixels. Frames
+    are blitted from frame_cache; the random special effects of a frame
+    are rendered once and reused.
+    """
+    if scale != 1.0:
+        x = round(x * scale)
+        y = round(y * scale)
+    frames = get_animations(height, scale).frames.get((action, direction))
+    if frames is None:
+        action = "idle"
+        frames = get_animations(height, scale).frames["idle", direction]
+    frame = min(action_time, len(frames) - 1)
+
+    key = (action, direction, color, height, scale, special, frame)
+    sprite, dx, dy = frame_cache.sprite(key, lambda: render_frame(*frames[frame], color, special))
+    return surface.blit(sprite, (x + dx, y + dy))
+
+def render_frame(pose, bounds, color, special):
+    """A baked frame drawn into a sprite, with its offset from the fighter's position"""
+    left, top, width, height = bounds
+    canvas = pygame.Surface((width, height), pygame.SRCALPHA)
+    draw_pose(canvas, pose, [(dx - left, dy - top) for dx, dy in pose.offsets], color, special)
+    sprite, sprite_left, sprite_top = crop_sprite(canvas, color)
+    return sprite, left + sprite_left, top + sprite_top
+
+def draw_animated_immediate(surface, x, y, width, height, color, action, direction, action_time=0, special=False,
+                            scale=1.0):
+    """draw_animated without the sprite cache: the pose's lines and circles are drawn every call"""
+    if scale != 1.0:
+        x = round(x * scale)
+        y = round(y * scale)
+    pose, (left, top, w, h) = get_animations(height, scale).pose(action, direction, action_time)
+    draw_pose(surface, pose, [(x + dx, y + dy) for dx, dy in pose.offsets], color, special)
+    return pygame.Rect(x + left, y + top, w, h)
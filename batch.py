@@ -0,0 +1,191 @@
+# batch.py - Run many CPU vs CPU matches across all cores for balance testing
+#
+# Example:
+#   python batch.py -n 20000 --seed 1 --set DAMAGE.kick=10 --output results.json
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import constants
+from simulation import Simulation
+
+# Tunable settings that may be overridden from the command line
+TUNABLES = ("DAMAGE", "ENERGY_COST", "COMBO_BONUS", "BLOCK_DAMAGE_REDUCTION",
+            "COMBO_TIMEOUT", "SPECIAL_THRESHOLD")
+
+def parse_override(text):
+    """Parse "NAME=value" or "NAME.key=value" into (name, key, value)"""
+    name, _, value = text.partition("=")
+    name, _, key = name.partition(".")
+    if name not in TUNABLES or not value:
+        raise argparse.ArgumentTypeError(f"cannot override {text!r}")
+    current = getattr(constants, name)
+    if isinstance(current, dict):
+        if key not in current:
+            raise argparse.ArgumentTypeError(
+                f"cannot override {text!r}: {name} has the keys {', '.join(current)}")
+    elif key:
+        raise argparse.ArgumentTypeError(f"cannot override {text!r}: {name} is not a table")
+    try:
+        return name, key or None, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"cannot override {text!r}: {value!r} is not a number")
+
+def apply_overrides(overrides):
+    """Apply overrides to the constants seen by every loaded module"""
+    for name, key, value in overrides:
+        if key is None:
+            # Scalars are copied into each module by "from constants import *",
+            # so rebind every copy of the current value
+            old = getattr(constants, name)
+            for module in list(sys.modules.values()):
+                if getattr(module, name, None) is old:
+                    setattr(module, name, value)
+        else:
+            getattr(constants, name)[key] = value
+
+def play_match(seed, max_frames):
+    """Play one seeded CPU vs CPU match and return its result"""
+    sim = Simulation("cpu", seed=seed, effects=False)
+    winner = sim.run(max_frames)
+    return winner, sim.frame, sim.damage
+
+def play_chunk(args):
+    """Play a range of matches and return their combined totals"""
+    first_seed, count, max_frames = args
+    totals = new_totals()
+    for seed in range(first_seed, first_seed + count):
+        add_result(totals, *play_match(seed, max_frames))
+    return totals
+
+def new_totals():
+    return {
+        "matches": 0,
+        "wins": {"Player 1": 0, "Player 2": 0, "draw": 0},
+        "frames": 0,
+        "min_frames": None,
+        "max_frames": 0,
+        "damage": {"Player 1": {}, "Player 2": {}}
+    }
+
+def add_result(totals, winner, frames, damage):
+    totals["matches"] += 1
+    totals["wins"][winner or "draw"] += 1
+    totals["frames"] += frames
+    totals["max_frames"] = max(totals["max_frames"], frames)
+    if totals["min_frames"] is None or frames < totals["min_frames"]:
+        totals["min_frames"] = frames
+    merge_damage(totals["damage"], damage)
+
+def merge_totals(totals, other):
+    totals["matches"] += other["matches"]
+    for key, value in other["wins"].items():
+        totals["wins"][key] += value
+    totals["frames"] += other["frames"]
+    totals["max_frames"] = max(totals["max_frames"], other["max_frames"])
+    if other["min_frames"] is not None:
+        if totals["min_frames"] is None or other["min_frames"] < totals["min_frames"]:
+            totals["min_frames"] = other["min_frames"]
+    merge_damage(totals["damage"], other["damage"])
+
+def merge_damage(totals, damage):
+    for player, moves in damage.items():
+        for move, (hits, amount) in moves.items():
+            entry = totals[player].setdefault(move, [0, 0])
+            entry[0] += hits
+            entry[1] += amount
+
+def summarize(totals, elapsed):
+    """Turn raw totals into the report written to disk"""
+    matches = totals["matches"]
+    damage_table = {}
+    for player, moves in totals["damage"].items():
+        damage_table[player] = {
+            move: {
+                "hits": hits,
+                "damage": round(amount, 2),
+                "damage_per_hit": round(amount / hits, 2),
+                "damage_per_match": round(amount / matches, 2)
+            }
+            for move, (hits, amount) in sorted(moves.items())
+        }
+
+    return {
+        "matches": matches,
+        "win_rate": {key: value / matches for key, value in totals["wins"].items()},
+        "wins": totals["wins"],
+        "match_frames": {
+            "mean": totals["frames"] / matches,
+            "min": totals["min_frames"],
+            "max": totals["max_frames"]
+        },
+        "damage": damage_table,
+        "elapsed_seconds": round(elapsed, 3),
+        "matches_per_minute": round(matches / elapsed * 60) if elapsed else None
+    }
+
+def print_report(report):
+    print(f"{report['matches']} matches in {report['elapsed_seconds']}s "
+          f"({report['matches_per_minute']} matches/min)")
+    for key, rate in report["win_rate"].items():
+        print(f"  {key:<10} {rate:7.2%}")
+    frames = report["match_frames"]
+    print(f"  match length: mean {frames['mean']:.0f}, min {frames['min']}, max {frames['max']} frames")
+    for player, moves in report["damage"].items():
+        print(f"  {player} damage per move:")
+        for move, row in moves.items():
+            print(f"    {move:<8} hits {row['hits']:>9}  per hit {row['damage_per_hit']:>6}  "
+                  f"per match {row['damage_per_match']:>7}")
+
+def run_batch(matches, seed=0, max_frames=18000, processes=None,
+              chunk_size=250, overrides=()):
+    """
+    Play matches across a process pool
+
+    Args:
+        matches: Number of matches to play
+        seed: Seed of the first match; match i uses seed + i
+        max_frames: Frames before a match is declared a draw
+        processes: Worker count (defaults to every core)
+        chunk_size: Matches handed to a worker at a time
+        overrides: Parsed (name, key, value) constant overrides
+    """
+    chunks = []
+    for first in range(0, matches, chunk_size):
+        chunks.append((seed + first, min(chunk_size, matches - first), max_frames))
+
+    totals = new_totals()
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes, initializer=apply_overrides, initargs=(list(overrides),)) as pool:
+        for result in pool.imap_unordered(play_chunk, chunks):
+            merge_totals(totals, result)
+    return summarize(totals, time.perf_counter() - start)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate CPU vs CPU matches for balance testing")
+    parser.add_argument("-n", "--matches", type=int, default=1000, help="number of matches to play")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first match")
+    parser.add_argument("--max-frames", type=int, default=18000, help="frames before a match is a draw")
+    parser.add_argument("-j", "--processes", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=250, help="matches per worker task")
+    parser.add_argument("--set", dest="overrides", type=parse_override, action="append", default=[],
+                        metavar="NAME[.KEY]=VALUE", help="override a constant, e.g. DAMAGE.kick=10")
+    parser.add_argument("-o", "--output", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_batch(args.matches, args.seed, args.max_frames, args.processes,
+                       args.chunk_size, args.overrides)
+    report["seed"] = args.seed
+    report["overrides"] = [f"{n}{'.' + k if k else ''}={v}" for n, k, v in args.overrides]
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+# benchmark.py - Repeatable timings of the simulation and rendering hot paths
+#
+# Runs headless through SDL's dummy video driver. Results are written as JSON
+# together with a description of the machine, and can be compared against an
+# earlier run to catch regressions:
+#
+#   python benchmark.py --output baseline.json
+#   python benchmark.py --baseline baseline.json --threshold 0.15
+#
+# The exit status is 1 when any benchmark is slower than the baseline by more
+# than the threshold.
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pygame
+
+from constants import *
+from effects import ParticleEffect
+from simulation import FreeForAll
+from fighter import ACTIONS, DIRECTIONS
+from animation import draw_animated, draw_animated_immediate, get_animations
+from stickman import draw_stickman, draw_stickman_cached, draw_stickmen, get_skeleton, pose_joints
+from ui import draw_ui
+
+PARTICLE_COUNTS = (100, 1000, 10000)
+
+def measure(function, number, repeat):
+    """Median seconds per call of function over repeat runs of number calls"""
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        for j in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+    return statistics.median(times)
+
+def machine_metadata():
+    """Where and with what the benchmarks ran"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "sdl": ".".join(map(str, pygame.get_sdl_version())),
+        "numpy": np.__version__,
+        "video_driver": pygame.display.get_driver(),
+        "commit": commit or None
+    }
+
+def new_game():
+    from main import Game
+    game = Game(seed=1)
+    game.game_mode = "cpu"
+    game.reset_game()
+    game.game_state = "playing"
+    return game
+
+def bench_game_update(game, scale):
+    """Simulated frames per second of Game.update in a CPU vs CPU match"""
+    def update():
+        game.update()
+        if game.game_state != "playing":
+            game.reset_game()
+            game.game_state = "playing"
+
+    seconds = measure(update, 2000 * scale, 5)
+    return {"game_update_cpu_vs_cpu": (1 / seconds, "frames/s", True)}
+
+def bench_particles(game, scale):
+    """Update and draw time of one effect at each particle count"""
+    screen = game.screen
+    results = {}
+    for count in PARTICLE_COUNTS:
+        effect = ParticleEffect(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, ORANGE, count, 15, 3, 0.1)
+        start = effect.system.snapshot()
+
+        # Particles live at least 20 frames, so runs of 10 frames keep the count steady
+        def frames(step):
+            def run():
+                effect.system.restore(start)
+                for i in range(10):
+                    step()
+            return run
+
+        number = max(1, 2000 * scale // count)
+        update = measure(frames(effect.update), number, 5) / 10
+        draw = measure(frames(lambda: effect.draw(screen)), number, 5) / 10
+        restore = measure(lambda: effect.system.restore(start), number * 10, 5)
+        results[f"particles_update_{count}"] = ((update - restore / 10) * 1000, "ms", False)
+        results[f"particles_draw_{count}"] = ((draw - restore / 10) * 1000, "ms", False)
+    return results
+
+def bench_stickman(game, scale):
+    """Immediate, cached and animated (cached and immediate) drawing time of every pose"""
+    screen = game.screen
+    results = {}
+    y = SCREEN_HEIGHT - 100
+    for action in ACTIONS:
+        for direction in DIRECTIONS:
+            special = action == "special"
+
+            def draw():
+                draw_stickman(screen, 400, y, FIGHTER_WIDTH, FIGHTER_HEIGHT, BLUE, action, direction, special)
+
+            def draw_cached():
+                draw_stickman_cached(screen, 400, y, FIGHTER_WIDTH, FIGHTER_HEIGHT, BLUE, action, direction,
+                                     special, 0)
+
+            results[f"stickman_{action}_{direction}"] = (measure(draw, 200 * scale, 5) * 1e6, "us", False)
+            results[f"stickman_cached_{action}_{direction}"] = (
+                measure(draw_cached, 500 * scale, 5) * 1e6, "us", False)
+
+            # Keyframed animation, cycling through every frame of the action
+            frames = len(get_animations(FIGHTER_HEIGHT).frames.get((action, direction), ()))
+            frame = 0
+
+            def draw_animation():
+                nonlocal frame
+                draw_animated(screen, 400, y, FIGHTER_WIDTH, FIGHTER_HEIGHT, BLUE, action, direction, frame, special)
+                frame = (frame + 1) % max(frames, 1)
+
+            results[f"animated_{action}_{direction}"] = (measure(draw_animation, 200 * scale, 5) * 1e6, "us", False)
+
+            def draw_animation_immediate():
+                nonlocal frame
+                draw_animated_immediate(screen, 400, y, FIGHTER_WIDTH, FIGHTER_HEIGHT, BLUE, action, direction,
+                                        frame, special)
+                frame = (frame + 1) % max(frames, 1)
+
+            results[f"animated_immediate_{action}_{direction}"] = (
+                measure(draw_animation_immediate, 200 * scale, 5) * 1e6, "us", False)
+    return results
+
+def bench_skeleton(game, scale):
+    """Joint placement for a crowd of stickmen: one pose at a time and all at once"""
+    results = {}
+    count = 16
+    skeleton = get_skeleton(FIGHTER_HEIGHT)
+    x = np.linspace(FIGHTER_WIDTH, SCREEN_WIDTH - FIGHTER_WIDTH, count)
+    y = np.full(count, SCREEN_HEIGHT - 100 - FIGHTER_HEIGHT // 2)
+    actions = [ACTIONS[i % len(ACTIONS)] for i in range(count)]
+    directions = [DIRECTIONS[i % 2] for i in range(count)]
+    colors = [BLUE] * count
+    specials = [False] * count
+
+    def points():
+        for i in range(count):
+            skeleton.points(skeleton.poses[actions[i], directions[i]], x[i], y[i])
+
+    results[f"skeleton_points_{count}"] = (measure(points, 500 * scale, 5) * 1e6, "us", False)
+    results[f"skeleton_pose_joints_{count}"] = (
+        measure(lambda: pose_joints(FIGHTER_HEIGHT, x, y, actions, directions), 500 * scale, 5) * 1e6, "us", False)
+    results[f"draw_stickmen_{count}"] = (
+        measure(lambda: draw_stickmen(game.screen, FIGHTER_HEIGHT, x, y, colors, actions, directions, specials),
+                100 * scale, 5) * 1e6, "us", False)
+    return results
+
+def bench_ui(game, scale):
+    font = game.font
+    seconds = measure(lambda: draw_ui(game.screen, game.player1, game.player2, font), 500 * scale, 5)
+    return {"draw_ui": (seconds * 1e6, "us", False)}
+
+def bench_game_draw(game, scale):
+    """Full frames with dirty rectangles and with whole-screen flips"""
+    results = {}
+    for mode, dirty in (("dirty", True), ("full", False)):
+        game.use_dirty_rects = dirty
+        game.draw(0.5)
+
+        # The match keeps playing so every frame has something to redraw
+        times = []
+        for i in range(300 * scale):
+            game.update()
+            if game.game_state != "playing":
+                game.reset_game()
+                game.game_state = "playing"
+            start = time.perf_counter()
+            game.draw(0.5)
+            times.append(time.perf_counter() - start)
+        results[f"game_draw_{mode}"] = (statistics.median(times) * 1000, "ms", False)
+    game.use_dirty_rects = True
+    return results
+
+def bench_collision(game, scale):
+    """Free-for-all frames with 16 fighters and a steady stream of projectiles"""
+    results = {}
+    for projectiles in (0, 300):
+        ffa = FreeForAll(16, seed=1)
+
+        def frame():
+            nonlocal ffa
+            if ffa.over:
+                ffa = FreeForAll(16, seed=ffa.frame)
+            fighters = [fighter for fighter in ffa.fighters if fighter.health > 0]
+            while len(ffa.world.projectiles) < projectiles:
+                ffa.world.fire(ffa.rng.choice(fighters), life=60)
+            ffa.step()
+
+        results[f"ffa_16_fighters_{projectiles}_projectiles"] = (
+            measure(frame, 200 * scale, 5) * 1000, "ms", False)
+    return results
+
+BENCHMARKS = {
+    "game_update": bench_game_update,
+    "particles": bench_particles,
+    "stickman": bench_stickman,
+    "skeleton": bench_skeleton,
+    "ui": bench_ui,
+    "game_draw": bench_game_draw,
+    "collision": bench_collision
+}
+
+def run_benchmarks(names=None, scale=1):
+    """
+    Run the selected benchmark groups
+
+    Args:
+        names: Keys of BENCHMARKS to run (all when None)
+        scale: Multiplier on the iteration counts
+
+    Returns:
+        {name: {"value", "unit", "higher_is_better"}}
+    """
+    game = new_game()
+    results = {}
+    for name in names or BENCHMARKS:
+        for key, (value, unit, higher) in BENCHMARKS[name](game, scale).items():
+            results[key] = {"value": value, "unit": unit, "higher_is_better": higher}
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline run
+
+    Returns:
+        List of (name, baseline value, value, relative change) for every
+        benchmark that got worse by more than threshold
+    """
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None or not old["value"]:
+            continue
+        change = (result["value"] - old["value"]) / old["value"]
+        worse = -change if result["higher_is_better"] else change
+        if worse > threshold:
+            regressions.append((name, old["value"], result["value"], change))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulation and rendering hot paths")
+    parser.add_argument("benchmarks", nargs="*", metavar="GROUP",
+                        help=f"groups to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown counted as a regression (default 0.10)")
+    parser.add_argument("--scale", type=int, default=1, help="multiply the iteration counts")
+    args = parser.parse_args(argv)
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark group {name!r}")
+
+    results = run_benchmarks(args.benchmarks, args.scale)
+    report = {"metadata": machine_metadata(), "results": results}
+    for name, result in report["results"].items():
+        print(f"{name:<32} {result['value']:>12.3f} {result['unit']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report["results"], baseline["results"], args.threshold)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.3f} -> {new:.3f} ({change:+.1%})")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# collision.py - Hit detection between any number of fighters and projectiles
+#
+# Each frame the active hitboxes are collected: the attack box of every fighter
+# on the frame its attack lands, every live projectile, and the hit box of
+# every fighter that can be hit. The broad phase sorts them by left edge and
+# sweeps along x (the arena is a horizontal strip, so x separates most boxes);
+# only boxes whose x ranges overlap are tested for a vertical overlap in the
+# narrow phase.
+
+import pygame
+
+from constants import *
+
+# Kinds of box in the sweep
+ATTACK = 0
+TARGET = 1
+
+class Projectile:
+    __slots__ = ("x", "y", "vx", "width", "height", "damage", "owner", "life", "alive")
+
+    def __init__(self, x, y, vx, owner, damage=DAMAGE["punch"], width=20, height=12, life=120):
+        """
+        A box flying along x that damages the first fighter it touches
+
+        Args:
+            x, y: Centre of the projectile
+            vx: Horizontal speed in pixels per frame
+            owner: Fighter that fired it (never hit by it)
+            damage: Damage dealt, reduced like an attack when blocked
+            width, height: Size of the hitbox
+            life: Frames before it disappears
+        """
+        self.x = x
+        self.y = y
+        self.vx = vx
+        self.width = width
+        self.height = height
+        self.damage = damage
+        self.owner = owner
+        self.life = life
+        self.alive = True
+
+    def update(self):
+        self.x += self.vx
+        self.life -= 1
+        if self.life <= 0 or self.x < -self.width or self.x > SCREEN_WIDTH + self.width:
+            self.alive = False
+
+    @property
+    def rect(self):
+        return pygame.Rect(self.x - self.width // 2, self.y - self.height // 2, self.width, self.height)
+
+    def apply_hit(self, target):
+        """Damage target and disappear, spawning a burst into the owner's effects"""
+        if target.blocking:
+            target.special_meter += self.damage * BLOCK_DAMAGE_REDUCTION
+        else:
+            target.health -= self.damage
+            self.owner.special_meter += self.damage
+        self.alive = False
+
+        effects = self.owner.effects
+        if effects is not None:
+            effects.spawn(self.x, self.y, BLUE if target.blocking else ORANGE, 6, 10, 0.3, 0.1)
+
+def sweep(boxes):
+    """
+    Broad and narrow phase over a list of boxes
+
+    Args:
+        boxes: (left, right, top, bottom, kind, owner, item) tuples where kind
+            is ATTACK or TARGET, owner is the fighter the box belongs to and
+            item is what the box stands for (a fighter or a projectile)
+
+    Returns:
+        (attack item, target item) pairs whose boxes overlap, in order of the
+        attack's left edge. Boxes never hit their own owner, and overlap follows
+        pygame.Rect.colliderect: touching edges do not count.
+    """
+    boxes.sort(key=lambda box: box[0])
+    attacks = []
+    targets = []
+    pairs = []
+    for box in boxes:
+        left, right, top, bottom, kind, owner, item = box
+        if right <= left or bottom <= top:
+            continue
+
+        # Forget boxes that end before this one starts
+        if attacks and any(other[1] <= left for other in attacks):
+            attacks = [other for other in attacks if other[1] > left]
+        if targets and any(other[1] <= left for other in targets):
+            targets = [other for other in targets if other[1] > left]
+
+        if kind == ATTACK:
+            for other in targets:
+                if other[5] is not owner and top < other[3] and other[2] < bottom:
+                    pairs.append((box, other))
+            attacks.append(box)
+        else:
+            for other in attacks:
+                if other[5] is not owner and top < other[3] and other[2] < bottom:
+                    pairs.append((other, box))
+            targets.append(box)
+
+    # Resolve in a fixed order so results do not depend on which box came first
+    pairs.sort(key=lambda pair: (pair[0][0], pair[1][0]))
+    return [(attack[6], target[6]) for attack, target in pairs]
+
+class CollisionWorld:
+    def __init__(self):
+        """Fighters and projectiles that can hit each other"""
+        self.fighters = []
+        self.projectiles = []
+
+        # Statistics of the last resolve()
+        self.boxes = 0
+        self.hits = 0
+
+    def add_fighter(self, fighter):
+        self.fighters.append(fighter)
+
+    def fire(self, fighter, speed=8, **kwargs):
+        """Launch a projectile from fighter's hands in the direction it faces"""
+        direction = 1 if fighter.direction == "right" else -1
+        projectile = Projectile(fighter.x + direction * fighter.width // 2, fighter.y - fighter.height // 3,
+                                direction * speed, fighter, **kwargs)
+        self.projectiles.append(projectile)
+        return projectile
+
+    def collect_boxes(self):
+        """The active hitboxes of this frame in the form sweep() takes"""
+        boxes = []
+        for fighter in self.fighters:
+            if fighter.health <= 0:
+                continue
+            box = fighter.hit_box
+            boxes.append((box.left, box.right, box.top, box.bottom, TARGET, fighter, fighter))
+            if fighter.striking:
+                box = fighter.attack_box
+                boxes.append((box.left, box.right, box.top, box.bottom, ATTACK, fighter, fighter))
+
+        for projectile in self.projectiles:
+            box = projectile.rect
+            boxes.append((box.left, box.right, box.top, box.bottom, ATTACK, projectile.owner, projectile))
+        return boxes
+
+    def resolve(self):
+        """
+        Land every hit of this frame
+
+        Returns:
+            List of (attacker, target) for the hits landed, where attacker is
+            a Fighter or a Projectile
+        """
+        boxes = self.collect_boxes()
+        landed = []
+        for attacker, target in sweep(boxes):
+            # A projectile stops at the first fighter it hits
+            if isinstance(attacker, Projectile) and not attacker.alive:
+                continue
+            attacker.apply_hit(target)
+            landed.append((attacker, target))
+
+        self.boxes = len(boxes)
+        self.hits = len(landed)
+        return landed
+
+    def update_projectiles(self):
+        for projectile in self.projectiles:
+            projectile.update()
+        self.remove_dead()
+
+    def remove_dead(self):
+        self.projectiles = [projectile for projectile in self.projectiles if projectile.alive]
@@ -3,7 +3,10 @@
 # Screen dimensions
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 500
-FPS = 60
+FPS = 60  # Simulation steps per second
+TIMESTEP = 1 / FPS
+MAX_FRAME_TIME = 0.25  # Longest stall caught up on before game time slows down
+RENDER_FPS = 120  # Cap on drawn frames per second (0 for uncapped)
 
 # Colors
 BLACK = (0, 0, 0)
@@ -20,18 +23,11 @@ BROWN = (139, 69, 19)
 
 # Game settings
 GRAVITY = 0.5
-DAMAGE = {
-    "punch": 5,
-    "kick": 8,
-    "special": 20
-}
-
-ENERGY_COST = {
-    "punch": 10,
-    "kick": 15,
-    "block": 5,
-    "special": 50
-}
+
+# Damage and energy cost of each move come from moves.json
+import moves as _moves
+DAMAGE = _moves.DAMAGE
+ENERGY_COST = _moves.ENERGY_COST
 
 # Fighter stats
 FIGHTER_WIDTH = 60
@@ -44,5 +40,9 @@ BLOCK_DAMAGE_REDUCTION = 0.25  # Block reduces damage by 75%
 COMBO_TIMEOUT = 60  # Frames before combo resets
 COMBO_BONUS = 0.2   # 20% damage bonus per combo hit
 
+# Effect settings
+MAX_PARTICLES = 2000  # Live particles allowed before new effects degrade
+PARTICLE_POLICY = "drop_oldest"  # or "reduce" (see effects.EffectPool)
+
 # Sound settings
 SOUND_VOLUME = 0.5
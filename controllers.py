@@ -0,0 +1,270 @@
+# controllers.py - Input sources that drive fighters
+#
+# A controller is a Simulation input source: it is called with its fighter
+# every frame and returns the control names held ("left", "punch", ...).
+# Controllers that need the whole match (replays, AIs) get it through
+# reset(sim, player), which Simulation.reset calls at the start of every match.
+#
+# The built-in CPU is not a controller: it runs inside Fighter.handle_cpu_ai for
+# fighters that are not player controlled, so CPU matches and their replays
+# stay exactly as they were.
+#
+# Compare the search AI against the built-in CPU:
+#   python controllers.py --difficulty hard -n 20
+
+import argparse
+import sys
+import time
+
+from constants import *
+from replay import ReplayPlayer
+from simulation import Simulation
+
+class Controller:
+    """Base class for input sources that want to know about the match"""
+    sim = None
+    player = 0
+
+    def reset(self, sim, player):
+        """Called at the start of every match with the fighter's index (0 or 1)"""
+        self.sim = sim
+        self.player = player
+
+    def __call__(self, fighter):
+        return ()
+
+class KeyboardController(Controller):
+    def __init__(self, buffer=None):
+        """
+        Reads the keyboard
+
+        Args:
+            buffer: keyboard.InputBuffer fed with the game's key events. When
+                None the keyboard is polled with Fighter.read_keyboard, which
+                misses taps shorter than a frame.
+        """
+        self.buffer = buffer
+
+    def __call__(self, fighter):
+        if self.buffer is None:
+            return fighter.read_keyboard()
+        return self.buffer.take(self.player, fighter)
+
+class ReplayController(Controller):
+    def __init__(self, replay, player=None):
+        """
+        Plays back one fighter's recorded inputs
+
+        Args:
+            replay: ReplayPlayer or the path of a replay file
+            player: Recorded fighter to copy (defaults to the one being driven)
+        """
+        self.replay = replay if isinstance(replay, ReplayPlayer) else ReplayPlayer(replay)
+        self.source = player
+
+    def __call__(self, fighter):
+        if self.sim.frame >= self.replay.frame_count:
+            return ()
+        player = self.player if self.source is None else self.source
+        return self.replay.inputs(self.sim.frame)[player]
+
+class ScriptedController(Controller):
+    def __init__(self, script, loop=False):
+        """
+        Holds a fixed sequence of inputs
+
+        Args:
+            script: Sequence of (frames, actions) pairs
+            loop: Start the script over when it runs out
+        """
+        self.script = [(frames, frozenset(actions)) for frames, actions in script]
+        self.loop = loop
+        self.step = 0
+        self.frames_left = 0
+
+    def reset(self, sim, player):
+        super().reset(sim, player)
+        self.step = 0
+        self.frames_left = self.script[0][0] if self.script else 0
+
+    def __call__(self, fighter):
+        while self.frames_left <= 0:
+            self.step += 1
+            if self.step >= len(self.script):
+                if not self.loop or not self.script:
+                    return ()
+                self.step = 0
+            self.frames_left = self.script[self.step][0]
+        self.frames_left -= 1
+        return self.script[self.step][1]
+
+# Moves the search AI chooses between, each held for a few frames
+SEARCH_MOVES = tuple(frozenset(move) for move in (
+    (), ("left",), ("right",), ("punch",), ("kick",), ("block",), ("special",)
+))
+
+# Preferred distance between the fighters' centres when not attacking
+STRIKING_RANGE = FIGHTER_WIDTH
+
+# Difficulty as search budget: plies searched, milliseconds per decision and
+# frames each move is held (longer holds react more slowly)
+DIFFICULTIES = {
+    "easy": {"depth": 1, "budget_ms": 1.0, "hold": 12},
+    "normal": {"depth": 2, "budget_ms": 4.0, "hold": 8},
+    "hard": {"depth": 3, "budget_ms": 6.0, "hold": 6}
+}
+
+class SearchController(Controller):
+    def __init__(self, difficulty="normal", depth=None, budget_ms=None, hold=None):
+        """
+        AI that looks ahead by simulating the match on a private copy
+
+        Every hold frames it searches sequences of SEARCH_MOVES up to depth
+        moves long, deepening while time is left in its budget, and plays the
+        first move of the best sequence found by the deepest completed search.
+        Sequences sharing a prefix resume from a snapshot taken after it.
+        The opponent is assumed to hold no keys; a CPU opponent is simulated
+        exactly since its random numbers are part of the copied state.
+
+        Args:
+            difficulty: Key of DIFFICULTIES giving the defaults below
+            depth: Most moves in a searched sequence
+            budget_ms: Time allowed for one decision
+            hold: Frames each move is held
+        """
+        settings = DIFFICULTIES[difficulty]
+        self.depth = depth or settings["depth"]
+        self.budget = (budget_ms or settings["budget_ms"]) / 1000
+        self.hold = hold or settings["hold"]
+
+        self.scratch = None
+        self.move = SEARCH_MOVES[0]
+        self.frames_left = 0
+
+        # Statistics
+        self.decisions = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.nodes = 0
+        self.depth_reached = {}
+
+    def reset(self, sim, player):
+        super().reset(sim, player)
+        if self.scratch is None:
+            self.scratch = Simulation("versus", seed=sim.seed, effects=False)
+        self.move = SEARCH_MOVES[0]
+        self.frames_left = 0
+
+    def __call__(self, fighter):
+        if self.frames_left <= 0:
+            self.move = self.decide()
+            self.frames_left = self.hold
+        self.frames_left -= 1
+        return self.move
+
+    def decide(self):
+        start = time.perf_counter()
+        deadline = start + self.budget
+        # Particles are only for show, so the search starts without them
+        self.scratch.restore(self.sim.snapshot())
+        self.scratch.particles.clear()
+        root = self.scratch.snapshot()
+
+        best_move = SEARCH_MOVES[0]
+        completed = 0
+        for depth in range(1, self.depth + 1):
+            result = self.search(root, depth, deadline)
+            if result is None:
+                break
+            best_move = result[1]
+            completed = depth
+
+        elapsed = time.perf_counter() - start
+        self.decisions += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.depth_reached[completed] = self.depth_reached.get(completed, 0) + 1
+        return best_move
+
+    def search(self, state, depth, deadline):
+        """
+        Depth-first search over move sequences starting from a snapshot
+
+        Returns:
+            (best score, first move reaching it), or None if time ran out
+        """
+        sim = self.scratch
+        actions = [(), ()]
+        best = None
+        for move in SEARCH_MOVES:
+            if time.perf_counter() > deadline:
+                return None
+
+            sim.restore(state)
+            actions[self.player] = move
+            for frame in range(self.hold):
+                sim.step(actions)
+                if sim.over:
+                    break
+            self.nodes += 1
+
+            if depth == 1 or sim.over:
+                score = self.evaluate(sim)
+            else:
+                result = self.search(sim.snapshot(), depth - 1, deadline)
+                if result is None:
+                    return None
+                score = result[0]
+
+            if best is None or score > best[0]:
+                best = (score, move)
+        return best
+
+    def evaluate(self, sim):
+        fighters = (sim.player1, sim.player2)
+        me, opponent = fighters[self.player], fighters[1 - self.player]
+        if sim.over:
+            return 1000.0 if me.health > 0 else -1000.0
+
+        score = me.health - opponent.health
+        # Small preferences: keep energy and meter, and stand facing the
+        # opponent at striking range (attack boxes miss a fighter standing on
+        # top of its opponent)
+        score += 0.05 * me.energy + 0.05 * me.special_meter
+        distance = opponent.x - me.x
+        score -= 0.02 * abs(abs(distance) - STRIKING_RANGE)
+        if (distance > 0) != (me.direction == "right"):
+            score -= 1.0
+        return score
+
+    def stats(self):
+        return {
+            "decisions": self.decisions,
+            "mean_decision_ms": self.total_time * 1000 / self.decisions if self.decisions else 0.0,
+            "max_decision_ms": self.max_time * 1000,
+            "moves_simulated_per_decision": self.nodes / self.decisions if self.decisions else 0.0,
+            "depth_reached": dict(sorted(self.depth_reached.items()))
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play the search AI against the built-in CPU")
+    parser.add_argument("--difficulty", choices=tuple(DIFFICULTIES), default="normal")
+    parser.add_argument("-n", "--matches", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first match")
+    parser.add_argument("--max-frames", type=int, default=18000)
+    args = parser.parse_args(argv)
+
+    ai = SearchController(args.difficulty)
+    sim = Simulation("solo", (ai, None), args.seed)
+    wins = {"Player 1": 0, "Player 2": 0, None: 0}
+    for seed in range(args.seed, args.seed + args.matches):
+        sim.reset(seed=seed)
+        wins[sim.run(args.max_frames)] += 1
+
+    print(f"search AI ({args.difficulty}) vs CPU: {wins['Player 1']} wins, "
+          f"{wins['Player 2']} losses, {wins[None]} draws")
+    for key, value in ai.stats().items():
+        print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+
+if __name__ == "__main__":
+    sys.exit(main())
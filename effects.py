@@ -3,10 +3,287 @@
 import pygame
 import random
 import math
+from collections import OrderedDict
+import numpy as np
 from constants import *
 
+class SpriteCache:
+    def __init__(self, budget=4 * 1024 * 1024):
+        """
+        Least-recently-used cache of pre-rendered particle sprites
+        
+        Sprites are keyed by quantized (radius, color, alpha) so a particle
+        only costs a dictionary lookup and a blit.
+        
+        Args:
+            budget: Maximum bytes of pixel data to keep cached
+        """
+        self.budget = budget
+        self.sprites = OrderedDict()
+        self.bytes = 0
+        
+        # Counters for sizing the cache
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        """Return the sprite for a key built by quantize()"""
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+            return sprite
+        
+        self.misses += 1
+        sprite = self.render(key)
+        self.sprites[key] = sprite
+        self.bytes += sprite.get_width() * sprite.get_height() * 4
+        
+        # Evict least recently used sprites until back under budget
+        while self.bytes > self.budget and len(self.sprites) > 1:
+            old_key, old = self.sprites.popitem(last=False)
+            self.bytes -= old.get_width() * old.get_height() * 4
+            self.evictions += 1
+        
+        return sprite
+    
+    @staticmethod
+    def quantize(radius, color, alpha):
+        """
+        Pack integer radii, RGB rows and alphas into cache keys
+        
+        Color channels are reduced to 8 levels and alpha to 16 levels.
+        """
+        channels = (color.astype(np.int64) * 7 + 127) // 255
+        alpha = (alpha.astype(np.int64) * 15 + 127) // 255
+        return ((radius.astype(np.int64) << 13) | (channels[:, 0] << 10) | (channels[:, 1] << 7)
+                | (channels[:, 2] << 4) | alpha)
+    
+    @staticmethod
+    def render(key):
+        """Draw the translucent circle described by a cache key"""
+        radius = key >> 13
+        color = (((key >> 10) & 7) * 255 // 7, ((key >> 7) & 7) * 255 // 7,
+                 ((key >> 4) & 7) * 255 // 7, (key & 15) * 17)
+        
+        sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, color, (radius, radius), radius)
+        return sprite
+    
+    def clear(self):
+        self.sprites.clear()
+        self.bytes = 0
+    
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "sprites": len(self.sprites),
+            "bytes": self.bytes
+        }
+
+# Sprite cache shared by every particle system
+sprite_cache = SpriteCache()
+
+class ParticleSystem:
+    def __init__(self, capacity=256):
+        """
+        Particles for any number of effects stored as parallel NumPy arrays
+        
+        Live particles always occupy slots [0, count); dead ones are removed by
+        moving particles from the end of the live range into their slots.
+        
+        Args:
+            capacity: Number of particle slots to preallocate
+        """
+        self.count = 0
+        self.allocate(capacity)
+    
+    def allocate(self, capacity):
+        """(Re)allocate the particle arrays, keeping live particles"""
+        old = self.arrays() if self.count else None
+        
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.size = np.zeros(capacity)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.life = np.zeros(capacity)
+        self.gravity = np.zeros(capacity)
+        
+        if old is not None:
+            for new_array, old_array in zip(self.arrays(), old):
+                new_array[:self.count] = old_array[:self.count]
+    
+    def arrays(self):
+        return self.pos, self.vel, self.size, self.color, self.life, self.gravity
+    
+    def __len__(self):
+        return self.count
+    
+    @property
+    def active(self):
+        return self.count > 0
+    
+    def clear(self):
+        self.count = 0
+    
+    def snapshot(self):
+        """Return the live particles as bytes"""
+        n = self.count
+        if not n:
+            return bytes(4)
+        return n.to_bytes(4, "little") + b"".join(array[:n].tobytes() for array in self.arrays())
+    
+    def restore(self, blob):
+        """Replace all particles with ones saved by snapshot()"""
+        count = int.from_bytes(blob[:4], "little")
+        if not count:
+            self.count = 0
+            return
+        if count > self.capacity:
+            self.count = 0
+            self.allocate(count)
+        
+        offset = 4
+        for array in self.arrays():
+            size = array[:count].nbytes
+            array[:count] = np.frombuffer(blob, array.dtype, size // array.itemsize, offset).reshape(
+                (count,) + array.shape[1:])
+            offset += size
+        self.count = count
+    
+    def emit(self, x, y, vx, vy, size, color, life, gravity):
+        """
+        Append a batch of particles
+        
+        Args:
+            x, y: Start position (scalars or arrays)
+            vx, vy: Velocity arrays; their length is the batch size
+            size: Particle radii
+            color: Array of RGB rows (or a single RGB triple)
+            life: Frames until each particle disappears
+            gravity: Gravity applied to the batch each frame
+        """
+        count = len(vx)
+        if self.count + count > self.capacity:
+            self.allocate(max(self.capacity * 2, self.count + count))
+        
+        batch = slice(self.count, self.count + count)
+        self.pos[batch, 0] = x
+        self.pos[batch, 1] = y
+        self.vel[batch, 0] = vx
+        self.vel[batch, 1] = vy
+        self.size[batch] = size
+        self.color[batch] = color
+        self.life[batch] = life
+        self.gravity[batch] = gravity
+        self.count += count
+    
+    def add(self, effect, count=None):
+        """
+        Take over the live particles of a ParticleEffect
+        
+        Args:
+            effect: Effect whose particles are copied
+            count: Take only this many of them, spread evenly over the effect
+        """
+        source = effect.system
+        if count is None or count >= source.count:
+            count = source.count
+            taken = slice(0, count)
+        else:
+            taken = np.linspace(0, source.count - 1, count).astype(int)
+        if not count:
+            return
+        
+        if self.count + count > self.capacity:
+            self.allocate(max(self.capacity * 2, self.count + count))
+        
+        batch = slice(self.count, self.count + count)
+        for target, array in zip(self.arrays(), source.arrays()):
+            target[batch] = array[taken]
+        self.count += count
+    
+    def drop_oldest(self, count):
+        """Remove the count particles nearest the end of their life"""
+        n = self.count
+        if count >= n:
+            self.count = 0
+            return
+        if count <= 0:
+            return
+        
+        oldest = np.sort(np.argpartition(self.life[:n], count - 1)[:count])
+        self.life[oldest] = 0
+        self.remove(oldest)
+    
+    def update(self):
+        """Integrate gravity, motion and lifetime for every live particle"""
+        n = self.count
+        if not n:
+            return
+        
+        self.vel[:n, 1] += self.gravity[:n]
+        self.pos[:n] += self.vel[:n]
+        self.life[:n] -= 1
+        
+        dead = np.flatnonzero(self.life[:n] <= 0)
+        if dead.size:
+            self.remove(dead)
+    
+    def remove(self, dead):
+        """Swap-remove the particles at the (sorted) indices in dead"""
+        n = self.count
+        live = n - dead.size
+        
+        # Holes below the new end are filled by survivors from above it
+        holes = dead[dead < live]
+        if holes.size:
+            tail = np.arange(live, n)
+            movers = tail[self.life[live:n] > 0]
+            for array in self.arrays():
+                array[holes] = array[movers]
+        
+        self.count = live
+    
+    def draw(self, surface, cache=None, scale=1.0):
+        """
+        Draw all particles to the surface with one batched blit and return their bounding rect
+        
+        Args:
+            scale: Render scale; positions and sizes are multiplied by it
+        """
+        n = self.count
+        if not n:
+            return None
+        if cache is None:
+            cache = sprite_cache
+        
+        # Alpha based on remaining life
+        alpha = np.minimum(255 * self.life[:n] / 40, 255).astype(int)
+        if scale == 1.0:
+            pos = self.pos[:n]
+            radius = np.maximum(np.rint(self.size[:n]), 1).astype(int)
+        else:
+            pos = self.pos[:n] * scale
+            radius = np.maximum(np.rint(self.size[:n] * scale), 1).astype(int)
+        keys = cache.quantize(radius, self.color[:n], alpha)
+        
+        corners = pos - radius[:, None]
+        get = cache.get
+        surface.blits([(get(key), corner) for key, corner in zip(keys.tolist(), corners.tolist())], False)
+        
+        left, top = corners.min(axis=0)
+        right, bottom = (corners + 2 * radius[:, None]).max(axis=0)
+        return pygame.Rect(int(left) - 1, int(top) - 1, int(right - left) + 3, int(bottom - top) + 3)
+
 class ParticleEffect:
-    def __init__(self, x, y, color, count, size, speed, gravity):
+    def __init__(self, x, y, color, count, size, speed, gravity, rng=None):
         """
         Create a particle effect
         
@@ -17,120 +294,158 @@ class ParticleEffect:
             size: Maximum size of particles
             speed: Maximum speed of particles
             gravity: Gravity effect on particles
+            rng: MatchRandom or random.Random to draw from (defaults to the random module)
         """
-        self.particles = []
-        self.active = True
-        
-        # Create particles
-        for i in range(count):
-            angle = random.uniform(0, math.pi * 2)
-            speed_val = random.uniform(speed * 0.5, speed)
-            
-            particle = {
-                "x": x,
-                "y": y,
-                "vx": math.cos(angle) * speed_val,
-                "vy": math.sin(angle) * speed_val,
-                "size": random.uniform(size * 0.5, size),
-                "color": self.get_particle_color(color),
-                "life": random.uniform(20, 40)  # Frames until particle disappears
-            }
-            
-            self.particles.append(particle)
-        
+        self.rng = rng if rng is not None else random
+        self.system = ParticleSystem(count)
+        self.reset(x, y, color, count, size, speed, gravity)
+    
+    def reset(self, x, y, color, count, size, speed, gravity):
+        """Start the effect over, reusing its particle arrays (arguments as for __init__)"""
+        self.system.clear()
         self.gravity = gravity
+        
+        self.burst(x, y, color, count, (size * 0.5, size), (speed * 0.5, speed), (20, 40))
+    
+    def burst(self, x, y, color, count, size_range, speed_range, life_range):
+        """Emit count particles flying out from (x, y) in random directions"""
+        uniform = self.rng.uniform
+        angle = np.array([uniform(0, math.pi * 2) for i in range(count)])
+        speed = np.array([uniform(*speed_range) for i in range(count)])
+        
+        self.system.emit(
+            x, y,
+            np.cos(angle) * speed,
+            np.sin(angle) * speed,
+            [uniform(*size_range) for i in range(count)],
+            [self.get_particle_color(color) for i in range(count)],
+            [uniform(*life_range) for i in range(count)],  # Frames until particle disappears
+            self.gravity
+        )
+    
+    @property
+    def active(self):
+        return self.system.active
     
     def get_particle_color(self, base_color):
         """Create a slightly varied color based on the base color"""
         r, g, b = base_color
         variation = 30
         
-        r = max(0, min(255, r + random.randint(-variation, variation)))
-        g = max(0, min(255, g + random.randint(-variation, variation)))
-        b = max(0, min(255, b + random.randint(-variation, variation)))
+        randint = self.rng.randint
+        r = max(0, min(255, r + randint(-variation, variation)))
+        g = max(0, min(255, g + randint(-variation, variation)))
+        b = max(0, min(255, b + randint(-variation, variation)))
         
         return (r, g, b)
     
     def update(self):
         """Update all particles in the effect"""
-        # Check if any particles are still active
-        if not self.particles:
-            self.active = False
-            return
-        
-        # Update each particle
-        for particle in self.particles[:]:
-            # Apply gravity
-            particle["vy"] += self.gravity
-            
-            # Move particle
-            particle["x"] += particle["vx"]
-            particle["y"] += particle["vy"]
-            
-            # Reduce life
-            particle["life"] -= 1
-            
-            # Remove dead particles
-            if particle["life"] <= 0:
-                self.particles.remove(particle)
+        self.system.update()
     
     def draw(self, surface):
         """Draw all particles to the surface"""
-        for particle in self.particles:
-            # Calculate alpha based on remaining life
-            alpha = int(255 * (particle["life"] / 40))
-            
-            # Create a surface for the particle with alpha
-            particle_surface = pygame.Surface((particle["size"] * 2, particle["size"] * 2), pygame.SRCALPHA)
-            
-            # Get color with alpha
-            r, g, b = particle["color"]
-            color_alpha = (r, g, b, alpha)
-            
-            # Draw circle
-            pygame.draw.circle(particle_surface, color_alpha, 
-                              (particle["size"], particle["size"]), 
-                              particle["size"])
-            
-            # Draw to main surface
-            surface.blit(particle_surface, 
-                        (particle["x"] - particle["size"], 
-                         particle["y"] - particle["size"]))
+        return self.system.draw(surface)
 
 class ExplosionEffect(ParticleEffect):
-    def __init__(self, x, y):
+    def __init__(self, x, y, rng=None):
         """Special explosion effect for special moves"""
-        super().__init__(x, y, RED, 30, 15, 2.0, 0.05)
+        super().__init__(x, y, RED, 30, 15, 2.0, 0.05, rng)
+    
+    def reset(self, x, y, color=RED, count=30, size=15, speed=2.0, gravity=0.05):
+        super().reset(x, y, color, count, size, speed, gravity)
         
         # Add additional particles with different colors
-        for i in range(15):
-            angle = random.uniform(0, math.pi * 2)
-            speed_val = random.uniform(1.0, 3.0)
-            
-            particle = {
-                "x": x,
-                "y": y,
-                "vx": math.cos(angle) * speed_val,
-                "vy": math.sin(angle) * speed_val,
-                "size": random.uniform(5, 12),
-                "color": self.get_particle_color(ORANGE),
-                "life": random.uniform(30, 60)
-            }
-            
-            self.particles.append(particle)
-            
-        for i in range(10):
-            angle = random.uniform(0, math.pi * 2)
-            speed_val = random.uniform(0.5, 2.0)
-            
-            particle = {
-                "x": x,
-                "y": y,
-                "vx": math.cos(angle) * speed_val,
-                "vy": math.sin(angle) * speed_val,
-                "size": random.uniform(8, 20),
-                "color": self.get_particle_color(YELLOW),
-                "life": random.uniform(20, 50)
-            }
-            
-            self.particles.append(particle)
+        self.burst(x, y, ORANGE, 15, (5, 12), (1.0, 3.0), (30, 60))
+        self.burst(x, y, YELLOW, 10, (8, 20), (0.5, 2.0), (20, 50))
+
+# What EffectPool does when a new effect would pass its particle cap
+PARTICLE_POLICIES = ("drop_oldest", "reduce")
+
+class EffectPool:
+    def __init__(self, system, cap=MAX_PARTICLES, policy=PARTICLE_POLICY, rng=None):
+        """
+        Spawns effects into a shared ParticleSystem, reusing effect objects
+        
+        Each effect is built in a pooled ParticleEffect and its particles are
+        copied into the system's slots, so once the pool and the system have
+        grown to what a match needs, spawning allocates nothing new.
+        
+        Args:
+            system: ParticleSystem the particles join
+            cap: Most live particles allowed in the system
+            policy: What happens when an effect would pass the cap:
+                "drop_oldest" removes the particles nearest the end of their
+                life to make room, "reduce" spawns only as many of the
+                effect's particles as still fit
+            rng: MatchRandom or random.Random the effects draw from
+        """
+        if policy not in PARTICLE_POLICIES:
+            raise ValueError(f"unknown particle policy {policy!r}")
+        self.system = system
+        self.cap = cap
+        self.policy = policy
+        self.rng = rng if rng is not None else random
+        
+        # Idle effect objects by class
+        self.free = {}
+        
+        # Counters
+        self.spawned = 0
+        self.reused = 0
+        self.dropped = 0  # Live particles removed to make room
+        self.reduced = 0  # New particles never spawned
+    
+    def acquire(self, kind):
+        free = self.free.get(kind)
+        if free:
+            self.reused += 1
+            return free.pop()
+        return None
+    
+    def spawn(self, x, y, color, count, size, speed, gravity):
+        """A burst of particles, with the arguments of ParticleEffect"""
+        effect = self.acquire(ParticleEffect)
+        if effect is None:
+            effect = ParticleEffect(x, y, color, count, size, speed, gravity, self.rng)
+        else:
+            effect.reset(x, y, color, count, size, speed, gravity)
+        self.add(effect)
+    
+    def explode(self, x, y):
+        """An ExplosionEffect at (x, y)"""
+        effect = self.acquire(ExplosionEffect)
+        if effect is None:
+            effect = ExplosionEffect(x, y, self.rng)
+        else:
+            effect.reset(x, y)
+        self.add(effect)
+    
+    def add(self, effect):
+        """Move an effect's particles into the system within the cap and take the effect back"""
+        count = effect.system.count
+        room = self.cap - self.system.count
+        if count > room and self.policy == "drop_oldest":
+            drop = min(count - room, self.system.count)
+            self.system.drop_oldest(drop)
+            self.dropped += drop
+            room += drop
+        if count > room:
+            self.reduced += count - room
+            count = max(room, 0)
+        
+        self.system.add(effect, count)
+        effect.system.clear()
+        self.free.setdefault(type(effect), []).append(effect)
+        self.spawned += 1
+    
+    def stats(self):
+        return {
+            "spawned": self.spawned,
+            "reused": self.reused,
+            "pooled": sum(len(free) for free in self.free.values()),
+            "particles": self.system.count,
+            "cap": self.cap,
+            "dropped": self.dropped,
+            "reduced": self.reduced
+        }
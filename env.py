@@ -0,0 +1,332 @@
+# env.py - Reinforcement learning environments over the fighting simulation
+#
+# FightEnv wraps one Simulation with a Gym-style reset()/step() API: the agent
+# plays player 1 against the built-in CPU or another policy. VecFightEnv runs
+# many self-play matches at once with the fighter rules rewritten over NumPy
+# arrays, one row per match, for fast training without rendering.
+#
+# An action is an input bitmask as used in replays (replay.encode_actions), so
+# there are ACTION_COUNT discrete actions. Observations are float32 vectors of
+# OBSERVATION_SIZE values: the acting fighter's features followed by its
+# opponent's (see FIGHTER_FEATURES).
+
+import numpy as np
+
+from constants import *
+from fighter import ACTIONS, DIRECTIONS, MOVE_PRIORITY
+from moves import move_table
+from replay import CONTROL_ACTIONS, decode_actions
+from simulation import Simulation
+
+ACTION_COUNT = 1 << len(CONTROL_ACTIONS)
+
+# Per-fighter observation values, each scaled to roughly 0..1
+FIGHTER_FEATURES = ("x", "health", "energy", "special_meter", "action", "action_time",
+                    "direction", "blocking", "combo_counter")
+OBSERVATION_SIZE = 2 * len(FIGHTER_FEATURES)
+
+# Action indexes as used by VecFightEnv.action
+IDLE, PUNCH, KICK, BLOCK, SPECIAL = (ACTIONS.index(name) for name in
+                                     ("idle", "punch", "kick", "block", "special"))
+LEFT, RIGHT = DIRECTIONS.index("left"), DIRECTIONS.index("right")
+START_X = (200, 600)
+
+# Bits of an action mask
+LEFT_BIT, RIGHT_BIT, PUNCH_BIT, KICK_BIT, BLOCK_BIT, SPECIAL_BIT = (
+    1 << CONTROL_ACTIONS.index(name) for name in ("left", "right", "punch", "kick", "block", "special"))
+MOVE_BITS = {name: 1 << CONTROL_ACTIONS.index(name) for name in MOVE_PRIORITY}
+
+def fighter_features(fighter):
+    return (
+        fighter.x / SCREEN_WIDTH,
+        fighter.health / 100,
+        fighter.energy / 100,
+        fighter.special_meter / fighter.special_threshold,
+        ACTIONS.index(fighter.action) / (len(ACTIONS) - 1),
+        fighter.action_time / fighter.action_duration,
+        DIRECTIONS.index(fighter.direction),
+        fighter.blocking,
+        fighter.combo_counter / 10
+    )
+
+class FightEnv:
+    def __init__(self, opponent=None, seed=0, max_frames=3600):
+        """
+        One match with the agent as player 1
+
+        Args:
+            opponent: None for the built-in CPU, or a policy called with player
+                2's observation that returns an action mask
+            seed: Seed of the first match; each reset() uses the next one
+            max_frames: Frames before a match is cut off (truncated)
+        """
+        self.opponent = opponent
+        self.seed = seed
+        self.max_frames = max_frames
+        self.sim = Simulation("solo" if opponent is None else "versus", seed=seed, effects=False)
+
+    def observe(self, player=0):
+        """Observation from one fighter's point of view"""
+        fighters = (self.sim.player1, self.sim.player2)
+        own, other = fighters[player], fighters[1 - player]
+        return np.array(fighter_features(own) + fighter_features(other), dtype=np.float32)
+
+    def reset(self, seed=None):
+        """Start a new match, returning (observation, info)"""
+        if seed is None:
+            seed = self.seed
+        self.seed = seed + 1
+        self.sim.reset(seed=seed)
+        return self.observe(), {}
+
+    def step(self, action):
+        """
+        Play one frame
+
+        Args:
+            action: Input bitmask for player 1
+
+        Returns:
+            (observation, reward, terminated, truncated, info). The reward is
+            the damage dealt minus the damage taken this frame (in units of
+            full health), plus 1 for winning or -1 for losing.
+        """
+        sim = self.sim
+        health = sim.player1.health, sim.player2.health
+
+        opponent = None
+        if self.opponent is not None:
+            opponent = decode_actions(int(self.opponent(self.observe(1))))
+        sim.step((decode_actions(int(action)), opponent))
+
+        reward = ((health[1] - sim.player2.health) - (health[0] - sim.player1.health)) / 100
+        if sim.over:
+            reward += 1.0 if sim.winner == "Player 1" else -1.0
+
+        truncated = not sim.over and sim.frame >= self.max_frames
+        return self.observe(), reward, sim.over, truncated, {"frame": sim.frame, "winner": sim.winner}
+
+class VecFightEnv:
+    def __init__(self, num_envs, max_frames=3600):
+        """
+        Many self-play matches stepped together
+
+        Both fighters in every match are agents. State is kept as arrays of
+        shape (num_envs, 2), column 0 for player 1 and column 1 for player 2,
+        and follows the same rules as Fighter.update with player input.
+        Finished matches restart automatically on the next step.
+
+        Args:
+            num_envs: Number of matches
+            max_frames: Frames before a match is cut off (truncated)
+        """
+        self.num_envs = num_envs
+        self.max_frames = max_frames
+
+        shape = (num_envs, 2)
+        self.x = np.zeros(shape)
+        self.prev_x = np.zeros(shape)
+        self.health = np.zeros(shape)
+        self.energy = np.zeros(shape)
+        self.special_meter = np.zeros(shape)
+        self.action = np.zeros(shape, np.int8)
+        self.action_time = np.zeros(shape, np.int32)
+        self.attack_hit = np.zeros(shape, bool)
+        self.direction = np.zeros(shape, np.int8)
+        self.blocking = np.zeros(shape, bool)
+        self.special_ready = np.zeros(shape, bool)
+        self.special_active = np.zeros(shape, bool)
+        self.combo_counter = np.zeros(shape, np.int32)
+        self.combo_timer = np.zeros(shape, np.int32)
+        self.frame = np.zeros(num_envs, np.int32)
+
+        # Fixed fighter geometry
+        self.width = FIGHTER_WIDTH
+        self.height = FIGHTER_HEIGHT
+        self.y = SCREEN_HEIGHT - 100
+        self.damage = np.array([float(DAMAGE.get(name, 0)) for name in ACTIONS])
+        self.cost = {name: ENERGY_COST[name] for name in ("punch", "kick", "block", "special")}
+
+        # The fighters' move table as arrays: frames per action, and attack box
+        # offsets (x, y, width, height) by action, frame and direction
+        table = move_table(self.width, self.height)
+        self.duration = np.array(table.duration)
+        self.time_scale = np.maximum(self.duration, 1)
+        self.boxes = np.array([box or (0, 0, 0, 0) for box in table.boxes],
+                              dtype=np.float64).reshape(len(ACTIONS), table.stride, 2, 4)
+
+        self.reset()
+
+    def reset(self, mask=None):
+        """Restart every match (or those where mask is True) and return the observations"""
+        if mask is None:
+            mask = np.ones(self.num_envs, bool)
+        self.x[mask] = START_X
+        self.prev_x[mask] = START_X
+        self.direction[mask] = (RIGHT, LEFT)
+        self.health[mask] = 100
+        self.energy[mask] = 100
+        for array in (self.special_meter, self.action, self.action_time, self.attack_hit, self.blocking,
+                      self.special_ready, self.special_active, self.combo_counter, self.combo_timer):
+            array[mask] = 0
+        self.frame[mask] = 0
+        return self.observe()
+
+    def observe(self):
+        """Observations of shape (num_envs, 2, OBSERVATION_SIZE), one row per agent"""
+        features = np.stack((
+            self.x / SCREEN_WIDTH,
+            self.health / 100,
+            self.energy / 100,
+            self.special_meter / SPECIAL_THRESHOLD,
+            self.action / (len(ACTIONS) - 1),
+            self.action_time / self.time_scale[self.action],
+            self.direction,
+            self.blocking,
+            self.combo_counter / 10
+        ), axis=-1).astype(np.float32)
+        return np.concatenate((features, features[:, ::-1]), axis=-1)
+
+    def step(self, actions):
+        """
+        Play one frame of every match
+
+        Args:
+            actions: Integer array of shape (num_envs, 2) with each fighter's
+                input bitmask
+
+        Returns:
+            (observations, rewards, terminated, truncated). Rewards have shape
+            (num_envs, 2) and follow FightEnv; the other two are booleans per
+            match. The observations of finished matches are those of the fresh
+            match that replaced them.
+        """
+        actions = np.asarray(actions)
+        health = self.health.copy()
+
+        # Player 1 moves and lands hits before player 2 acts, as in Simulation.step
+        self.update_fighter(0, actions[:, 0])
+        self.update_fighter(1, actions[:, 1])
+        self.frame += 1
+
+        dealt = health - self.health
+        rewards = (dealt[:, ::-1] - dealt) / 100
+
+        lost = self.health <= 0
+        terminated = lost.any(axis=1)
+        # Player 1 losing is checked first, so a double knockout goes to player 2
+        p2_wins = terminated & lost[:, 0]
+        p1_wins = terminated & ~lost[:, 0]
+        rewards[p1_wins] += (1.0, -1.0)
+        rewards[p2_wins] += (-1.0, 1.0)
+        truncated = ~terminated & (self.frame >= self.max_frames)
+
+        done = terminated | truncated
+        if done.any():
+            self.reset(done)
+        return self.observe(), rewards, terminated, truncated
+
+    def update_fighter(self, i, mask):
+        """Vectorized Fighter.update for column i with player input"""
+        x = self.x[:, i]
+        action = self.action[:, i]
+        action_time = self.action_time[:, i]
+        attack_hit = self.attack_hit[:, i]
+        energy = self.energy[:, i]
+        combo = self.combo_counter[:, i]
+        combo_timer = self.combo_timer[:, i]
+        blocking = self.blocking[:, i]
+        special_active = self.special_active[:, i]
+        special_ready = self.special_ready[:, i]
+        special_meter = self.special_meter[:, i]
+        direction = self.direction[:, i]
+
+        # The hit box is placed before this frame's movement
+        self.prev_x[:, i] = x
+
+        # Action timer
+        acting = action != IDLE
+        action_time[acting] += 1
+        ended = acting & (action_time >= self.duration[action])
+        action[ended] = IDLE
+        action_time[ended] = 0
+        blocking[ended] = False
+        special_active[ended] = False
+
+        # Combo timer
+        counting = combo > 0
+        combo_timer[counting] += 1
+        expired = counting & (combo_timer >= COMBO_TIMEOUT)
+        combo[expired] = 0
+        combo_timer[expired] = 0
+
+        # Energy regeneration
+        idle = action == IDLE
+        regen = idle & (energy < 100)
+        energy[regen] = np.minimum(energy[regen] + 0.5, 100)
+
+        special_ready |= special_meter >= SPECIAL_THRESHOLD
+
+        # Player input, applied in the same order as handle_player_input
+        half = self.width // 2
+        moving = idle & (mask & LEFT_BIT != 0)
+        x[moving] = np.maximum(x[moving] - FIGHTER_SPEED, half)
+        direction[moving] = LEFT
+        moving = idle & (mask & RIGHT_BIT != 0)
+        x[moving] = np.minimum(x[moving] + FIGHTER_SPEED, SCREEN_WIDTH - half)
+        direction[moving] = RIGHT
+
+        # At most one move starts, the first in MOVE_PRIORITY that is held and
+        # affordable; each start below only sees fighters still free
+        free = idle.copy()
+        for name in MOVE_PRIORITY:
+            new_action = ACTIONS.index(name)
+            cost = self.cost[name]
+            start = free & (mask & MOVE_BITS[name] != 0) & (energy >= cost)
+            if name == "special":
+                start &= special_ready
+            free &= ~start
+            action[start] = new_action
+            action_time[start] = 0
+            attack_hit[start] = False
+            energy[start] -= cost
+
+            if name == "block":
+                blocking[start] = True
+            elif name == "special":
+                special_meter[start] = 0
+                special_ready[start] = False
+                special_active[start] = True
+                combo[start] = 0
+                combo_timer[start] = 0
+            else:
+                combo[start] += 1
+                combo_timer[start] = 0
+
+        # Hits land on an attack's active frames, once per attack, when the
+        # attack box overlaps the opponent's hit box (placed at the start of
+        # its last update)
+        j = 1 - i
+        box = self.boxes[action, action_time, direction]
+        striking = (box[:, 2] > 0) & ~attack_hit
+        if not striking.any():
+            return
+
+        ax = x + box[:, 0]
+        ay = self.y + box[:, 1]
+        target_x = self.prev_x[:, j] - half
+        target_y = self.y - self.height // 2
+        hit = (striking &
+               (ax < target_x + self.width) & (target_x < ax + box[:, 2]) &
+               (ay < target_y + self.height) & (target_y < ay + box[:, 3]))
+        if not hit.any():
+            return
+        attack_hit[hit] = True
+
+        damage = self.damage[action]
+        damage = np.where(combo > 1, damage + damage * COMBO_BONUS * (combo - 1), damage)
+        blocked = hit & self.blocking[:, j]
+        landed = hit & ~self.blocking[:, j]
+        self.special_meter[blocked, j] += damage[blocked] * BLOCK_DAMAGE_REDUCTION
+        self.health[landed, j] -= damage[landed]
+        special_meter[landed] += damage[landed] * 2
@@ -0,0 +1,294 @@
+# export.py - Rendering matches to image files or video faster than real time
+#
+# Frames are composed by Game.draw on an off-screen Surface, so no window is
+# opened. Encoding runs on a worker thread fed through a bounded queue: the game
+# thread simulates and draws the next frame while earlier ones are written, and
+# only waits when the encoder falls a full queue behind.
+#
+# The output format follows the output name:
+#   frames/      no extension: a directory of numbered PNG frames
+#   match.gif    animated GIF (needs Pillow)
+#   match.mp4    anything else is encoded by the ffmpeg executable
+#
+# Export a recorded match drawn at half size, drawing every other frame:
+#   python export.py --replay replays/match.sfr --scale 0.5 --skip 1 match.mp4
+# Export a seeded CPU vs CPU match as PNG frames:
+#   python export.py --seed 3 frames/
+
+import argparse
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+import time
+import zlib
+
+import pygame
+
+from constants import *
+from renderer import render_size
+
+QUEUE_SIZE = 8  # Frames waiting for the encoder before rendering blocks
+HOLD_SECONDS = 2.0  # How long the game over screen is shown at the end
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+class PngWriter:
+    def __init__(self, directory, size, fps):
+        """
+        Numbered PNG frames in a directory
+
+        Frames are compressed with zlib directly rather than with
+        pygame.image.save, which holds the GIL and would stall rendering on
+        the game thread for as long as it runs.
+        """
+        self.directory = directory
+        self.size = size
+        self.frames = 0
+        self.header = b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", struct.pack(">IIBBBBB", size[0], size[1], 8, 2, 0, 0, 0))
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, data):
+        # Every row starts with filter type 0 (none)
+        stride = self.size[0] * 3
+        rows = b"".join(b"\0" + data[start:start + stride] for start in range(0, len(data), stride))
+        path = os.path.join(self.directory, f"frame-{self.frames:05d}.png")
+        with open(path, "wb") as f:
+            f.write(self.header + png_chunk(b"IDAT", zlib.compress(rows)) + png_chunk(b"IEND", b""))
+        self.frames += 1
+
+    def close(self):
+        pass
+
+class GifWriter:
+    def __init__(self, path, size, fps):
+        """
+        Animated GIF written through Pillow
+
+        GIF frame delays are in hundredths of a second and viewers slow down
+        delays under 2, so export GIFs at 50 fps or less (see --skip). Frames
+        are kept in memory, reduced to a palette, until the file is written.
+        """
+        try:
+            from PIL import Image
+        except ImportError:
+            raise RuntimeError("GIF export needs Pillow (pip install pillow)")
+        self.image = Image
+        self.path = path
+        self.size = size
+        self.delay = round(1000 / fps)
+        self.frames = []
+
+    def write(self, data):
+        frame = self.image.frombytes("RGB", self.size, data)
+        self.frames.append(frame.convert("P", palette=self.image.ADAPTIVE))
+
+    def close(self):
+        if self.frames:
+            self.frames[0].save(self.path, save_all=True, append_images=self.frames[1:],
+                                duration=self.delay, loop=0)
+        self.frames = []
+
+class FfmpegWriter:
+    def __init__(self, path, size, fps):
+        """Video encoded by an ffmpeg process reading raw RGB frames from a pipe"""
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError(f"exporting {path} needs ffmpeg on the PATH")
+        self.path = path
+        self.process = subprocess.Popen(
+            [ffmpeg, "-loglevel", "error", "-y",
+             "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{size[0]}x{size[1]}", "-r", str(fps), "-i", "-",
+             "-pix_fmt", "yuv420p", path],
+            stdin=subprocess.PIPE)
+
+    def write(self, data):
+        self.process.stdin.write(data)
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to write {self.path}")
+
+def open_writer(path, size, fps):
+    """The frame writer for an output name (see the top of this file)"""
+    extension = os.path.splitext(path.rstrip("/\\"))[1].lower()
+    if not extension:
+        return PngWriter(path, size, fps)
+    if extension == ".gif":
+        return GifWriter(path, size, fps)
+    return FfmpegWriter(path, size, fps)
+
+class MatchExporter:
+    def __init__(self, game, output, skip=0, scale=1.0, queue_size=QUEUE_SIZE):
+        """
+        Draws a Game's frames off-screen and streams them to a writer
+
+        Args:
+            game: Game drawing on an off-screen surface, with the match to
+                export already in the "playing" state
+            output: Output name passed to open_writer
+            skip: Simulation frames skipped between drawn frames; the output
+                runs at FPS / (skip + 1) frames per second
+            scale: Output size relative to the screen; each frame is resized
+                before it is queued
+            queue_size: Frames that may wait for the encoder
+        """
+        self.game = game
+        self.skip = skip
+        self.fps = FPS / (skip + 1)
+
+        # Video encoders need even dimensions
+        width, height = game.screen.get_size()
+        self.size = (max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2))
+        self.scaled = None
+        if self.size != (width, height):
+            self.scaled = pygame.Surface(self.size)
+
+        self.writer = open_writer(output, self.size, self.fps)
+        self.queue = queue.Queue(queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self.encode, daemon=True)
+
+        # Totals for stats()
+        self.frames = 0
+        self.simulated = 0
+        self.render_time = 0.0
+        self.encode_time = 0.0
+        self.wait_time = 0.0
+        self.wall_time = 0.0
+
+    def encode(self):
+        """Worker thread: write queued frames until None arrives"""
+        while True:
+            data = self.queue.get()
+            if data is None:
+                break
+            if self.error is not None:
+                continue  # Keep draining so the game thread never blocks
+            start = time.perf_counter()
+            try:
+                self.writer.write(data)
+            except Exception as error:
+                self.error = error
+            self.encode_time += time.perf_counter() - start
+
+        try:
+            self.writer.close()
+        except Exception as error:
+            if self.error is None:
+                self.error = error
+
+    def capture(self):
+        """Draw the current frame and queue a copy of its pixels"""
+        start = time.perf_counter()
+        self.game.draw()
+        surface = self.game.screen
+        if self.scaled is not None:
+            pygame.transform.smoothscale(surface, self.size, self.scaled)
+            surface = self.scaled
+        data = pygame.image.tobytes(surface, "RGB")
+        self.render_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.queue.put(data)
+        self.wait_time += time.perf_counter() - start
+        self.frames += 1
+        if self.error is not None:
+            raise self.error
+
+    def playing(self):
+        game = self.game
+        if game.game_state != "playing":
+            return False
+        return game.replay is None or not game.replay.finished
+
+    def run(self, max_frames=FPS * 300, hold=HOLD_SECONDS):
+        """
+        Export the match until it ends (or max_frames elapse), then hold the
+        game over screen for hold seconds
+
+        Returns stats()
+        """
+        start = time.perf_counter()
+        self.thread.start()
+        try:
+            while self.playing() and self.simulated < max_frames:
+                if self.simulated % (self.skip + 1) == 0:
+                    self.capture()
+                self.game.update()
+                self.simulated += 1
+
+            # The final state, held on screen
+            for i in range(max(1, round(hold * self.fps))):
+                self.capture()
+        finally:
+            self.queue.put(None)
+            self.thread.join()
+        self.wall_time = time.perf_counter() - start
+        if self.error is not None:
+            raise self.error
+        return self.stats()
+
+    def stats(self):
+        """Frame counts and where the time went, in seconds"""
+        return {
+            "frames": self.frames,
+            "simulated_frames": self.simulated,
+            "size": self.size,
+            "fps": self.fps,
+            "render": self.render_time,
+            "encode": self.encode_time,
+            "queue_wait": self.wait_time,
+            "wall": self.wall_time,
+            "realtime_factor": self.simulated / FPS / self.wall_time if self.wall_time else None
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a match to PNG frames, a GIF or a video without a window")
+    parser.add_argument("output", help="directory for PNG frames, .gif, or a video file such as .mp4")
+    parser.add_argument("--replay", metavar="FILE", help="recorded match to export (default: a CPU vs CPU match)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the CPU vs CPU match and the background")
+    parser.add_argument("--skip", type=int,
+                        help="simulation frames skipped between drawn frames (default 0, or 2 for GIFs)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="render scale of the frames: 0.5 draws them at half size, 2 at double")
+    parser.add_argument("--max-frames", type=int, default=FPS * 300, help="stop after this many simulation frames")
+    parser.add_argument("--hold", type=float, default=HOLD_SECONDS, help="seconds the final frame is held")
+    parser.add_argument("--queue", type=int, default=QUEUE_SIZE, help="frames that may wait for the encoder")
+    args = parser.parse_args(argv)
+
+    skip = args.skip
+    if skip is None:
+        skip = 2 if args.output.lower().endswith(".gif") else 0
+
+    from main import Game
+    # Frames are drawn at the render scale rather than resized afterwards
+    game = Game(surface=pygame.Surface(render_size(args.scale)), seed=args.seed, render_scale=args.scale)
+    if args.replay:
+        game.play_replay(args.replay)
+    else:
+        game.game_mode = "cpu"
+        game.reset_game()
+        game.game_state = "playing"
+
+    try:
+        exporter = MatchExporter(game, args.output, skip, queue_size=args.queue)
+        stats = exporter.run(args.max_frames, args.hold)
+    except RuntimeError as error:
+        print(f"export.py: {error}", file=sys.stderr)
+        return 1
+
+    print(f"{stats['frames']} frames ({stats['size'][0]}x{stats['size'][1]} at {stats['fps']:g} fps) "
+          f"from {stats['simulated_frames']} simulated in {stats['wall']:.2f} s, "
+          f"{stats['realtime_factor']:.1f}x real time")
+    print(f"render {stats['render']:.2f} s, encode {stats['encode']:.2f} s, "
+          f"waiting on the encoder {stats['queue_wait']:.2f} s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
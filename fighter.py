@@ -3,13 +3,43 @@
 import pygame
 import random
 import math
+import struct
 from constants import *
-from effects import ParticleEffect
+from moves import MOVE_NAMES, move_table
+
+# Values of the string-valued state fields, stored as indexes in snapshots
+ACTIONS = MOVE_NAMES
+DIRECTIONS = ("left", "right")
+CPU_ACTIONS = (None, "move", "punch", "kick", "block")
+
+# Moves from first to last choice when several are held in the same frame;
+# only one starts
+MOVE_PRIORITY = ("special", "block", "kick", "punch")
+
+ACTION_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+CPU_ACTION_INDEX = {action: i for i, action in enumerate(CPU_ACTIONS)}
 
 class Fighter:
-    def __init__(self, x, y, width, height, color, controls, is_player=True):
+    __slots__ = (
+        "x", "y", "prev_x", "width", "height", "color", "is_player", "speed", "direction",
+        "action", "action_time", "action_duration", "health", "energy", "blocking",
+        "special_ready", "special_meter", "special_threshold", "special_active",
+        "combo_counter", "combo_timer", "combo_timeout", "controls", "hit_box", "attack_box",
+        "rng", "cpu_decision_timer", "cpu_action_duration", "cpu_current_action", "moves",
+        "attack_hit", "effects"
+    )
+    
+    # Snapshot layout: x, y, prev_x, health, energy, special_meter, action_time,
+    # action_duration, combo_counter, combo_timer, cpu_decision_timer,
+    # cpu_action_duration, action, direction, cpu_current_action, is_player,
+    # blocking, special_ready, special_active, attack_hit
+    STATE = struct.Struct("<6d6i3B5?")
+    
+    def __init__(self, x, y, width, height, color, controls, is_player=True, rng=None):
         self.x = x
         self.y = y
+        self.prev_x = x  # Position at the start of the last update, for interpolation
         self.width = width
         self.height = height
         self.color = color
@@ -23,6 +53,10 @@ class Fighter:
         self.action = "idle"
         self.action_time = 0
         self.action_duration = 20  # frames
+        self.attack_hit = False  # The current attack has landed
+        
+        # Compiled move table for this fighter's size
+        self.moves = move_table(width, height)
         
         # Combat stats
         self.health = 100
@@ -49,12 +83,91 @@ class Fighter:
         # Attack hitbox (for detecting hits)
         self.attack_box = pygame.Rect(0, 0, 0, 0)
         
-        # CPU behavior
+        # CPU behavior (rng is a MatchRandom/random.Random, or the random module itself)
+        self.rng = rng if rng is not None else random
+        self.cpu_decision_timer = 0
+        self.cpu_action_duration = 0
+        self.cpu_current_action = None
+        
+        # Optional effects.EffectPool that hit effects are spawned into
+        self.effects = None
+    
+    def reset(self, x):
+        """Return to a fresh match state standing at x"""
+        self.x = x
+        self.prev_x = x
+        self.direction = "right" if x < SCREEN_WIDTH // 2 else "left"
+        
+        self.action = "idle"
+        self.action_time = 0
+        self.attack_hit = False
+        
+        self.health = 100
+        self.energy = 100
+        self.blocking = False
+        
+        self.special_ready = False
+        self.special_meter = 0
+        self.special_active = False
+        
+        self.combo_counter = 0
+        self.combo_timer = 0
+        
+        self.hit_box.x = self.x - self.width // 2
+        self.attack_box.width = 0
+        self.attack_box.height = 0
+        
         self.cpu_decision_timer = 0
         self.cpu_action_duration = 0
         self.cpu_current_action = None
     
-    def update(self, opponent):
+    def snapshot(self):
+        """Return the fighter's mutable state as a small immutable bytes blob"""
+        return self.STATE.pack(
+            self.x, self.y, self.prev_x, self.health, self.energy, self.special_meter,
+            self.action_time, self.action_duration, self.combo_counter, self.combo_timer,
+            self.cpu_decision_timer, self.cpu_action_duration,
+            ACTION_INDEX[self.action], DIRECTION_INDEX[self.direction],
+            CPU_ACTION_INDEX[self.cpu_current_action],
+            self.is_player, self.blocking, self.special_ready, self.special_active, self.attack_hit
+        )
+    
+    def restore(self, blob):
+        """Load state produced by snapshot() in place"""
+        (self.x, self.y, self.prev_x, self.health, self.energy, self.special_meter,
+         self.action_time, self.action_duration, self.combo_counter, self.combo_timer,
+         self.cpu_decision_timer, self.cpu_action_duration,
+         action, direction, cpu_action,
+         self.is_player, self.blocking, self.special_ready, self.special_active,
+         self.attack_hit) = self.STATE.unpack(blob)
+        self.action = ACTIONS[action]
+        self.direction = DIRECTIONS[direction]
+        self.cpu_current_action = CPU_ACTIONS[cpu_action]
+        
+        # Both boxes follow from the state above; the hit box is placed at
+        # the start of update(), before that frame's movement
+        self.hit_box.x = self.prev_x - self.width // 2
+        self.hit_box.y = self.y - self.height // 2
+        self.update_attack_box()
+    
+    def update(self, opponent, actions=None):
+        """
+        Advance the fighter by one frame
+        
+        Args:
+            opponent: The other Fighter
+            actions: Collection of control names ("left", "punch", ...) held this
+                frame. When None a player fighter reads the keyboard instead.
+        """
+        self.advance(opponent, actions)
+        
+        # Check for hits on opponent
+        self.check_hit(opponent)
+    
+    def advance(self, opponent, actions=None):
+        """Everything update() does except landing hits, which the caller resolves"""
+        self.prev_x = self.x
+        
         # Update hit box position
         self.hit_box.x = self.x - self.width // 2
         self.hit_box.y = self.y - self.height // 2
@@ -87,118 +200,111 @@ class Fighter:
         
         # Player controlled
         if self.is_player:
-            self.handle_player_input()
+            self.handle_player_input(actions)
         else:
             self.handle_cpu_ai(opponent)
         
         # Update attack hitbox based on action
         self.update_attack_box()
-        
-        # Check for hits on opponent
-        self.check_hit(opponent)
+    
+    def start_action(self, action):
+        """Begin a move from the move table, paying its energy cost"""
+        self.action = action
+        self.action_time = 0
+        self.action_duration = self.moves.duration[ACTION_INDEX[action]]
+        self.attack_hit = False
+        self.energy -= ENERGY_COST[action]
     
     def update_attack_box(self):
-        # Reset attack box
-        self.attack_box.width = 0
-        self.attack_box.height = 0
-        
-        # Only create attack box during attack animations
-        if self.action == "punch":
-            if self.direction == "right":
-                self.attack_box.x = self.x + self.width // 2
-                self.attack_box.y = self.y - self.height // 3
-                self.attack_box.width = self.width // 2
-                self.attack_box.height = self.height // 3
-            else:
-                self.attack_box.x = self.x - self.width
-                self.attack_box.y = self.y - self.height // 3
-                self.attack_box.width = self.width // 2
-                self.attack_box.height = self.height // 3
-                
-        elif self.action == "kick":
-            if self.direction == "right":
-                self.attack_box.x = self.x + self.width // 2
-                self.attack_box.y = self.y
-                self.attack_box.width = self.width
-                self.attack_box.height = self.height // 4
-            else:
-                self.attack_box.x = self.x - self.width
-                self.attack_box.y = self.y
-                self.attack_box.width = self.width
-                self.attack_box.height = self.height // 4
-                
-        elif self.action == "special":
-            # Special move has a larger attack area
-            if self.direction == "right":
-                self.attack_box.x = self.x + self.width // 3
-                self.attack_box.y = self.y - self.height // 2
-                self.attack_box.width = self.width
-                self.attack_box.height = self.height
-            else:
-                self.attack_box.x = self.x - self.width
-                self.attack_box.y = self.y - self.height // 2
-                self.attack_box.width = self.width
-                self.attack_box.height = self.height
+        # Look up this frame's box for the move and direction; empty when none
+        box = self.moves.boxes[(ACTION_INDEX[self.action] * self.moves.stride + self.action_time) * 2 +
+                               DIRECTION_INDEX[self.direction]]
+        if box is None:
+            self.attack_box.width = 0
+            self.attack_box.height = 0
+        else:
+            dx, dy, width, height = box
+            self.attack_box.update(self.x + dx, self.y + dy, width, height)
+    
+    @property
+    def striking(self):
+        """True on the active frames of an attack until it has landed once"""
+        return self.attack_box.width > 0 and not self.attack_hit
     
     def check_hit(self, opponent):
-        # Check if we're in the middle of an attack and it has reached the right frame
-        if (self.action in ["punch", "kick", "special"] and 
-            self.action_time == self.action_duration // 2):
+        # Check if we're on an active frame of an attack that has not landed yet,
+        # and the attack box intersects with the opponent's hit box
+        if self.striking and self.attack_box.colliderect(opponent.hit_box):
+            self.apply_hit(opponent)
+            return True
+        return False
+    
+    def apply_hit(self, opponent):
+        """Land this frame's attack on opponent, spawning its effects into self.effects"""
+        self.attack_hit = True
+        
+        # Calculate damage based on attack type and combo
+        damage = DAMAGE[self.action]
+        
+        # Apply combo bonus
+        if self.combo_counter > 1:
+            damage += damage * COMBO_BONUS * (self.combo_counter - 1)
+        
+        # Check if opponent is blocking
+        if opponent.blocking:
+            # Reduce damage if blocking
+            damage *= BLOCK_DAMAGE_REDUCTION
+            opponent.special_meter += damage  # Blocking builds special meter
             
-            # Check if the attack box intersects with the opponent's hit box
-            if self.attack_box.colliderect(opponent.hit_box):
-                
-                # Calculate damage based on attack type and combo
-                damage = DAMAGE[self.action]
-                
-                # Apply combo bonus
-                if self.combo_counter > 1:
-                    damage += damage * COMBO_BONUS * (self.combo_counter - 1)
+            # Particle effect for blocked attack
+            if self.effects is not None:
+                self.effects.spawn(
+                    opponent.x + (20 if opponent.direction == "right" else -20),
+                    opponent.y - 30,
+                    BLUE,
+                    5, 10, 0.2, 0.1
+                )
+            
+        else:
+            # Apply damage
+            opponent.health -= damage
+            
+            # Add to special meter
+            self.special_meter += damage * 2
+            
+            # Particle effect for successful hit
+            if self.effects is None:
+                return
+            particle_color = YELLOW if self.action == "punch" else ORANGE
+            if self.action == "special":
+                particle_color = RED
                 
-                # Check if opponent is blocking
-                if opponent.blocking:
-                    # Reduce damage if blocking
-                    damage *= BLOCK_DAMAGE_REDUCTION
-                    opponent.special_meter += damage  # Blocking builds special meter
-                    
-                    # Create particle effect for blocked attack
-                    return [ParticleEffect(
-                        opponent.x + (20 if opponent.direction == "right" else -20),
-                        opponent.y - 30,
-                        BLUE, 
-                        5, 10, 0.2, 0.1
-                    )]
-                    
-                else:
-                    # Apply damage
-                    opponent.health -= damage
-                    
-                    # Add to special meter
-                    self.special_meter += damage * 2
-                    
-                    # Create particle effect for successful hit
-                    particle_color = YELLOW if self.action == "punch" else ORANGE
-                    if self.action == "special":
-                        particle_color = RED
-                        
-                    hit_x = opponent.x + (10 if self.direction == "right" else -10)
-                    
-                    return [ParticleEffect(
-                        hit_x,
-                        opponent.y - self.height // 3,
-                        particle_color,
-                        10, 15, 0.5, 0.2
-                    )]
+            hit_x = opponent.x + (10 if self.direction == "right" else -10)
+            hit_y = opponent.y - self.height // 3
             
-        return []
+            self.effects.spawn(hit_x, hit_y, particle_color, 10, 15, 0.5, 0.2)
+            if self.action == "special":
+                self.effects.explode(hit_x, hit_y)
+    
+    def can_start(self, move):
+        """Whether a player move could start this frame, going by energy and the special meter"""
+        if self.energy < ENERGY_COST[move]:
+            return False
+        return move != "special" or self.special_ready
     
-    def handle_player_input(self):
+    def read_keyboard(self):
+        """Return the set of control names whose keys are currently held"""
         keys = pygame.key.get_pressed()
+        return {name for name, key in self.controls.items() if keys[key]}
+    
+    def handle_player_input(self, actions=None):
+        if actions is None:
+            actions = self.read_keyboard()
         
         # Movement only if not in middle of action
         if self.action == "idle":
             # Move left
-            if keys[self.controls["left"]]:
+            if "left" in actions:
                 self.x -= self.speed
                 self.direction = "left"
                 
@@ -207,7 +313,7 @@ class Fighter:
                     self.x = self.width // 2
             
             # Move right
-            if keys[self.controls["right"]]:
+            if "right" in actions:
                 self.x += self.speed
                 self.direction = "right"
                 
@@ -215,38 +321,29 @@ class Fighter:
                 if self.x > SCREEN_WIDTH - self.width // 2:
                     self.x = SCREEN_WIDTH - self.width // 2
             
-            # Punch
-            if keys[self.controls["punch"]] and self.energy >= ENERGY_COST["punch"]:
-                self.action = "punch"
-                self.action_time = 0
-                self.energy -= ENERGY_COST["punch"]
-                
-                # Update combo
-                self.combo_counter += 1
-                self.combo_timer = 0
+            # Start at most one move, the first in MOVE_PRIORITY that is held and affordable
+            for move in MOVE_PRIORITY:
+                if move in actions and self.can_start(move):
+                    break
+            else:
+                move = None
             
-            # Kick
-            if keys[self.controls["kick"]] and self.energy >= ENERGY_COST["kick"]:
-                self.action = "kick"
-                self.action_time = 0
-                self.energy -= ENERGY_COST["kick"]
+            # Punch or kick
+            if move == "punch" or move == "kick":
+                self.start_action(move)
                 
                 # Update combo
                 self.combo_counter += 1
                 self.combo_timer = 0
             
             # Block
-            if keys[self.controls["block"]] and self.energy >= ENERGY_COST["block"]:
-                self.action = "block"
-                self.action_time = 0
-                self.energy -= ENERGY_COST["block"]
+            elif move == "block":
+                self.start_action("block")
                 self.blocking = True
             
             # Special
-            if keys[self.controls["special"]] and self.special_ready and self.energy >= ENERGY_COST["special"]:
-                self.action = "special"
-                self.action_time = 0
-                self.energy -= ENERGY_COST["special"]
+            elif move == "special":
+                self.start_action("special")
                 self.special_meter = 0
                 self.special_ready = False
                 self.special_active = True
@@ -264,7 +361,7 @@ class Fighter:
             if self.cpu_decision_timer >= self.cpu_action_duration:
                 # Make a new decision
                 self.cpu_decision_timer = 0
-                self.cpu_action_duration = random.randint(30, 90)  # Frames until next decision
+                self.cpu_action_duration = self.rng.randint(30, 90)  # Frames until next decision
                 
                 # Distance to opponent
                 distance = abs(self.x - opponent.x)
@@ -277,32 +374,28 @@ class Fighter:
                     # In attack range
                     if opponent.action == "punch" or opponent.action == "kick" or opponent.action == "special":
                         # Opponent is attacking, try to block
-                        if random.random() < 0.7 and self.energy >= ENERGY_COST["block"]:
-                            self.action = "block"
-                            self.action_time = 0
+                        if self.rng.random() < 0.7 and self.energy >= ENERGY_COST["block"]:
+                            self.start_action("block")
                             self.blocking = True
-                            self.energy -= ENERGY_COST["block"]
                         else:
                             # Failed to block, try to attack back or move away
-                            choice = random.choice(["punch", "kick", "move"])
+                            choice = self.rng.choice(["punch", "kick", "move"])
                             self.cpu_current_action = choice
                     else:
                         # Opponent not attacking, choose an action
-                        if self.special_ready and self.energy >= ENERGY_COST["special"] and random.random() < 0.3:
+                        if self.special_ready and self.energy >= ENERGY_COST["special"] and self.rng.random() < 0.3:
                             # Use special attack
-                            self.action = "special"
-                            self.action_time = 0
-                            self.energy -= ENERGY_COST["special"]
+                            self.start_action("special")
                             self.special_meter = 0
                             self.special_ready = False
                             self.special_active = True
                         else:
                             # Regular attack
-                            choice = random.choice(["punch", "kick", "block", "move"])
+                            choice = self.rng.choice(["punch", "kick", "block", "move"])
                             self.cpu_current_action = choice
                 else:
                     # Medium distance, choose between moving and attacking
-                    choice = random.choice(["punch", "kick", "move", "move"])
+                    choice = self.rng.choice(["punch", "kick", "move", "move"])
                     self.cpu_current_action = choice
             
             # Execute current action
@@ -322,17 +415,13 @@ class Fighter:
                     self.x = SCREEN_WIDTH - self.width // 2
                     
             elif self.cpu_current_action == "punch" and self.energy >= ENERGY_COST["punch"]:
-                self.action = "punch"
-                self.action_time = 0
-                self.energy -= ENERGY_COST["punch"]
+                self.start_action("punch")
                 self.combo_counter += 1
                 self.combo_timer = 0
                 self.cpu_current_action = None
                 
             elif self.cpu_current_action == "kick" and self.energy >= ENERGY_COST["kick"]:
-                self.action = "kick"
-                self.action_time = 0
-                self.energy -= ENERGY_COST["kick"]
+                self.start_action("kick")
                 self.combo_counter += 1
                 self.combo_timer = 0
                 self.cpu_current_action = None
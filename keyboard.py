@@ -0,0 +1,188 @@
+# keyboard.py - Event-driven keyboard input with loadable bindings
+#
+# KEYDOWN and KEYUP events are fed into an InputBuffer as they arrive, so a tap
+# that starts and ends between two simulation steps still reaches the next
+# step. Each step takes a player's held controls plus any pressed since the
+# last step, with at most one move kept (see resolve_moves), and leaves the
+# step's press and release edges in step_pressed and step_released.
+#
+# Bindings are a JSON file of pygame key names, any of which may be left out
+# to keep the default:
+#   {"player1": {"punch": "j", "kick": "k"}, "player2": {"block": "right shift"}}
+#
+# Latency is measured from when an event is taken off the queue to the end of
+# the step that starts its move, and printed by main.py on exit.
+
+import json
+import time
+from collections import deque
+
+import pygame
+
+from constants import *
+from replay import CONTROL_ACTIONS
+from simulation import PLAYER1_CONTROLS, PLAYER2_CONTROLS
+from fighter import MOVE_PRIORITY
+
+DEFAULT_BINDINGS = (PLAYER1_CONTROLS, PLAYER2_CONTROLS)
+PLAYER_NAMES = ("player1", "player2")
+
+def load_bindings(path):
+    """
+    Read a bindings file into a pair of {control: key code} dicts
+
+    Raises:
+        ValueError: On an unknown player, control or key name
+    """
+    with open(path) as f:
+        data = json.load(f)
+
+    bindings = [dict(controls) for controls in DEFAULT_BINDINGS]
+    for name, controls in data.items():
+        if name not in PLAYER_NAMES:
+            raise ValueError(f"unknown player {name!r} in {path} (expected one of {PLAYER_NAMES})")
+        for control, key_name in controls.items():
+            if control not in CONTROL_ACTIONS:
+                raise ValueError(f"unknown control {control!r} for {name} in {path}")
+            bindings[PLAYER_NAMES.index(name)][control] = pygame.key.key_code(key_name)
+    return tuple(bindings)
+
+def save_bindings(path, bindings=DEFAULT_BINDINGS):
+    """Write a pair of {control: key code} dicts as a bindings file"""
+    data = {name: {control: pygame.key.name(key) for control, key in controls.items()}
+            for name, controls in zip(PLAYER_NAMES, bindings)}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+def resolve_moves(actions, fighter):
+    """
+    Keep movement and the first move in fighter.MOVE_PRIORITY the fighter can start
+
+    Fighter.handle_player_input starts only that move anyway; resolving it
+    here as well keeps recorded and sent inputs to what was played.
+    """
+    moves = [move for move in MOVE_PRIORITY if move in actions]
+    if len(moves) < 2:
+        return actions
+    kept = set(action for action in actions if action not in MOVE_PRIORITY)
+    for move in moves:
+        if fighter.can_start(move):
+            kept.add(move)
+            break
+    return kept
+
+class InputLatency:
+    def __init__(self, history=1000):
+        """
+        Time from a move's key press to the end of the step that starts it
+
+        Args:
+            history: Most recent presses kept for percentiles
+        """
+        self.samples = deque(maxlen=history)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def report(self):
+        """One line with the mean, p50, p95 and max in milliseconds"""
+        if not self.count:
+            return "input latency: no moves pressed"
+        ordered = sorted(self.samples)
+        p50 = ordered[len(ordered) // 2]
+        p95 = ordered[min(len(ordered) - 1, len(ordered) * 95 // 100)]
+        return (f"input latency: {self.total / self.count * 1000:.2f} ms mean, {p50 * 1000:.2f} ms p50, "
+                f"{p95 * 1000:.2f} ms p95, {self.max * 1000:.2f} ms max over {self.count} moves")
+
+class InputBuffer:
+    def __init__(self, bindings=DEFAULT_BINDINGS):
+        """
+        Keyboard state of both players built from key events
+
+        Args:
+            bindings: Pair of {control: key code} dicts, one per player
+        """
+        self.bindings = bindings
+        self.keys = {}
+        for player, controls in enumerate(bindings):
+            for control, key in controls.items():
+                self.keys.setdefault(key, []).append((player, control))
+
+        # Per player: controls held now, and pressed or released since the
+        # player's last step (a key let go before then still counts once)
+        self.held = (set(), set())
+        self.pressed = (set(), set())
+        self.released = (set(), set())
+
+        # Per player: the edges of the player's latest step
+        self.step_pressed = [frozenset(), frozenset()]
+        self.step_released = [frozenset(), frozenset()]
+
+        # Per player: {move: time its key went down} for moves pressed since
+        # the last step, and the ones handed to the step in progress
+        self.press_times = ({}, {})
+        self.taken = ({}, {})
+        self.latency = InputLatency()
+
+    def handle_event(self, event):
+        """Note a KEYDOWN or KEYUP; returns whether the key was bound"""
+        bound = self.keys.get(event.key)
+        if not bound:
+            return False
+
+        now = time.perf_counter()
+        for player, control in bound:
+            if event.type == pygame.KEYDOWN:
+                self.held[player].add(control)
+                self.pressed[player].add(control)
+                if control in MOVE_PRIORITY:
+                    self.press_times[player].setdefault(control, now)
+            else:
+                self.held[player].discard(control)
+                self.released[player].add(control)
+        return True
+
+    def take(self, player, fighter=None):
+        """
+        Controls for a player's next step: those held and any pressed since
+        the last one, moves resolved for the fighter when it is given
+
+        The step's edges are left in step_pressed[player] and
+        step_released[player].
+        """
+        actions = self.held[player] | self.pressed[player]
+        self.step_pressed[player] = frozenset(self.pressed[player])
+        self.step_released[player] = frozenset(self.released[player])
+        self.pressed[player].clear()
+        self.released[player].clear()
+        self.taken[player].update(self.press_times[player])
+        self.press_times[player].clear()
+        if fighter is not None:
+            actions = resolve_moves(actions, fighter)
+        return actions
+
+    def after_step(self, fighters):
+        """Record the latency of moves started by the step that just ran"""
+        now = time.perf_counter()
+        for player, fighter in enumerate(fighters):
+            taken = self.taken[player]
+            if not taken:
+                continue
+            # A move that starts this step is at its first frame once the step ends
+            if fighter.action in taken and fighter.action_time == 0:
+                self.latency.add(now - taken[fighter.action])
+            taken.clear()
+
+    def clear(self):
+        """Forget every key, e.g. when the window loses focus and misses KEYUPs"""
+        for sets in (self.held, self.pressed, self.released, self.press_times, self.taken):
+            for player_set in sets:
+                player_set.clear()
+        self.step_pressed = [frozenset(), frozenset()]
+        self.step_released = [frozenset(), frozenset()]
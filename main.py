@@ -1,89 +1,177 @@
 # main.py - Main game file
 
 import pygame
+import os
 import sys
+import time
+import argparse
+import struct
 import random
 import math
+import functools
 from pygame.locals import *
 
 # Import game modules
 from constants import *
-from stickman import draw_stickman
-from fighter import Fighter
-from effects import ParticleEffect
-from ui import draw_ui, draw_menu, draw_game_over, draw_mode_select
+from animation import draw_animated
+from effects import PARTICLE_POLICIES
+from simulation import Simulation
+from controllers import KeyboardController, SearchController, DIFFICULTIES
+from keyboard import InputBuffer, load_bindings, DEFAULT_BINDINGS
+from ai_worker import AIWorker
+from replay import ReplayRecorder, ReplayPlayer
+from netplay import RollbackSession, UdpTransport, LossyTransport
+from spectate import SpectatorServer
+from renderer import create_background_layer, render_size, scale_rect, DirtyRects, FrameTimer, Presenter
+from profiler import FrameProfiler, GRAPH_FRAMES
+from ui import draw_ui, draw_menu, draw_game_over, draw_mode_select, render_text, draw_dim_overlay
 
-# Initialize pygame
-pygame.init()
+# Snapshot layout of one cloud: x, y, width, height, speed
+CLOUD_STATE = struct.Struct("<d3id")
 
-# Set up the display
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Stick Fighter")
-clock = pygame.time.Clock()
+# Sounds are loaded by init_display once a window exists
+hit_sound = None
+block_sound = None
+special_sound = None
 
-# Initialize sounds
-pygame.mixer.init()
-try:
-    hit_sound = pygame.mixer.Sound("hit.wav")
-    block_sound = pygame.mixer.Sound("block.wav")
-    special_sound = pygame.mixer.Sound("special.wav")
-except:
-    # Create placeholder sounds if files not found
-    hit_sound = None
-    block_sound = None
-    special_sound = None
+def init_display(vsync=False, size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+    """Initialize pygame, open the game window and load sounds"""
+    global hit_sound, block_sound, special_sound
+    
+    pygame.init()
+    
+    # Set up the display
+    screen = pygame.display.set_mode(size, vsync=int(vsync))
+    pygame.display.set_caption("Stick Fighter")
+    
+    # Initialize sounds
+    pygame.mixer.init()
+    try:
+        hit_sound = pygame.mixer.Sound("hit.wav")
+        block_sound = pygame.mixer.Sound("block.wav")
+        special_sound = pygame.mixer.Sound("special.wav")
+    except:
+        # Create placeholder sounds if files not found
+        hit_sound = None
+        block_sound = None
+        special_sound = None
+    
+    return screen
 
 class Game:
-    def __init__(self):
+    def __init__(self, surface=None, seed=None, record_dir=None, ai=None, ai_worker="process",
+                 max_particles=MAX_PARTICLES, particle_policy=PARTICLE_POLICY, render_scale=1.0,
+                 window_size=None, bindings=None):
+        """
+        Args:
+            surface: Surface to draw on. When None a window is opened.
+            seed: Seed for the background and the first match (random when None)
+            record_dir: Directory to save a replay of every match to
+            ai: Difficulty of the search AI that plays player 2 in solo mode
+                (see controllers.DIFFICULTIES); None uses the built-in CPU
+            ai_worker: Where the search AI runs: "process", "thread" or None
+                for inline on the game loop (see ai_worker.AIWorker)
+            max_particles: Cap on live hit effect particles
+            particle_policy: What effects do at the cap (see effects.EffectPool)
+            render_scale: Frames are drawn at this multiple of the logical
+                SCREEN_WIDTH x SCREEN_HEIGHT resolution and scaled to the
+                window (see renderer.Presenter)
+            window_size: Size of the window to open (the logical size when None)
+            bindings: Key bindings file to load (see keyboard.py); None
+                keeps the default keys
+        """
+        if surface is None:
+            surface = init_display(size=window_size or (SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            pygame.font.init()
+        
+        # Everything is drawn on self.screen at the render scale; when that is
+        # not the window's size it is an internal surface scaled on present
+        self.render_scale = render_scale
+        self.window = surface
+        self.screen = surface
+        if surface.get_size() != render_size(render_scale):
+            self.screen = pygame.Surface(render_size(render_scale))
+            if pygame.display.get_surface() is not None:
+                self.screen = self.screen.convert()
+        self.presenter = Presenter(self.window, self.screen)
+        self.clock = pygame.time.Clock()
+        
         self.running = True
         self.game_over = False
         self.winner = None
         self.game_state = "menu"  # "menu", "playing", "paused", "game_over", "mode_select"
         self.game_mode = "solo"  # "solo" or "versus"
         
-        # Particle effects
-        self.particles = []
-        
-        # Define player controls
-        player1_controls = {
-            "left": K_a,
-            "right": K_d,
-            "punch": K_r,
-            "kick": K_t,
-            "block": K_y,
-            "special": K_f
-        }
-        
-        player2_controls = {
-            "left": K_LEFT,
-            "right": K_RIGHT,
-            "punch": K_COMMA,
-            "kick": K_PERIOD,
-            "block": K_m,
-            "special": K_SLASH
-        }
-        
-        # Create the fighters with correct control mode based on game mode
-        self.player1 = Fighter(200, SCREEN_HEIGHT - 100, 60, 120, BLUE, player1_controls, True)
-        self.player2 = Fighter(600, SCREEN_HEIGHT - 100, 60, 120, RED, player2_controls, self.game_mode == "versus")
+        # Random numbers for everything outside a match; each match gets its own seed
+        self.rng = random.Random(seed)
+        
+        # Match simulation driven by the keyboard, or by the search AI for
+        # player 2 in solo mode. Key events fill self.input, which both
+        # keyboard controllers take their player's controls from.
+        self.input = InputBuffer(load_bindings(bindings) if bindings else DEFAULT_BINDINGS)
+        self.keyboard = (KeyboardController(self.input), KeyboardController(self.input))
+        self.ai = None
+        if ai is not None and ai_worker is None:
+            self.ai = SearchController(ai)
+        elif ai is not None:
+            self.ai = AIWorker(functools.partial(SearchController, ai), process=ai_worker == "process")
+        self.sim = Simulation(self.game_mode, self.keyboard, self.rng.getrandbits(32))
+        self.max_particles = max_particles
+        self.particle_policy = particle_policy
+        self.configure_effects()
+        
+        # Replays
+        self.record_dir = record_dir
+        self.recorder = None
+        self.replay = None
+        
+        # Online versus session (see start_netplay)
+        self.netplay = None
+        
+        # Spectator broadcast (see start_broadcast)
+        self.spectators = None
         
         # Background elements
         self.create_background()
+        self.background = create_background_layer(render_scale)
+        
+        # Dirty rectangle rendering (F2 toggles full-screen flips for comparison)
+        self.use_dirty_rects = True
+        self.dirty_rects = DirtyRects()
+        self.last_drawn_state = None
+        self.frame_timer = FrameTimer()
+        
+        # Per-section frame timings (F3 toggles them and their graph)
+        self.profiler = FrameProfiler()
+        self.sim.profiler = self.profiler
         
         # Font for text
-        self.font = pygame.font.Font(None, 36)
-        self.big_font = pygame.font.Font(None, 72)
+        self.font = pygame.font.Font(None, round(36 * render_scale))
+        self.big_font = pygame.font.Font(None, round(72 * render_scale))
+    
+    @property
+    def player1(self):
+        return self.sim.player1
+    
+    @property
+    def player2(self):
+        return self.sim.player2
+    
+    @property
+    def particles(self):
+        return self.sim.particles
     
     def create_background(self):
         # Create background elements (clouds, mountains, etc.)
         self.clouds = []
         for i in range(5):
             cloud = {
-                "x": random.randint(0, SCREEN_WIDTH),
-                "y": random.randint(50, 150),
-                "width": random.randint(60, 120),
-                "height": random.randint(30, 50),
-                "speed": random.uniform(0.2, 0.5)
+                "x": self.rng.randint(0, SCREEN_WIDTH),
+                "y": self.rng.randint(50, 150),
+                "width": self.rng.randint(60, 120),
+                "height": self.rng.randint(30, 50),
+                "speed": self.rng.uniform(0.2, 0.5)
             }
             self.clouds.append(cloud)
     
@@ -92,7 +180,25 @@ class Game:
             if event.type == pygame.QUIT:
                 self.running = False
             
+            elif event.type == pygame.WINDOWFOCUSLOST:
+                # Keys let go while another window has focus never send KEYUP
+                self.input.clear()
+            
+            elif event.type == pygame.KEYUP:
+                self.input.handle_event(event)
+            
             elif event.type == pygame.KEYDOWN:
+                self.input.handle_event(event)
+                
+                if event.key == pygame.K_F2:
+                    # Switch between dirty rectangle updates and full flips
+                    self.use_dirty_rects = not self.use_dirty_rects
+                
+                if event.key == pygame.K_F3:
+                    # Show or hide the frame profiler
+                    self.profiler.toggle()
+                    self.last_drawn_state = None
+                
                 if event.key == pygame.K_ESCAPE:
                     if self.game_state == "playing":
                         self.game_state = "paused"
@@ -121,6 +227,15 @@ class Game:
                     elif event.key == pygame.K_ESCAPE:
                         self.game_state = "menu"
                 
+                # Seek through a replay
+                elif self.game_state == "playing" and self.replay is not None:
+                    if event.key == pygame.K_LEFT:
+                        self.replay.seek(self.replay.frame - FPS * 5)
+                        self.broadcast_match()
+                    elif event.key == pygame.K_RIGHT:
+                        self.replay.seek(self.replay.frame + FPS * 5)
+                        self.broadcast_match()
+                
                 # Handle game over actions
                 elif self.game_state == "game_over":
                     if event.key == pygame.K_RETURN:
@@ -138,12 +253,22 @@ class Game:
                         self.game_state = "menu"
     
     def update(self):
+        if self.netplay is not None and self.game_state == "game_over":
+            # The peer may still be waiting on our last inputs
+            self.netplay.linger()
         if self.game_state != "playing":
             return
             
-        # Update players
-        self.player1.update(self.player2)
-        self.player2.update(self.player1)
+        # Update players and particles
+        if self.replay is not None:
+            self.replay.step()
+        elif self.netplay is not None:
+            local = self.player1 if self.netplay.local_player == 0 else self.player2
+            self.netplay.advance(self.input.take(self.netplay.local_player, local))
+            self.input.after_step((self.player1, self.player2))
+        else:
+            self.sim.step()
+            self.input.after_step((self.player1, self.player2))
         
         # Update cloud positions
         for cloud in self.clouds:
@@ -151,134 +276,340 @@ class Game:
             if cloud["x"] > SCREEN_WIDTH + 100:
                 cloud["x"] = -cloud["width"]
         
-        # Update particles
-        for particle in self.particles[:]:
-            particle.update()
-            if not particle.active:
-                self.particles.remove(particle)
-        
-        # Check for game over condition
-        if self.player1.health <= 0 or self.player2.health <= 0:
+        # Check for game over condition. Online, a KO may rest on predicted
+        # remote inputs: advance() keeps exchanging inputs and rolls back any
+        # misprediction until the ending frame is confirmed.
+        if self.sim.over and (self.netplay is None or self.netplay.settled()):
             self.game_over = True
             self.game_state = "game_over"
-            if self.player1.health <= 0:
-                self.winner = "Player 2"
-            else:
-                self.winner = "Player 1"
+            self.winner = self.sim.winner
+            self.stop_recording()
     
-    def draw(self):
-        # Draw the background
-        screen.fill(SKY_BLUE)
+    def draw(self, alpha=1.0):
+        """
+        Draw the current frame
+        
+        Args:
+            alpha: Fraction of a simulation step elapsed since the last update;
+                moving objects are drawn between their last two positions
+        """
+        self.frame_timer.begin()
         
-        # Draw mountains (static)
-        for i in range(3):
-            x1 = i * 300 - 100
-            x2 = x1 + 150
-            x3 = x1 + 300
-            pygame.draw.polygon(screen, (100, 100, 100), [(x1, SCREEN_HEIGHT), (x2, 300), (x3, SCREEN_HEIGHT)])
+        # Only a frame that follows another gameplay frame can be patched up
+        # in place; anything else repaints the whole screen
+        dirty = (self.use_dirty_rects and self.game_state == "playing"
+                 and self.last_drawn_state == "playing")
+        self.last_drawn_state = self.game_state
+        mark = self.dirty_rects.mark
+        scale = self.render_scale
+        center = self.screen.get_width() // 2
+        
+        # Draw the background (sky, mountains and ground are cached)
+        if dirty:
+            self.dirty_rects.restore(self.screen, self.background)
+        else:
+            self.screen.blit(self.background, (0, 0))
         
         # Draw clouds
+        lag = 1.0 - alpha if self.game_state == "playing" else 0.0
         for cloud in self.clouds:
-            pygame.draw.ellipse(screen, WHITE, (cloud["x"], cloud["y"], cloud["width"], cloud["height"]))
-        
-        # Draw ground
-        pygame.draw.rect(screen, (139, 69, 19), (0, SCREEN_HEIGHT - 50, SCREEN_WIDTH, 50))
-        pygame.draw.line(screen, (100, 50, 0), (0, SCREEN_HEIGHT - 50), (SCREEN_WIDTH, SCREEN_HEIGHT - 50), 3)
+            cloud_x = cloud["x"] - cloud["speed"] * lag
+            mark(pygame.draw.ellipse(self.screen, WHITE, scale_rect((cloud_x, cloud["y"], cloud["width"], cloud["height"]), scale)))
         
         # Draw game elements based on game state
         if self.game_state == "menu":
-            draw_menu(screen, self.big_font, self.font)
+            draw_menu(self.screen, self.big_font, self.font, scale)
         
         elif self.game_state == "mode_select":
-            draw_mode_select(screen, self.big_font, self.font)
+            draw_mode_select(self.screen, self.big_font, self.font, scale, self.input.bindings)
         
         elif self.game_state == "playing" or self.game_state == "paused":
             # Display current mode
-            mode_text = self.font.render(f"MODE: {'SOLO' if self.game_mode == 'solo' else 'VERSUS'}", True, WHITE)
-            screen.blit(mode_text, (SCREEN_WIDTH // 2 - mode_text.get_width() // 2, 10))
+            mode_text = render_text(self.font, f"MODE: {'SOLO' if self.game_mode == 'solo' else 'VERSUS'}", WHITE)
+            mark(self.screen.blit(mode_text, (center - mode_text.get_width() // 2, round(10 * scale))))
             
             # Draw fighters
-            draw_stickman(screen, self.player1.x, self.player1.y, self.player1.width, self.player1.height, 
-                       self.player1.color, self.player1.action, self.player1.direction, self.player1.special_active)
+            profiler = self.profiler
+            profiler.start("stickman")
+            mark(draw_animated(self.screen, self.interpolate_x(self.player1, lag), self.player1.y, self.player1.width, self.player1.height, 
+                       self.player1.color, self.player1.action, self.player1.direction, self.player1.action_time,
+                       self.player1.special_active, scale))
             
-            draw_stickman(screen, self.player2.x, self.player2.y, self.player2.width, self.player2.height, 
-                       self.player2.color, self.player2.action, self.player2.direction, self.player2.special_active)
+            mark(draw_animated(self.screen, self.interpolate_x(self.player2, lag), self.player2.y, self.player2.width, self.player2.height, 
+                       self.player2.color, self.player2.action, self.player2.direction, self.player2.action_time,
+                       self.player2.special_active, scale))
+            profiler.stop("stickman")
             
             # Draw UI elements
-            draw_ui(screen, self.player1, self.player2, self.font)
+            profiler.start("ui")
+            for rect in draw_ui(self.screen, self.player1, self.player2, self.font, scale):
+                mark(rect)
+            profiler.stop("ui")
             
             # Draw particles
-            for particle in self.particles:
-                particle.draw(screen)
+            profiler.start("particles_draw")
+            mark(self.particles.draw(self.screen, scale=scale))
+            profiler.stop("particles_draw")
             
             # Draw pause overlay
             if self.game_state == "paused":
-                overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-                overlay.fill((0, 0, 0, 150))
-                screen.blit(overlay, (0, 0))
+                draw_dim_overlay(self.screen)
                 
-                pause_text = self.big_font.render("PAUSED", True, WHITE)
-                resume_text = self.font.render("Press ESC to resume", True, WHITE)
-                restart_text = self.font.render("Press R to restart", True, WHITE)
-                menu_text = self.font.render("Press M for menu", True, WHITE)
+                pause_text = render_text(self.big_font, "PAUSED", WHITE)
+                resume_text = render_text(self.font, "Press ESC to resume", WHITE)
+                restart_text = render_text(self.font, "Press R to restart", WHITE)
+                menu_text = render_text(self.font, "Press M for menu", WHITE)
                 
-                screen.blit(pause_text, (SCREEN_WIDTH // 2 - pause_text.get_width() // 2, SCREEN_HEIGHT // 3))
-                screen.blit(resume_text, (SCREEN_WIDTH // 2 - resume_text.get_width() // 2, SCREEN_HEIGHT // 2))
-                screen.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, SCREEN_HEIGHT // 2 + 40))
-                screen.blit(menu_text, (SCREEN_WIDTH // 2 - menu_text.get_width() // 2, SCREEN_HEIGHT // 2 + 80))
+                middle = self.screen.get_height() // 2
+                self.screen.blit(pause_text, (center - pause_text.get_width() // 2, self.screen.get_height() // 3))
+                self.screen.blit(resume_text, (center - resume_text.get_width() // 2, middle))
+                self.screen.blit(restart_text, (center - restart_text.get_width() // 2, middle + round(40 * scale)))
+                self.screen.blit(menu_text, (center - menu_text.get_width() // 2, middle + round(80 * scale)))
         
         elif self.game_state == "game_over":
             # Display current mode
-            mode_text = self.font.render(f"MODE: {'SOLO' if self.game_mode == 'solo' else 'VERSUS'}", True, WHITE)
-            screen.blit(mode_text, (SCREEN_WIDTH // 2 - mode_text.get_width() // 2, 10))
+            mode_text = render_text(self.font, f"MODE: {'SOLO' if self.game_mode == 'solo' else 'VERSUS'}", WHITE)
+            self.screen.blit(mode_text, (center - mode_text.get_width() // 2, round(10 * scale)))
             
             # Draw final positions of fighters
-            draw_stickman(screen, self.player1.x, self.player1.y, self.player1.width, self.player1.height, 
-                       self.player1.color, self.player1.action, self.player1.direction, False)
+            draw_animated(self.screen, self.player1.x, self.player1.y, self.player1.width, self.player1.height, 
+                       self.player1.color, self.player1.action, self.player1.direction, self.player1.action_time,
+                       scale=scale)
             
-            draw_stickman(screen, self.player2.x, self.player2.y, self.player2.width, self.player2.height, 
-                       self.player2.color, self.player2.action, self.player2.direction, False)
+            draw_animated(self.screen, self.player2.x, self.player2.y, self.player2.width, self.player2.height, 
+                       self.player2.color, self.player2.action, self.player2.direction, self.player2.action_time,
+                       scale=scale)
             
             # Draw game over screen
-            draw_game_over(screen, self.winner, self.big_font, self.font)
+            draw_game_over(self.screen, self.winner, self.big_font, self.font, scale)
+        
+        # Frame profiler graph
+        mark(self.profiler.draw(self.screen, (center - GRAPH_FRAMES, round(50 * scale))))
+        
+        # Present only the changed regions, or the whole frame
+        self.profiler.start("present")
+        changed = self.dirty_rects.flush()
+        self.presenter.present(changed if dirty else None)
+        self.profiler.stop("present")
         
-        pygame.display.flip()
+        self.frame_timer.end("dirty" if dirty else "full")
+    
+    def snapshot(self):
+        """Return the match and background state (fighters, particles, clouds) as bytes"""
+        clouds = b"".join(CLOUD_STATE.pack(cloud["x"], cloud["y"], cloud["width"], cloud["height"], cloud["speed"])
+                          for cloud in self.clouds)
+        return len(clouds).to_bytes(4, "little") + clouds + self.sim.snapshot()
+    
+    def restore(self, blob):
+        """Return to a state produced by snapshot()"""
+        size = int.from_bytes(blob[:4], "little")
+        self.clouds = [dict(zip(("x", "y", "width", "height", "speed"), values))
+                       for values in CLOUD_STATE.iter_unpack(blob[4:4 + size])]
+        self.sim.restore(blob[4 + size:])
+    
+    @staticmethod
+    def interpolate_x(fighter, lag):
+        """Fighter x position lag steps behind its latest update, in whole pixels"""
+        return round(fighter.x - (fighter.x - fighter.prev_x) * lag)
     
     def reset_game(self):
-        # Determine if player 2 is CPU based on game mode
-        is_player2_human = self.game_mode == "versus"
-        
-        # Reset fighter positions and stats
-        self.player1.x = 200
-        self.player1.health = 100
-        self.player1.energy = 100
-        self.player1.special_meter = 0
-        self.player1.special_ready = False
-        self.player1.action = "idle"
-        
-        self.player2.x = 600
-        self.player2.health = 100
-        self.player2.energy = 100
-        self.player2.special_meter = 0
-        self.player2.special_ready = False
-        self.player2.action = "idle"
-        self.player2.is_player = is_player2_human
-        
         # Reset game state
         self.game_over = False
         self.winner = None
-        self.particles = []
+        self.input.clear()
+        
+        if self.replay is not None:
+            self.replay.seek(0)
+            self.broadcast_match()
+            return
+        if self.netplay is not None:
+            # A rematch would need both peers to agree on a new seed
+            return
+        
+        # Reset fighters with a fresh seed; player 2 is CPU or human based on
+        # game mode. The search AI plays through player 2's inputs, so to the
+        # simulation (and replays) its matches are versus matches.
+        if self.game_mode == "solo" and self.ai is not None:
+            self.sim.inputs = [self.keyboard[0], self.ai]
+            self.sim.reset("versus", self.rng.getrandbits(32))
+        else:
+            self.sim.inputs = list(self.keyboard)
+            self.sim.reset(self.game_mode, self.rng.getrandbits(32))
+        self.start_recording()
+        self.broadcast_match()
+    
+    def start_recording(self):
+        """Record the match that is about to start if a record directory is set"""
+        self.stop_recording()
+        if self.record_dir is None:
+            return
+        
+        os.makedirs(self.record_dir, exist_ok=True)
+        name = f"match-{time.strftime('%Y%m%d-%H%M%S')}-{self.sim.seed}.sfr"
+        self.recorder = ReplayRecorder(os.path.join(self.record_dir, name), self.sim)
+        self.sim.recorder = self.recorder
+    
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+            self.sim.recorder = None
+    
+    def start_broadcast(self, port, host="0.0.0.0"):
+        """
+        Stream local matches and replays to spectators connecting over TCP
+        
+        Online matches are not broadcast: rollbacks would send inputs that
+        later turn out to be mispredicted.
+        
+        Args:
+            port: TCP port spectators connect to
+            host: Address to listen on
+        """
+        self.spectators = SpectatorServer(host, port)
+        self.spectators.start()
+        self.broadcast_match()
+    
+    def broadcast_match(self):
+        """Send spectators the current match state and follow its steps"""
+        if self.spectators is None or self.netplay is not None:
+            return
+        self.sim.spectators = self.spectators
+        self.spectators.start_match(self.sim)
+    
+    def start_netplay(self, port, peer, player, seed, latency=0.0, loss=0.0):
+        """
+        Play versus against another peer over UDP with rollback
+        
+        Args:
+            port: Local UDP port
+            peer: (host, port) of the other player
+            player: 1 or 2; each peer uses its own fighter's keys
+            seed: Match seed, which must be the same on both peers
+            latency, loss: Simulated one-way latency (seconds) and packet loss
+        """
+        transport = UdpTransport(port, peer)
+        if latency or loss:
+            transport = LossyTransport(transport, latency, 0.0, loss, player)
+        
+        self.game_mode = "versus"
+        self.sim.reset("versus", seed)
+        self.netplay = RollbackSession(self.sim, player - 1, transport)
+        self.input.clear()
+        self.game_over = False
+        self.winner = None
+        self.game_state = "playing"
+    
+    def configure_effects(self):
+        """Apply the particle cap and policy to the current match's effects"""
+        self.sim.effects.cap = self.max_particles
+        self.sim.effects.policy = self.particle_policy
+    
+    def play_replay(self, path):
+        """Watch a recorded match; left/right arrows seek"""
+        self.replay = ReplayPlayer(path)
+        self.sim = self.replay.sim
+        self.sim.profiler = self.profiler
+        self.configure_effects()
+        self.game_mode = self.replay.game_mode
+        self.game_over = False
+        self.winner = None
+        self.game_state = "playing"
+        self.broadcast_match()
     
     def run(self):
+        """
+        Main loop: the game advances in fixed TIMESTEP steps however fast
+        frames are drawn, catching up after a stall of up to MAX_FRAME_TIME
+        """
+        accumulator = 0.0
+        previous = time.perf_counter()
+        
         while self.running:
+            now = time.perf_counter()
+            accumulator += min(now - previous, MAX_FRAME_TIME)
+            previous = now
+            
+            self.profiler.begin_frame()
+            self.profiler.start("events")
             self.handle_events()
-            self.update()
-            self.draw()
-            clock.tick(FPS)
+            self.profiler.stop("events")
+            while accumulator >= TIMESTEP:
+                self.update()
+                accumulator -= TIMESTEP
+            
+            self.draw(accumulator / TIMESTEP)
+            self.profiler.end_frame()
+            self.clock.tick(RENDER_FPS)
+        
+        self.stop_recording()
+        if self.spectators is not None:
+            self.spectators.stop()
+        if isinstance(self.ai, AIWorker):
+            self.ai.close()
 
 # Run the game if this is the main file
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Stick Fighter")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible session")
+    parser.add_argument("--record", metavar="DIR", help="save a replay of every match to DIR")
+    parser.add_argument("--replay", metavar="FILE", help="watch a recorded match")
+    parser.add_argument("--netplay", type=int, metavar="PORT", help="play online versus from this UDP port")
+    parser.add_argument("--peer", metavar="HOST:PORT", help="the other online player")
+    parser.add_argument("--player", type=int, choices=(1, 2), default=1, help="online player number")
+    parser.add_argument("--ai", choices=tuple(DIFFICULTIES),
+                        help="play solo matches against the search AI instead of the built-in CPU")
+    parser.add_argument("--ai-worker", choices=("process", "thread", "inline"), default="process",
+                        help="where the search AI runs")
+    parser.add_argument("--profile", action="store_true", help="start with the frame profiler on (F3 toggles it)")
+    parser.add_argument("--profile-out", metavar="FILE",
+                        help="save the profiler's frames on exit (.csv) or its percentiles (.json)")
+    parser.add_argument("--broadcast", type=int, metavar="PORT", help="stream matches to spectators on this TCP port")
+    parser.add_argument("--max-particles", type=int, default=MAX_PARTICLES,
+                        help=f"cap on live effect particles (default {MAX_PARTICLES})")
+    parser.add_argument("--particle-policy", choices=PARTICLE_POLICIES, default=PARTICLE_POLICY,
+                        help="what new effects do at the particle cap")
+    parser.add_argument("--render-scale", type=float, default=1.0,
+                        help="draw frames at this multiple of the logical resolution, e.g. 0.5 or 2")
+    parser.add_argument("--window", metavar="WIDTHxHEIGHT",
+                        help=f"window size (default {SCREEN_WIDTH}x{SCREEN_HEIGHT}); frames are scaled to fit")
+    parser.add_argument("--bindings", metavar="FILE", help="load key bindings from a JSON file (see keyboard.py)")
+    args = parser.parse_args()
+    
+    peer = None
+    if args.netplay:
+        if not args.peer:
+            parser.error("--netplay needs --peer HOST:PORT")
+        host, _, port = args.peer.rpartition(":")
+        if not host or not port.isdigit():
+            parser.error(f"--peer must be HOST:PORT, not {args.peer!r}")
+        peer = (host, int(port))
+    
+    window_size = None
+    if args.window:
+        width, height = args.window.lower().split("x")
+        window_size = (int(width), int(height))
+    
+    game = Game(seed=args.seed, record_dir=args.record, ai=args.ai,
+                ai_worker=None if args.ai_worker == "inline" else args.ai_worker,
+                max_particles=args.max_particles, particle_policy=args.particle_policy,
+                render_scale=args.render_scale, window_size=window_size, bindings=args.bindings)
+    if args.broadcast:
+        game.start_broadcast(args.broadcast)
+    if args.profile or args.profile_out:
+        game.profiler.toggle()
+    if args.replay:
+        game.play_replay(args.replay)
+    elif args.netplay:
+        game.start_netplay(args.netplay, peer, args.player, args.seed or 0)
     game.run()
+    print(game.frame_timer.report())
+    print(game.input.latency.report())
+    if game.spectators is not None:
+        print(game.spectators.report())
+    if args.profile_out:
+        game.profiler.export(args.profile_out)
+    if isinstance(game.ai, AIWorker):
+        print("AI worker:", game.ai.stats())
     pygame.quit()
     sys.exit()
\ No newline at end of file
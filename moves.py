@@ -0,0 +1,123 @@
+# moves.py - Move definitions loaded from moves.json and compiled into lookup tables
+#
+# moves.json tunes the existing moves; it cannot add new ones. Which moves
+# exist is fixed by the code that starts and draws them: player input and the
+# CPU in fighter.py, the control bits of replay.py and the stickman poses.
+# The file must define exactly MOVES_IN_CODE.
+#
+# Each move in moves.json has:
+#   startup, active, recovery  frames of each phase; the move lasts their sum
+#   damage                     damage of a hit (moves without it never hit)
+#   energy_cost                energy spent to start the move
+#   hitbox                     {"right": box, "left": box} used on every active
+#                              frame, or
+#   hitboxes                   a list of such boxes, one per active frame
+#                              (null for a frame without one)
+#
+# A box is [x, y, width, height] relative to the fighter's centre, with x and
+# width in fighter widths and y and height in fighter heights, written as
+# numbers or fraction strings ("1/3"). A "left" box may be left out to mirror
+# the "right" one. Pixel values are truncated toward zero, the same as the
+# integer arithmetic fighters used before the table existed.
+
+import json
+import os
+from fractions import Fraction
+
+MOVES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "moves.json")
+
+# Directions in table order (matches fighter.DIRECTIONS)
+DIRECTIONS = ("left", "right")
+
+# Moves the game can start and draw
+MOVES_IN_CODE = ("punch", "kick", "block", "special")
+
+def load_moves(path=MOVES_PATH):
+    """Read and check the move definitions, returning {name: definition}"""
+    with open(path) as f:
+        moves = json.load(f)
+
+    if sorted(moves) != sorted(MOVES_IN_CODE):
+        raise ValueError(f"{path} must define exactly the moves {MOVES_IN_CODE}; "
+                         f"new moves need code in fighter.py, replay.py and stickman.py")
+    for name, move in moves.items():
+        for key in ("startup", "active", "recovery", "energy_cost"):
+            if key not in move:
+                raise ValueError(f"move {name!r} has no {key!r}")
+        if move["startup"] + move["active"] + move["recovery"] <= 0:
+            raise ValueError(f"move {name!r} lasts no frames")
+        hitboxes = move.get("hitboxes")
+        if hitboxes is not None and len(hitboxes) != move["active"]:
+            raise ValueError(f"move {name!r} needs one hitbox per active frame")
+    return moves
+
+def scale(value, size):
+    """A box coordinate in pixels, truncated toward zero"""
+    return int(Fraction(str(value)) * size)
+
+def compile_box(box, width, height):
+    x, y, w, h = box
+    return (scale(x, width), scale(y, height), scale(w, width), scale(h, height))
+
+def mirror(box):
+    x, y, w, h = box
+    return [-Fraction(str(x)) - Fraction(str(w)), y, w, h]
+
+class MoveTable:
+    def __init__(self, moves, width, height):
+        """
+        Per-frame lookup tables of every move for one fighter size
+
+        Tables are flat tuples. Move i (0 is "idle") on frame f uses
+            duration[i]                           frames the move lasts
+            boxes[(i * stride + f) * 2 + d]       (dx, dy, width, height) of
+                                                  the attack box facing
+                                                  DIRECTIONS[d], or None
+        """
+        self.names = ("idle",) + tuple(moves)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.stride = max(move["startup"] + move["active"] + move["recovery"] for move in moves.values())
+
+        durations = [0]
+        boxes = [None] * (self.stride * 2)
+        for name, move in moves.items():
+            durations.append(move["startup"] + move["active"] + move["recovery"])
+
+            active = move.get("hitboxes")
+            if active is None:
+                active = [move.get("hitbox")] * move["active"]
+            if "damage" not in move:
+                active = [None] * move["active"]
+
+            frames = [None] * move["startup"] + list(active) + [None] * (self.stride - move["startup"] - move["active"])
+            for hitbox in frames:
+                for direction in DIRECTIONS:
+                    if hitbox is None:
+                        boxes.append(None)
+                    else:
+                        box = hitbox.get(direction) or mirror(hitbox["right"])
+                        boxes.append(compile_box(box, width, height))
+
+        self.duration = tuple(durations)
+        self.boxes = tuple(boxes)
+
+    def box(self, action, frame, direction):
+        """Attack box offsets of a move on one frame, or None"""
+        return self.boxes[(self.index[action] * self.stride + frame) * 2 + DIRECTIONS.index(direction)]
+
+MOVES = load_moves()
+
+# Move names in table order, and the per-move numbers the rules look up by name
+MOVE_NAMES = ("idle",) + tuple(MOVES)
+DURATION = {name: move["startup"] + move["active"] + move["recovery"] for name, move in MOVES.items()}
+DAMAGE = {name: move["damage"] for name, move in MOVES.items() if "damage" in move}
+ENERGY_COST = {name: move["energy_cost"] for name, move in MOVES.items()}
+
+_tables = {}
+
+def move_table(width, height):
+    """The compiled MoveTable for a fighter size (built once per size)"""
+    table = _tables.get((width, height))
+    if table is None:
+        table = _tables[width, height] = MoveTable(MOVES, width, height)
+    return table
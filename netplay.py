@@ -0,0 +1,359 @@
+# netplay.py - Rollback netcode for versus matches over UDP
+#
+# Each peer simulates the whole match. Local inputs are applied after a short
+# input delay and sent to the other peer every frame (with the recent unacknowledged
+# ones repeated, so a lost packet costs nothing). A remote input that has not
+# arrived yet is predicted by repeating the last one received; when the real
+# input turns out different the match is restored to the saved state of that
+# frame and resimulated up to the present within the same frame.
+#
+# Two headless peers on one machine, with 60 ms of simulated latency:
+#   python netplay.py --player 1 --port 7001 --peer 127.0.0.1:7002 --latency 60 &
+#   python netplay.py --player 2 --port 7002 --peer 127.0.0.1:7001 --latency 60
+
+import argparse
+import heapq
+import random
+import socket
+import struct
+import sys
+import time
+import zlib
+
+from constants import *
+from replay import encode_actions, decode_actions, CONTROL_ACTIONS
+from simulation import Simulation
+
+# Packet: ack (latest remote frame received without gaps), first frame, count,
+# followed by one input byte per frame
+PACKET_HEADER = struct.Struct("<iIB")
+MAX_INPUTS_PER_PACKET = 64
+
+class UdpTransport:
+    def __init__(self, port, peer, host="127.0.0.1"):
+        """
+        Non-blocking UDP socket talking to a single peer
+
+        Args:
+            port: Local port to bind
+            peer: (host, port) of the other player
+            host: Local address to bind
+        """
+        self.peer = peer
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+
+    def send(self, data):
+        try:
+            self.sock.sendto(data, self.peer)
+        except OSError:
+            pass  # Peer not listening yet; later packets repeat the inputs
+
+    def receive(self):
+        """Return every datagram waiting on the socket"""
+        packets = []
+        while True:
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except (BlockingIOError, ConnectionError):
+                return packets
+            packets.append(data)
+
+    def close(self):
+        self.sock.close()
+
+class LossyTransport:
+    def __init__(self, transport, latency=0.0, jitter=0.0, loss=0.0, seed=0):
+        """
+        Wraps a transport to delay, reorder and drop outgoing packets
+
+        Args:
+            transport: Transport that actually sends
+            latency: One-way delay in seconds
+            jitter: Extra random delay of up to this many seconds
+            loss: Probability that a packet is dropped
+            seed: Seed for the drop and jitter decisions
+        """
+        self.transport = transport
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.queue = []
+        self.sequence = 0
+
+    def send(self, data):
+        if self.rng.random() < self.loss:
+            return
+        due = time.perf_counter() + self.latency + self.rng.uniform(0, self.jitter)
+        heapq.heappush(self.queue, (due, self.sequence, data))
+        self.sequence += 1
+
+    def pump(self):
+        """Send every delayed packet whose time has come"""
+        now = time.perf_counter()
+        while self.queue and self.queue[0][0] <= now:
+            self.transport.send(heapq.heappop(self.queue)[2])
+
+    def receive(self):
+        self.pump()
+        return self.transport.receive()
+
+    def close(self):
+        self.transport.close()
+
+class RollbackSession:
+    def __init__(self, sim, local_player, transport, input_delay=2, max_rollback=8):
+        """
+        Drives a versus Simulation shared with a remote peer
+
+        Args:
+            sim: Simulation in "versus" mode, seeded identically on both peers
+            local_player: 0 if this peer controls player 1, 1 for player 2
+            transport: Object with send(bytes) and receive() -> [bytes]
+            input_delay: Frames between reading a local input and applying it
+            max_rollback: Furthest the simulation may run ahead of confirmed
+                remote inputs before it waits for them
+        """
+        self.sim = sim
+        self.local_player = local_player
+        self.transport = transport
+        self.input_delay = input_delay
+        self.max_rollback = max_rollback
+
+        self.local_inputs = {}  # frame -> mask
+        self.remote_inputs = {}  # frame -> mask, as received
+        self.predicted = {}  # frame -> remote mask the simulation used
+        self.states = {}  # frame -> snapshot taken at the start of that frame
+        self.remote_confirmed = -1  # Every remote input up to here has arrived
+        self.remote_ack = -1  # Every local input up to here has reached the peer
+        self.input_frame = 0  # Next frame a local input will be scheduled for
+        self.rollback_from = None
+
+        # Statistics
+        self.rollbacks = 0
+        self.rollback_frames = 0
+        self.max_rollback_depth = 0
+        self.stalls = 0
+        self.last_rollback_depth = 0
+        self.last_resimulation_time = 0.0
+        self.total_resimulation_time = 0.0
+
+        for frame in range(input_delay):
+            self.local_inputs[frame] = 0
+        self.input_frame = input_delay
+
+    @property
+    def frame(self):
+        return self.sim.frame
+
+    def add_local_input(self, actions):
+        """Schedule this frame's local input input_delay frames ahead"""
+        self.local_inputs[self.input_frame] = encode_actions(actions)
+        self.input_frame += 1
+
+    def send_inputs(self):
+        """Send every local input the peer has not acknowledged yet"""
+        first = max(self.remote_ack + 1, self.input_frame - MAX_INPUTS_PER_PACKET)
+        inputs = bytes(self.local_inputs[frame] for frame in range(first, self.input_frame))
+        self.transport.send(PACKET_HEADER.pack(self.remote_confirmed, first, len(inputs)) + inputs)
+
+    def receive_inputs(self):
+        """Store remote inputs and note the earliest one that was mispredicted"""
+        for packet in self.transport.receive():
+            if len(packet) < PACKET_HEADER.size:
+                continue
+            ack, first, count = PACKET_HEADER.unpack_from(packet)
+            self.remote_ack = max(self.remote_ack, ack)
+
+            for i, mask in enumerate(packet[PACKET_HEADER.size:PACKET_HEADER.size + count]):
+                frame = first + i
+                if frame <= self.remote_confirmed or frame in self.remote_inputs:
+                    continue
+                self.remote_inputs[frame] = mask
+
+                predicted = self.predicted.get(frame)
+                if predicted is not None and predicted != mask:
+                    if self.rollback_from is None or frame < self.rollback_from:
+                        self.rollback_from = frame
+
+            while self.remote_confirmed + 1 in self.remote_inputs:
+                self.remote_confirmed += 1
+
+    def remote_input(self, frame):
+        """Real remote input for a frame, or a prediction when it has not arrived"""
+        mask = self.remote_inputs.get(frame)
+        if mask is None:
+            mask = self.remote_inputs.get(self.remote_confirmed, 0)
+            self.predicted[frame] = mask
+        else:
+            self.predicted.pop(frame, None)
+        return mask
+
+    def simulate_frame(self):
+        """Save the state, then step the simulation one frame"""
+        frame = self.sim.frame
+        self.states[frame] = self.sim.snapshot()
+
+        local = decode_actions(self.local_inputs[frame])
+        remote = decode_actions(self.remote_input(frame))
+        if self.local_player == 0:
+            self.sim.step((local, remote))
+        else:
+            self.sim.step((remote, local))
+
+    def rollback(self):
+        """Resimulate from the earliest mispredicted frame up to the present"""
+        self.last_rollback_depth = 0
+        self.last_resimulation_time = 0.0
+        if self.rollback_from is None:
+            return
+
+        start = time.perf_counter()
+        target = self.sim.frame
+        frame = self.rollback_from
+        self.rollback_from = None
+
+        self.sim.restore(self.states[frame])
+        while self.sim.frame < target and not self.sim.over:
+            self.simulate_frame()
+
+        depth = target - frame
+        self.last_rollback_depth = depth
+        self.last_resimulation_time = time.perf_counter() - start
+        self.total_resimulation_time += self.last_resimulation_time
+        self.rollbacks += 1
+        self.rollback_frames += depth
+        self.max_rollback_depth = max(self.max_rollback_depth, depth)
+
+    def advance(self, actions):
+        """
+        Run one frame of netplay
+
+        Args:
+            actions: Control names the local player holds this frame
+
+        Returns:
+            True if the simulation advanced, False if it is waiting on the peer
+        """
+        self.receive_inputs()
+        self.rollback()
+
+        # Too far ahead of the peer (or the match is over): wait, dropping this
+        # frame's local input. Held keys are read again on the next frame; a
+        # tap pressed and released during a stall is lost.
+        if self.sim.over or self.sim.frame - self.remote_confirmed > self.max_rollback:
+            if not self.sim.over:
+                self.stalls += 1
+            self.send_inputs()
+            return False
+
+        self.add_local_input(actions)
+        self.send_inputs()
+        self.simulate_frame()
+        self.forget_old_frames()
+        return True
+
+    def settled(self):
+        """
+        Whether the match is over on confirmed inputs only, so no rollback
+        can still change the result
+        """
+        return (self.sim.over and self.rollback_from is None
+                and self.remote_confirmed >= self.sim.frame - 1)
+
+    def linger(self):
+        """Keep answering the peer after the match so it can confirm the end too"""
+        self.receive_inputs()
+        self.send_inputs()
+
+    def forget_old_frames(self):
+        """Drop saved states and inputs that can no longer be rolled back to"""
+        oldest = min(self.remote_confirmed, self.remote_ack) - 1
+        for frame in [frame for frame in self.states if frame < oldest]:
+            del self.states[frame]
+            self.local_inputs.pop(frame, None)
+            self.remote_inputs.pop(frame, None)
+            self.predicted.pop(frame, None)
+
+    def stats(self):
+        return {
+            "frame": self.sim.frame,
+            "rollbacks": self.rollbacks,
+            "rollback_frames": self.rollback_frames,
+            "max_rollback_depth": self.max_rollback_depth,
+            "mean_rollback_depth": self.rollback_frames / self.rollbacks if self.rollbacks else 0.0,
+            "stalls": self.stalls,
+            "last_rollback_depth": self.last_rollback_depth,
+            "last_resimulation_ms": self.last_resimulation_time * 1000,
+            "resimulation_ms_total": self.total_resimulation_time * 1000,
+            "resimulation_ms_per_rollback":
+                self.total_resimulation_time * 1000 / self.rollbacks if self.rollbacks else 0.0
+        }
+
+def random_inputs(seed):
+    """Input source for testing: random control combinations held for a few frames"""
+    rng = random.Random(seed)
+    state = {"actions": (), "frames": 0}
+
+    def source():
+        if state["frames"] <= 0:
+            state["actions"] = {action for action in CONTROL_ACTIONS if rng.random() < 0.25}
+            state["frames"] = rng.randint(1, 15)
+        state["frames"] -= 1
+        return state["actions"]
+
+    return source
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless rollback netplay peer for testing")
+    parser.add_argument("--player", type=int, choices=(1, 2), required=True)
+    parser.add_argument("--port", type=int, required=True, help="local UDP port")
+    parser.add_argument("--peer", required=True, metavar="HOST:PORT")
+    parser.add_argument("--seed", type=int, default=0, help="match seed (same on both peers)")
+    parser.add_argument("--frames", type=int, default=1800, help="frames to play")
+    parser.add_argument("--fps", type=float, default=FPS)
+    parser.add_argument("--input-delay", type=int, default=2)
+    parser.add_argument("--max-rollback", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="one-way latency in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency in ms")
+    parser.add_argument("--loss", type=float, default=0.0, help="packet loss probability")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for the peer")
+    args = parser.parse_args(argv)
+
+    host, port = args.peer.rsplit(":", 1)
+    transport = LossyTransport(UdpTransport(args.port, (host, int(port))),
+                               args.latency / 1000, args.jitter / 1000, args.loss, args.player)
+
+    sim = Simulation("versus", seed=args.seed)
+    session = RollbackSession(sim, args.player - 1, transport, args.input_delay, args.max_rollback)
+    inputs = random_inputs(args.seed * 2 + args.player)
+
+    tick = 1.0 / args.fps
+    next_tick = time.perf_counter()
+    deadline = next_tick + args.timeout + args.frames * tick
+    while sim.frame < args.frames and not sim.over and time.perf_counter() < deadline:
+        session.advance(inputs())
+        next_tick += tick
+        time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+    # Keep exchanging inputs until every remote input has arrived, then
+    # correct any remaining misprediction so both peers end identical
+    while session.remote_confirmed < sim.frame - 1 and time.perf_counter() < deadline:
+        session.linger()
+        time.sleep(tick)
+    session.rollback()
+    for i in range(int(0.5 / tick)):
+        # Let the peer finish too
+        session.linger()
+        time.sleep(tick)
+
+    stats = session.stats()
+    print(f"player {args.player}: frame {stats['frame']}, state checksum {zlib.crc32(sim.snapshot()):08x}")
+    for key, value in stats.items():
+        print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+    transport.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
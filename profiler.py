@@ -0,0 +1,166 @@
+# profiler.py - Per-frame timing of the game's subsystems
+#
+# FrameProfiler keeps the time each instrumented section took in each of the
+# last few hundred frames. It is off by default; while disabled start() and
+# stop() return immediately, so leaving the calls in place costs next to
+# nothing. F3 in the game toggles profiling and its on-screen graph.
+
+import csv
+import json
+import time
+
+import numpy as np
+import pygame
+
+from constants import *
+from ui import render_text
+
+# Instrumented sections in drawing order, with their graph colours
+SECTIONS = ("events", "player1", "player2", "particles_update", "stickman", "ui",
+            "particles_draw", "present")
+SECTION_COLORS = ((200, 200, 200), BLUE, RED, PURPLE, (0, 160, 0), YELLOW, ORANGE, (0, 200, 200))
+SECTION_INDEX = {name: i for i, name in enumerate(SECTIONS)}
+
+# Graph geometry: one column per frame, GRAPH_SCALE pixels per millisecond
+GRAPH_FRAMES = 120
+GRAPH_HEIGHT = 70
+GRAPH_SCALE = GRAPH_HEIGHT / (TIMESTEP * 1000 * 1.5)
+OVERLAY_REFRESH = 30  # Frames between redraws of the graph
+FONT_SIZE = 18
+
+class FrameProfiler:
+    def __init__(self, history=600):
+        """
+        Rolling per-section frame timings
+
+        Args:
+            history: Frames kept for percentiles and export
+        """
+        self.enabled = False
+        self.show_overlay = False
+        self.history = history
+
+        # One row per frame: each section, then the whole frame, in seconds
+        self.samples = np.zeros((history, len(SECTIONS) + 1))
+        self.frames = 0
+        self.current = [0.0] * len(SECTIONS)
+        self.started = [0.0] * len(SECTIONS)
+        self.frame_start = 0.0
+
+        self.overlay = None
+        self.overlay_age = 0
+        self.font = None
+
+    def toggle(self):
+        """Switch profiling and the overlay on or off together"""
+        self.enabled = self.show_overlay = not self.enabled
+        self.overlay = None
+
+    def begin_frame(self):
+        if self.enabled:
+            self.current = [0.0] * len(SECTIONS)
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if self.enabled:
+            row = self.samples[self.frames % self.history]
+            row[:-1] = self.current
+            row[-1] = time.perf_counter() - self.frame_start
+            self.frames += 1
+
+    def start(self, section):
+        if self.enabled:
+            self.started[SECTION_INDEX[section]] = time.perf_counter()
+
+    def stop(self, section):
+        """Add the time since start(section) to this frame's total for it"""
+        if self.enabled:
+            i = SECTION_INDEX[section]
+            self.current[i] += time.perf_counter() - self.started[i]
+
+    def recent(self):
+        """Recorded rows, oldest first, in milliseconds"""
+        count = min(self.frames, self.history)
+        first = self.frames - count
+        order = np.arange(first, self.frames) % self.history
+        return self.samples[order] * 1000
+
+    def percentiles(self):
+        """p50/p95/p99, mean and max milliseconds of every section and the frame"""
+        rows = self.recent()
+        summary = {}
+        for i, name in enumerate(SECTIONS + ("frame",)):
+            if len(rows) == 0:
+                summary[name] = None
+                continue
+            column = rows[:, i]
+            p50, p95, p99 = np.percentile(column, (50, 95, 99))
+            summary[name] = {"p50": p50, "p95": p95, "p99": p99,
+                             "mean": column.mean(), "max": column.max()}
+        return summary
+
+    def export(self, path):
+        """Write the recorded frames as CSV, or a percentile summary as JSON (by extension)"""
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"frames": min(self.frames, self.history), "ms": self.percentiles()}, f, indent=2)
+            return
+
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("frame",) + SECTIONS + ("frame_ms",))
+            first = self.frames - min(self.frames, self.history)
+            for number, row in enumerate(self.recent(), first):
+                writer.writerow([number] + [f"{value:.4f}" for value in row])
+
+    def draw(self, surface, position=(SCREEN_WIDTH // 2 - GRAPH_FRAMES, 50)):
+        """Draw the frame time graph and percentiles; returns the rect drawn"""
+        if not self.show_overlay:
+            return None
+
+        # Redrawing the graph every frame would cost more than what it measures
+        self.overlay_age -= 1
+        if self.overlay is None or self.overlay_age <= 0:
+            if self.font is None:
+                self.font = pygame.font.Font(None, FONT_SIZE)
+            self.overlay = self.render_overlay(self.font)
+            self.overlay_age = OVERLAY_REFRESH
+        return surface.blit(self.overlay, position)
+
+    def render_overlay(self, font):
+        width = GRAPH_FRAMES * 2
+        text_height = font.get_linesize()
+        overlay = pygame.Surface((width, GRAPH_HEIGHT + text_height * 2))
+        overlay.fill(BLACK)
+
+        # Stacked bars, one per frame, with the remainder of the frame in grey
+        rows = self.recent()[-GRAPH_FRAMES:]
+        offset = GRAPH_FRAMES - len(rows)
+        for column, row in enumerate(rows, offset):
+            bottom = GRAPH_HEIGHT
+            for value, color in zip(row[:-1], SECTION_COLORS):
+                height = value * GRAPH_SCALE
+                if height >= 1:
+                    pygame.draw.rect(overlay, color, (column * 2, bottom - height, 2, height))
+                    bottom -= height
+            rest = row[-1] * GRAPH_SCALE - (GRAPH_HEIGHT - bottom)
+            if rest >= 1:
+                pygame.draw.rect(overlay, GRAY, (column * 2, bottom - rest, 2, rest))
+
+        # Frame budget line
+        budget = GRAPH_HEIGHT - TIMESTEP * 1000 * GRAPH_SCALE
+        pygame.draw.line(overlay, WHITE, (0, budget), (width, budget))
+
+        stats = self.percentiles()
+        frame = stats["frame"]
+        if frame is not None:
+            text = f"frame p50 {frame['p50']:.2f}  p95 {frame['p95']:.2f}  p99 {frame['p99']:.2f} ms"
+            overlay.blit(render_text(font, text, WHITE), (2, GRAPH_HEIGHT))
+
+        # Slowest section by p95
+        worst = max(SECTIONS, key=lambda name: stats[name]["p95"] if stats[name] else 0.0)
+        if stats[worst] is not None:
+            overlay.blit(render_text(font, f"slowest: {worst} p95 {stats[worst]['p95']:.2f} ms", WHITE),
+                         (2, GRAPH_HEIGHT + text_height))
+        overlay.set_alpha(200)
+        return overlay
@@ -0,0 +1,150 @@
+# renderer.py - Cached background layer, dirty rectangle tracking and scaled presentation
+#
+# Game coordinates are logical pixels of a SCREEN_WIDTH x SCREEN_HEIGHT screen.
+# Frames are drawn at a render scale (logical pixels times the scale) and
+# presented scaled to whatever size the window is, so the render scale trades
+# detail for frame time without touching game logic.
+
+import time
+
+import pygame
+from constants import *
+
+def render_size(scale):
+    """Pixel size of a frame drawn at a render scale"""
+    return (max(1, round(SCREEN_WIDTH * scale)), max(1, round(SCREEN_HEIGHT * scale)))
+
+def scale_rect(rect, scale):
+    """A logical (x, y, width, height) in render pixels"""
+    x, y, width, height = rect
+    return (int(x * scale), int(y * scale), int(width * scale), int(height * scale))
+
+def scale_width(width, scale):
+    """A line width in render pixels, never thinner than one pixel"""
+    return max(1, round(width * scale))
+
+def create_background_layer(scale=1.0):
+    """Render the static sky, mountains and ground once"""
+    background = pygame.Surface(render_size(scale))
+    if pygame.display.get_surface() is not None:
+        background = background.convert()
+
+    background.fill(SKY_BLUE)
+    width, height = background.get_size()
+
+    # Mountains
+    for i in range(3):
+        x1 = i * 300 - 100
+        x2 = x1 + 150
+        x3 = x1 + 300
+        pygame.draw.polygon(background, (100, 100, 100),
+                            [(round(x1 * scale), height), (round(x2 * scale), round(300 * scale)),
+                             (round(x3 * scale), height)])
+
+    # Ground
+    ground = height - round(50 * scale)
+    pygame.draw.rect(background, (139, 69, 19), (0, ground, width, height - ground))
+    pygame.draw.line(background, (100, 50, 0), (0, ground), (width, ground), scale_width(3, scale))
+
+    return background
+
+class Presenter:
+    def __init__(self, window, frame):
+        """
+        Shows frames drawn at the render scale in the window
+
+        A frame the size of the window is the window itself and goes out
+        as is. Any other frame is scaled to the largest size with the same
+        aspect ratio that fits, centred with black bars.
+
+        Args:
+            window: Display surface (or any surface frames are shown on)
+            frame: Surface the game draws on
+        """
+        self.window = window
+        self.frame = frame
+        self.scaled = frame is not window
+        self.target = None
+        if self.scaled:
+            window_width, window_height = window.get_size()
+            width, height = frame.get_size()
+            fit = min(window_width / width, window_height / height)
+            size = (round(width * fit), round(height * fit))
+            window.fill(BLACK)
+            self.target = window.subsurface(pygame.Rect(((window_width - size[0]) // 2, (window_height - size[1]) // 2), size))
+
+    def present(self, changed=None):
+        """
+        Show the frame
+
+        Args:
+            changed: Rects of the frame that changed, or None for all of it.
+                Scaled frames are always presented whole.
+        """
+        if self.scaled:
+            pygame.transform.scale(self.frame, self.target.get_size(), self.target)
+            changed = None
+
+        if self.window is not pygame.display.get_surface():
+            pass  # Off-screen (see export.py): nothing to show
+        elif changed is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(changed)
+
+class DirtyRects:
+    def __init__(self):
+        """
+        Tracks the screen regions drawn this frame and last frame
+
+        Everything drawn in a frame must be marked so the next frame can
+        restore the background underneath it.
+        """
+        self.previous = []
+        self.current = []
+
+    def mark(self, rect):
+        """Record a region drawn this frame (None is ignored)"""
+        if rect:
+            self.current.append(pygame.Rect(rect))
+
+    def restore(self, surface, background):
+        """Paint the background over everything drawn last frame"""
+        for rect in self.previous:
+            surface.blit(background, rect, rect)
+
+    def flush(self):
+        """Return the regions that changed on screen and start a new frame"""
+        changed = self.previous + self.current
+        self.previous = self.current
+        self.current = []
+        return changed
+
+    def reset(self):
+        self.previous = []
+        self.current = []
+
+class FrameTimer:
+    def __init__(self):
+        """Accumulates draw time per rendering mode for comparison"""
+        self.totals = {}
+        self.start = 0.0
+
+    def begin(self):
+        self.start = time.perf_counter()
+
+    def end(self, mode):
+        total = self.totals.setdefault(mode, [0.0, 0])
+        total[0] += time.perf_counter() - self.start
+        total[1] += 1
+
+    def average_ms(self, mode):
+        seconds, frames = self.totals.get(mode, (0.0, 0))
+        return seconds / frames * 1000 if frames else None
+
+    def report(self):
+        """One line per mode with its average frame time"""
+        lines = []
+        for mode, (seconds, frames) in sorted(self.totals.items()):
+            lines.append(f"{mode:>6}: {seconds / frames * 1000:.3f} ms/frame over {frames} frames")
+        return "\n".join(lines)
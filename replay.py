@@ -0,0 +1,162 @@
+# replay.py - Recording matches as per-frame input bitmasks and playing them back
+#
+# A replay is two files:
+#   <name>.sfr       header followed by two input bytes (player 1, player 2) per
+#                    frame, appended while recording; frame f lives at a fixed
+#                    offset so playback can memory-map the file
+#   <name>.sfr.snap  periodic Simulation snapshots, each stored as
+#                    (frame, length, blob), used to seek without replaying
+#                    the match from the start
+
+import bisect
+import mmap
+import os
+import struct
+
+from simulation import Simulation, PLAYER_MODES
+
+# Bit order of the controls in an input byte
+CONTROL_ACTIONS = ("left", "right", "punch", "kick", "block", "special")
+
+MAGIC = b"SFRP"
+VERSION = 5
+HEADER = struct.Struct("<4sHBxIQ")  # magic, version, game mode, snapshot interval, seed
+SNAPSHOT_HEADER = struct.Struct("<II")  # frame, blob length
+FRAME_SIZE = 2
+
+GAME_MODES = tuple(PLAYER_MODES)
+
+# Every possible input byte decoded once
+DECODED = tuple(
+    frozenset(action for bit, action in enumerate(CONTROL_ACTIONS) if mask & (1 << bit))
+    for mask in range(1 << len(CONTROL_ACTIONS))
+)
+
+def encode_actions(actions):
+    """Pack a collection of control names into an input bitmask"""
+    mask = 0
+    if actions:
+        for bit, action in enumerate(CONTROL_ACTIONS):
+            if action in actions:
+                mask |= 1 << bit
+    return mask
+
+def decode_actions(mask):
+    """Unpack an input bitmask into a frozenset of control names"""
+    return DECODED[mask]
+
+class ReplayRecorder:
+    def __init__(self, path, sim, snapshot_interval=600):
+        """
+        Append the inputs of the match sim is about to play to a replay file
+
+        Attach with sim.recorder = recorder right after sim.reset().
+
+        Args:
+            path: Replay file to create (the snapshot file is path + ".snap")
+            sim: Simulation being recorded
+            snapshot_interval: Frames between state snapshots (600 = 10 seconds)
+        """
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self.frames = 0
+
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, GAME_MODES.index(sim.game_mode),
+                                    snapshot_interval, sim.seed))
+        self.snapshots = open(path + ".snap", "wb")
+
+    def record(self, sim, actions):
+        """Called by Simulation.step with the inputs for sim.frame before it is played"""
+        if sim.frame % self.snapshot_interval == 0:
+            blob = sim.snapshot()
+            self.snapshots.write(SNAPSHOT_HEADER.pack(sim.frame, len(blob)))
+            self.snapshots.write(blob)
+
+        self.file.write(bytes((encode_actions(actions[0]), encode_actions(actions[1]))))
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+        self.snapshots.close()
+
+class ReplayPlayer:
+    def __init__(self, path):
+        """
+        Play a recorded match back through a fresh Simulation
+
+        Args:
+            path: Replay file written by ReplayRecorder
+        """
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, mode, self.snapshot_interval, self.seed = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+        self.game_mode = GAME_MODES[mode]
+        self.frame_count = (len(self.data) - HEADER.size) // FRAME_SIZE
+
+        self.load_snapshots(path + ".snap")
+        self.sim = Simulation(self.game_mode, seed=self.seed)
+
+    def load_snapshots(self, path):
+        """Index the snapshot file by frame without reading the snapshots"""
+        self.snapshot_frames = []
+        self.snapshot_offsets = []
+        self.snapshot_data = None
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+
+        with open(path, "rb") as f:
+            self.snapshot_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        offset = 0
+        while offset + SNAPSHOT_HEADER.size <= len(self.snapshot_data):
+            frame, length = SNAPSHOT_HEADER.unpack_from(self.snapshot_data, offset)
+            offset += SNAPSHOT_HEADER.size
+            if offset + length > len(self.snapshot_data):
+                break  # Truncated by an interrupted recording
+            self.snapshot_frames.append(frame)
+            self.snapshot_offsets.append((offset, length))
+            offset += length
+
+    @property
+    def frame(self):
+        return self.sim.frame
+
+    @property
+    def finished(self):
+        return self.sim.over or self.sim.frame >= self.frame_count
+
+    def inputs(self, frame):
+        """Decoded (player 1, player 2) inputs for a frame"""
+        offset = HEADER.size + frame * FRAME_SIZE
+        return DECODED[self.data[offset]], DECODED[self.data[offset + 1]]
+
+    def step(self):
+        """Play the next recorded frame"""
+        if not self.finished:
+            self.sim.step(self.inputs(self.sim.frame))
+
+    def seek(self, frame):
+        """Jump to the state at the start of a frame"""
+        frame = max(0, min(frame, self.frame_count))
+
+        # Restore the closest snapshot unless simply playing on is shorter
+        index = bisect.bisect_right(self.snapshot_frames, frame) - 1
+        if index >= 0:
+            snapshot_frame = self.snapshot_frames[index]
+            if frame < self.sim.frame or snapshot_frame > self.sim.frame:
+                offset, length = self.snapshot_offsets[index]
+                self.sim.restore(self.snapshot_data[offset:offset + length])
+        elif self.sim.frame > frame:
+            self.sim.reset(self.game_mode, self.seed)
+
+        while self.sim.frame < frame and not self.sim.over:
+            self.step()
+
+    def close(self):
+        self.data.close()
+        if self.snapshot_data is not None:
+            self.snapshot_data.close()
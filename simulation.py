@@ -0,0 +1,347 @@
+# simulation.py - Headless match simulation (no window, mixer or clock)
+
+import struct
+
+from pygame.locals import *
+
+from constants import *
+from fighter import Fighter, ACTIONS
+from effects import EffectPool, ParticleSystem
+from collision import CollisionWorld
+
+# Default keyboard controls for each side
+PLAYER1_CONTROLS = {
+    "left": K_a,
+    "right": K_d,
+    "punch": K_r,
+    "kick": K_t,
+    "block": K_y,
+    "special": K_f
+}
+
+PLAYER2_CONTROLS = {
+    "left": K_LEFT,
+    "right": K_RIGHT,
+    "punch": K_COMMA,
+    "kick": K_PERIOD,
+    "block": K_m,
+    "special": K_SLASH
+}
+
+# Which fighters are human controlled in each game mode
+PLAYER_MODES = {
+    "solo": (True, False),
+    "versus": (True, True),
+    "cpu": (False, False)
+}
+
+# Snapshot layout: frame, over, winner, RNG state, effect RNG state, particle bytes
+SNAPSHOT_HEADER = struct.Struct("<I2BQQI")
+WINNERS = (None, "Player 1", "Player 2")
+
+# Snapshot layout of the damage stats: hits and damage of every move, player 1 then player 2
+DAMAGE_STATE = struct.Struct("<" + "Id" * (len(WINNERS[1:]) * len(ACTIONS)))
+
+MASK64 = (1 << 64) - 1
+EFFECTS_SALT = 0x5A17E0F7EC75  # Keeps the effect RNG's stream apart from the match RNG's
+
+class MatchRandom:
+    """
+    Small seedable random number generator (SplitMix64) for match logic
+
+    Provides the parts of the random.Random interface the game uses. Its whole
+    state is one 64-bit integer, so saving and restoring it is nearly free.
+    """
+    __slots__ = ("state",)
+
+    def __init__(self, seed=0):
+        self.seed(seed)
+
+    def seed(self, seed):
+        self.state = seed & MASK64
+
+    def getstate(self):
+        return self.state
+
+    def setstate(self, state):
+        self.state = state
+
+    def next64(self):
+        self.state = z = (self.state + 0x9E3779B97F4A7C15) & MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        return z ^ (z >> 31)
+
+    def random(self):
+        """Float in [0, 1)"""
+        return (self.next64() >> 11) * (1.0 / 9007199254740992)
+
+    def uniform(self, a, b):
+        return a + (b - a) * self.random()
+
+    def randint(self, a, b):
+        """Integer in [a, b], both ends included"""
+        return a + self.next64() % (b - a + 1)
+
+    def choice(self, seq):
+        return seq[self.next64() % len(seq)]
+
+def no_input(fighter):
+    """Input source for a headless human slot: nothing is ever pressed"""
+    return ()
+
+class Simulation:
+    def __init__(self, game_mode="solo", inputs=(no_input, no_input), seed=0, effects=True):
+        """
+        Pure match simulation that steps two fighters frame by frame
+
+        Given the same seed and inputs a match always plays out the same way.
+
+        Args:
+            game_mode: "solo", "versus" or "cpu" (CPU against CPU)
+            inputs: Pair of input sources, one per fighter. Each is called with
+                the fighter and returns the control names held this frame.
+                Fighter.read_keyboard can be passed to use the real keyboard,
+                or a controllers.Controller, which is also told about each reset.
+            seed: Seed for the match's MatchRandom generator
+            effects: Whether hits spawn particle effects into self.particles.
+                Headless runs that never draw can turn them off; effects use
+                their own generator, so the match plays out the same either way.
+        """
+        self.inputs = list(inputs)
+        self.recorder = None  # Optional replay.ReplayRecorder
+        self.spectators = None  # Optional spectate.SpectatorServer
+        self.profiler = None  # Optional profiler.FrameProfiler
+        self.seed = seed
+        self.rng = MatchRandom(seed)
+
+        self.player1 = Fighter(200, SCREEN_HEIGHT - 100, FIGHTER_WIDTH, FIGHTER_HEIGHT, BLUE, PLAYER1_CONTROLS, True, self.rng)
+        self.player2 = Fighter(600, SCREEN_HEIGHT - 100, FIGHTER_WIDTH, FIGHTER_HEIGHT, RED, PLAYER2_CONTROLS, False, self.rng)
+
+        self.particles = ParticleSystem()
+        self.effects = None
+        if effects:
+            self.effects = EffectPool(self.particles, rng=MatchRandom(seed ^ EFFECTS_SALT))
+        self.player1.effects = self.player2.effects = self.effects
+        self.reset(game_mode)
+
+    def reset(self, game_mode=None, seed=None):
+        """Put both fighters back at their starting state and reseed the match"""
+        if game_mode is not None:
+            self.game_mode = game_mode
+        if seed is not None:
+            self.seed = seed
+        self.rng.seed(self.seed)
+        if self.effects is not None:
+            self.effects.rng.seed(self.seed ^ EFFECTS_SALT)
+
+        self.player1.is_player, self.player2.is_player = PLAYER_MODES[self.game_mode]
+
+        # Reset fighter positions and stats
+        self.player1.reset(200)
+        self.player2.reset(600)
+
+        self.frame = 0
+        self.over = False
+        self.winner = None
+        self.particles.clear()
+
+        # Damage landed per move: {"Player 1": {"punch": [hits, damage]}, ...}
+        self.damage = {"Player 1": {}, "Player 2": {}}
+
+        # Controllers (see controllers.py) get to see each new match
+        for player, source in enumerate(self.inputs):
+            reset = getattr(source, "reset", None)
+            if reset is not None:
+                reset(self, player)
+
+    def read_inputs(self):
+        """Collect this frame's control names for both fighters"""
+        return (self.inputs[0](self.player1) if self.player1.is_player else None,
+                self.inputs[1](self.player2) if self.player2.is_player else None)
+
+    def step(self, actions=None):
+        """
+        Advance the match by one frame
+
+        Args:
+            actions: Optional pair of held control collections. When omitted the
+                input sources are polled.
+        """
+        if self.over:
+            return
+
+        if actions is None:
+            actions = self.read_inputs()
+        if self.recorder is not None:
+            self.recorder.record(self, actions)
+        if self.spectators is not None:
+            self.spectators.record(self, actions)
+
+        # Update players, noting any damage each one lands
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start("player1")
+        health = self.player2.health
+        self.player1.update(self.player2, actions[0])
+        if self.player2.health < health:
+            self.record_hit("Player 1", self.player1.action, health - self.player2.health)
+
+        if profiler is not None:
+            profiler.stop("player1")
+            profiler.start("player2")
+        health = self.player1.health
+        self.player2.update(self.player1, actions[1])
+        if self.player1.health < health:
+            self.record_hit("Player 2", self.player2.action, health - self.player1.health)
+
+        # Update particles of every effect in one step
+        if profiler is not None:
+            profiler.stop("player2")
+            profiler.start("particles_update")
+        self.particles.update()
+        if profiler is not None:
+            profiler.stop("particles_update")
+
+        self.frame += 1
+
+        # Check for game over condition
+        if self.player1.health <= 0 or self.player2.health <= 0:
+            self.over = True
+            if self.player1.health <= 0:
+                self.winner = "Player 2"
+            else:
+                self.winner = "Player 1"
+            if self.spectators is not None:
+                self.spectators.flush()
+
+    def snapshot(self):
+        """Return the whole match state (fighters, RNG, particles) as bytes"""
+        particles = self.particles.snapshot()
+        effects = self.effects.rng.state if self.effects is not None else 0
+        return b"".join((
+            SNAPSHOT_HEADER.pack(self.frame, self.over, WINNERS.index(self.winner),
+                                 self.rng.state, effects, len(particles)),
+            self.player1.snapshot(),
+            self.player2.snapshot(),
+            particles,
+            self.damage_snapshot()
+        ))
+
+    def restore(self, blob):
+        """Return to a state produced by snapshot()"""
+        view = memoryview(blob)
+        self.frame, over, winner, self.rng.state, effects, particles = SNAPSHOT_HEADER.unpack_from(view)
+        self.over = bool(over)
+        self.winner = WINNERS[winner]
+        if self.effects is not None:
+            self.effects.rng.state = effects
+        offset = SNAPSHOT_HEADER.size
+
+        size = Fighter.STATE.size
+        self.player1.restore(view[offset:offset + size])
+        self.player2.restore(view[offset + size:offset + 2 * size])
+        offset += 2 * size
+
+        self.particles.restore(view[offset:offset + particles])
+        self.restore_damage(view[offset + particles:])
+
+    def damage_snapshot(self):
+        values = []
+        for player in WINNERS[1:]:
+            moves = self.damage[player]
+            for move in ACTIONS:
+                values.extend(moves.get(move, (0, 0.0)))
+        return DAMAGE_STATE.pack(*values)
+
+    def restore_damage(self, view):
+        values = DAMAGE_STATE.unpack_from(view)
+        self.damage = {}
+        for i, player in enumerate(WINNERS[1:]):
+            base = i * len(ACTIONS) * 2
+            self.damage[player] = {move: [values[base + j * 2], values[base + j * 2 + 1]]
+                                   for j, move in enumerate(ACTIONS) if values[base + j * 2]}
+
+    def record_hit(self, player, move, damage):
+        entry = self.damage[player].setdefault(move, [0, 0.0])
+        entry[0] += 1
+        entry[1] += damage
+
+    def run(self, max_frames):
+        """Step until someone wins or max_frames elapse, returning the winner (or None)"""
+        while not self.over and self.frame < max_frames:
+            self.step()
+        return self.winner
+
+# Colours of free-for-all fighters, in turn
+FFA_COLORS = (BLUE, RED, GREEN, PURPLE, ORANGE, BLACK, YELLOW, GRAY, BROWN, WHITE)
+
+class FreeForAll:
+    def __init__(self, fighters=16, seed=0, special_projectiles=True):
+        """
+        Last fighter standing among any number of CPU fighters
+
+        Hits are found by a collision.CollisionWorld after every fighter has
+        moved, so all hits of a frame land together.
+
+        Args:
+            fighters: Number of fighters, spread evenly across the arena
+            seed: Seed for the match's MatchRandom generator
+            special_projectiles: Whether starting a special also fires a projectile
+        """
+        self.seed = seed
+        self.rng = MatchRandom(seed)
+        self.special_projectiles = special_projectiles
+        self.world = CollisionWorld()
+
+        margin = FIGHTER_WIDTH
+        spacing = (SCREEN_WIDTH - 2 * margin) / max(1, fighters - 1)
+        for i in range(fighters):
+            x = round(margin + i * spacing)
+            self.world.add_fighter(Fighter(x, SCREEN_HEIGHT - 100, FIGHTER_WIDTH, FIGHTER_HEIGHT,
+                                           FFA_COLORS[i % len(FFA_COLORS)], {}, False, self.rng))
+
+        self.frame = 0
+        self.over = False
+        self.winner = None  # Index of the last fighter standing
+
+    @property
+    def fighters(self):
+        return self.world.fighters
+
+    def nearest_opponent(self, fighter):
+        """The closest other fighter still standing"""
+        nearest = None
+        for other in self.fighters:
+            if other is not fighter and other.health > 0:
+                if nearest is None or abs(other.x - fighter.x) < abs(nearest.x - fighter.x):
+                    nearest = other
+        return nearest
+
+    def step(self):
+        if self.over:
+            return
+
+        for fighter in self.fighters:
+            if fighter.health <= 0:
+                continue
+            fighter.advance(self.nearest_opponent(fighter))
+            if (self.special_projectiles and fighter.action == "special"
+                    and fighter.action_time == 0):
+                self.world.fire(fighter, damage=DAMAGE["special"] / 2)
+
+        self.world.update_projectiles()
+        self.world.resolve()
+        self.world.remove_dead()
+        self.frame += 1
+
+        standing = [i for i, fighter in enumerate(self.fighters) if fighter.health > 0]
+        if len(standing) <= 1:
+            self.over = True
+            self.winner = standing[0] if standing else None
+
+    def run(self, max_frames):
+        """Step until one fighter is left or max_frames elapse, returning the winner's index"""
+        while not self.over and self.frame < max_frames:
+            self.step()
+        return self.winner
@@ -0,0 +1,325 @@
+# spectate.py - Broadcasting a live match to spectators as an input stream
+#
+# The server sends each viewer the match settings, the newest state snapshot
+# and then the per-frame input bytes; viewers resimulate the match with the
+# same engine. A viewer that falls too far behind is skipped ahead with a fresh
+# snapshot instead of letting its queue grow without bound.
+#
+# Watch a match broadcast by "main.py --broadcast 7300" headlessly:
+#   python spectate.py 127.0.0.1:7300
+
+import argparse
+import asyncio
+import collections
+import struct
+import sys
+import threading
+import time
+
+from replay import encode_actions, decode_actions, GAME_MODES
+from simulation import Simulation
+
+# Message framing: type, payload length
+MESSAGE_HEADER = struct.Struct("<BI")
+MSG_START = 1  # game mode, seed
+MSG_SNAPSHOT = 2  # Simulation.snapshot() of the state at the start of a frame
+MSG_INPUTS = 3  # first frame, then two input bytes per frame
+
+START = struct.Struct("<BQ")
+INPUTS_HEADER = struct.Struct("<I")
+
+def message(kind, payload):
+    return MESSAGE_HEADER.pack(kind, len(payload)) + payload
+
+class Viewer:
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.address = writer.get_extra_info("peername")
+        self.task = asyncio.current_task()
+        self.queue = asyncio.Queue(queue_size)
+        self.needs_snapshot = True
+        self.bytes_sent = 0
+        self.connected_at = time.perf_counter()
+        self.disconnected_at = None
+        self.latencies = collections.deque(maxlen=600)
+        self.skips = 0
+
+class SpectatorServer:
+    def __init__(self, host="0.0.0.0", port=7300, snapshot_interval=300, queue_size=120,
+                 batch_frames=1):
+        """
+        Streams a running Simulation's inputs to any number of viewers
+
+        The server runs its own asyncio loop in a background thread. The game
+        thread calls start_match() after each sim.reset() and attaches the
+        server with sim.spectators = server so every step is broadcast.
+
+        Args:
+            host, port: Address to listen on
+            snapshot_interval: Frames between the snapshots kept for late joiners
+            queue_size: Messages a viewer may have queued before it is skipped
+                ahead to the next snapshot (per-viewer backpressure)
+            batch_frames: Frames of input gathered into each message
+        """
+        self.host = host
+        self.port = port
+        self.snapshot_interval = snapshot_interval
+        self.queue_size = queue_size
+        self.batch_frames = batch_frames
+
+        self.viewers = set()
+        self.departed = collections.deque(maxlen=100)  # Viewers that have disconnected, for stats()
+        self.loop = None
+        self.thread = None
+        self.ready = threading.Event()
+
+        # Current match: start message, latest snapshot and the inputs since it
+        self.start_message = None
+        self.snapshot_message = None
+        self.snapshot_frame = 0
+        self.inputs_since_snapshot = bytearray()
+        self.pending = bytearray()
+        self.pending_frame = 0
+
+    def start(self):
+        """Run the server in a daemon thread"""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        server = self.loop.run_until_complete(asyncio.start_server(self.serve_viewer, self.host, self.port))
+        self.port = server.sockets[0].getsockname()[1]
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            server.close()
+            tasks = [viewer.task for viewer in self.viewers]
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.run_until_complete(server.wait_closed())
+            self.loop.close()
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+
+    # Called from the game thread
+
+    def start_match(self, sim):
+        """Announce a new match; call after sim.reset()"""
+        self.flush()
+        start = message(MSG_START, START.pack(GAME_MODES.index(sim.game_mode), sim.seed))
+        snapshot = message(MSG_SNAPSHOT, sim.snapshot())
+        self.loop.call_soon_threadsafe(self.new_match, start, snapshot, sim.frame)
+
+    def record(self, sim, actions):
+        """Called by Simulation.step with the inputs for sim.frame before it is played"""
+        frame = sim.frame
+        if not self.pending:
+            self.pending_frame = frame
+        self.pending += bytes((encode_actions(actions[0]), encode_actions(actions[1])))
+
+        snapshot = sim.snapshot() if frame and frame % self.snapshot_interval == 0 else None
+        if len(self.pending) >= 2 * self.batch_frames or snapshot is not None:
+            self.flush(snapshot and message(MSG_SNAPSHOT, snapshot), frame)
+
+    def flush(self, snapshot=None, frame=None):
+        """
+        Send the inputs batched so far; Simulation.step calls this when the
+        match ends so viewers see its last frames
+        """
+        if not self.pending:
+            return
+        inputs = message(MSG_INPUTS, INPUTS_HEADER.pack(self.pending_frame) + bytes(self.pending))
+        self.pending.clear()
+        self.loop.call_soon_threadsafe(self.broadcast, inputs, time.perf_counter(), snapshot, frame)
+
+    # Run on the server loop
+
+    def new_match(self, start, snapshot, frame):
+        self.start_message = start
+        self.snapshot_message = snapshot
+        self.snapshot_frame = frame
+        self.inputs_since_snapshot = bytearray()
+        for viewer in self.viewers:
+            viewer.needs_snapshot = True
+            self.drain(viewer)
+            self.enqueue(viewer, start + snapshot, time.perf_counter())
+            viewer.needs_snapshot = False
+
+    def broadcast(self, inputs, pushed_at, snapshot, frame):
+        """Fan one input message out to every viewer"""
+        if self.start_message is None:
+            return
+
+        if snapshot is not None:
+            # The new snapshot is the state before the frame that triggered it,
+            # so it comes before that frame's inputs
+            before, after = split_inputs(inputs, frame)
+            for viewer in self.viewers:
+                if not viewer.needs_snapshot and before:
+                    self.enqueue(viewer, before, pushed_at)
+            self.snapshot_message = snapshot
+            self.snapshot_frame = frame
+            self.inputs_since_snapshot = bytearray(after)
+            inputs = after
+        else:
+            self.inputs_since_snapshot += inputs
+
+        for viewer in list(self.viewers):
+            if viewer.needs_snapshot:
+                if snapshot is None:
+                    continue
+                # Skipped viewers rejoin at the new snapshot
+                self.drain(viewer)
+                viewer.needs_snapshot = False
+                self.enqueue(viewer, self.start_message + snapshot, pushed_at)
+            if inputs:
+                self.enqueue(viewer, inputs, pushed_at)
+
+    def enqueue(self, viewer, data, pushed_at):
+        try:
+            viewer.queue.put_nowait((data, pushed_at))
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop its backlog and catch it up at the next snapshot
+            viewer.skips += 1
+            viewer.needs_snapshot = True
+            self.drain(viewer)
+
+    @staticmethod
+    def drain(viewer):
+        while not viewer.queue.empty():
+            viewer.queue.get_nowait()
+
+    async def serve_viewer(self, reader, writer):
+        viewer = Viewer(writer, self.queue_size)
+        self.viewers.add(viewer)
+
+        # Late joiners start from the latest snapshot plus the inputs since
+        if self.start_message is not None:
+            catch_up = self.start_message + self.snapshot_message
+            if self.inputs_since_snapshot:
+                catch_up += bytes(self.inputs_since_snapshot)
+            self.enqueue(viewer, catch_up, time.perf_counter())
+            viewer.needs_snapshot = False
+
+        try:
+            while True:
+                data, pushed_at = await viewer.queue.get()
+                writer.write(data)
+                await writer.drain()
+                viewer.bytes_sent += len(data)
+                viewer.latencies.append(time.perf_counter() - pushed_at)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.viewers.discard(viewer)
+            viewer.disconnected_at = time.perf_counter()
+            self.departed.append(viewer)
+            writer.close()
+
+    def stats(self):
+        """Fan-out latency and bandwidth for every viewer, connected or recently departed"""
+        now = time.perf_counter()
+        viewers = []
+        for viewer in list(self.departed) + list(self.viewers):
+            latencies = sorted(viewer.latencies)
+            elapsed = max((viewer.disconnected_at or now) - viewer.connected_at, 1e-9)
+            viewers.append({
+                "address": viewer.address,
+                "connected": viewer.disconnected_at is None,
+                "bytes_per_second": viewer.bytes_sent / elapsed,
+                "latency_ms_p50": latencies[len(latencies) // 2] * 1000 if latencies else None,
+                "latency_ms_max": latencies[-1] * 1000 if latencies else None,
+                "queue_depth": viewer.queue.qsize(),
+                "skips": viewer.skips
+            })
+        return {"viewers": len(self.viewers), "per_viewer": viewers}
+
+    def report(self):
+        """One line per viewer with its bandwidth and fan-out latency"""
+        stats = self.stats()["per_viewer"]
+        if not stats:
+            return "spectators: none connected"
+        lines = [f"spectators: {len(stats)} viewers"]
+        for viewer in stats:
+            address = ":".join(map(str, viewer["address"][:2])) if viewer["address"] else "?"
+            latency = (f"{viewer['latency_ms_p50']:.2f} ms p50, {viewer['latency_ms_max']:.2f} ms max"
+                       if viewer["latency_ms_p50"] is not None else "no messages")
+            lines.append(f"  {address}: {viewer['bytes_per_second'] / 1024:.2f} KiB/s, {latency}, "
+                         f"{viewer['skips']} skips")
+        return "\n".join(lines)
+
+def split_inputs(inputs, frame):
+    """Split an MSG_INPUTS message into the frames before and from frame on"""
+    payload = inputs[MESSAGE_HEADER.size:]
+    first = INPUTS_HEADER.unpack_from(payload)[0]
+    data = payload[INPUTS_HEADER.size:]
+    cut = (frame - first) * 2
+    before = message(MSG_INPUTS, INPUTS_HEADER.pack(first) + data[:cut]) if cut > 0 else b""
+    after = message(MSG_INPUTS, INPUTS_HEADER.pack(frame) + data[cut:]) if cut < len(data) else b""
+    return before, after
+
+class SpectatorClient:
+    def __init__(self):
+        """Rebuilds a broadcast match locally from the message stream"""
+        self.sim = None
+        self.bytes_received = 0
+
+    def handle(self, kind, payload):
+        self.bytes_received += MESSAGE_HEADER.size + len(payload)
+        if kind == MSG_START:
+            mode, seed = START.unpack(payload)
+            self.sim = Simulation(GAME_MODES[mode], seed=seed)
+        elif kind == MSG_SNAPSHOT:
+            self.sim.restore(payload)
+        elif kind == MSG_INPUTS:
+            first = INPUTS_HEADER.unpack_from(payload)[0]
+            data = payload[INPUTS_HEADER.size:]
+            for i in range(0, len(data), 2):
+                if first + i // 2 == self.sim.frame:
+                    self.sim.step((decode_actions(data[i]), decode_actions(data[i + 1])))
+
+    async def watch(self, host, port, on_frame=None):
+        """Follow a broadcast until it ends, calling on_frame(sim) after each message"""
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while True:
+                header = await reader.readexactly(MESSAGE_HEADER.size)
+                kind, length = MESSAGE_HEADER.unpack(header)
+                self.handle(kind, await reader.readexactly(length))
+                if on_frame is not None and self.sim is not None:
+                    on_frame(self.sim)
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch a broadcast match headlessly")
+    parser.add_argument("server", metavar="HOST:PORT")
+    args = parser.parse_args(argv)
+
+    host, port = args.server.rsplit(":", 1)
+    client = SpectatorClient()
+    last = [0.0]
+
+    def report(sim):
+        now = time.perf_counter()
+        if now - last[0] >= 1.0:
+            last[0] = now
+            print(f"frame {sim.frame}: P1 {sim.player1.health:.0f} HP, P2 {sim.player2.health:.0f} HP, "
+                  f"{client.bytes_received} bytes received")
+
+    asyncio.run(client.watch(host, int(port), report))
+    if client.sim is not None:
+        print(f"final frame {client.sim.frame}, winner {client.sim.winner}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,388 +1,431 @@
 # stickman.py - Stickman drawing functions
+#
+# Poses are built once per fighter height into a Skeleton: each pose is a list
+# of joints, stored as integer offsets from the stickman's position, and a list
+# of drawing operations on those joints in painting order. Limb ends come from
+# a table of precomputed unit vectors and are truncated exactly as the original
+# per-call trigonometry was, so drawing a pose is a few additions per joint and
+# the result is pixel for pixel the same.
 
 import pygame
 import math
 import random
+from collections import OrderedDict
+import numpy as np
 from constants import *
 
-def draw_stickman(surface, x, y, width, height, color, action, direction, special=False):
-    """
-    Draw a stickman figure with different poses based on action
-    
-    Args:
-        surface: pygame surface to draw on
-        x, y: position of the stickman
-        width, height: dimensions of the stickman
-        color: RGB color tuple for the stickman
-        action: string indicating the action ("idle", "punch", "kick", "block", "special")
-        direction: string indicating the direction ("left" or "right")
-        special: boolean indicating if special effects should be shown
-    """
-    # Scale factors
-    head_radius = int(height * 0.15)
-    torso_length = int(height * 0.3)
-    arm_length = int(height * 0.25)
-    leg_length = int(height * 0.4)
-    
-    # Head position
-    head_x = x
-    head_y = y + head_radius
-    
-    # Base positions
-    shoulder_y = head_y + head_radius
-    hip_y = shoulder_y + torso_length
+# Actions and directions with a pose, in pose table order
+POSE_ACTIONS = ("idle", "punch", "kick", "block", "special")
+POSE_DIRECTIONS = ("left", "right")
+
+# Unit vectors (cos, sin) of every limb angle the poses use, in degrees
+LIMB_ANGLES = (-30, -10, 0, 20, 30, 45, 60, 70, 80, 100, 110, 120, 135, 150, 160, 180, 190, 210)
+UNIT = {angle: (math.cos(math.radians(angle)), math.sin(math.radians(angle))) for angle in LIMB_ANGLES}
+
+# Blocking shrinks the torso by scaling the absolute hip height
+CROUCH = 0.9
+
+# Block shield arc
+SHIELD_START = math.radians(60)
+SHIELD_STOP = math.radians(300)
+
+FLAME_COLORS = (RED, ORANGE, YELLOW)
+
+# Drawing operations of a pose
+LINE = 0     # (LINE, joint, joint, width)
+CIRCLE = 1   # (CIRCLE, joint, radius, color or None for the body color)
+MOUTH = 2    # (MOUTH, left joint, right joint, mouth width)
+SPARKS = 3   # (SPARKS, joint, x sign, color): only with special
+FLAMES = 4   # (FLAMES, joint): only with special
+SHIELD = 5   # (SHIELD, joint): only with special
+POLYLINE = 6  # (POLYLINE, first joint, last joint + 1, width): a bent limb through consecutive joints
+
+class Pose:
+    __slots__ = ("joints", "ops", "offsets", "crouched", "scale")
     
-    # Draw different poses based on action
-    if action == "idle":
-        # Head
-        pygame.draw.circle(surface, color, (head_x, head_y), head_radius)
-        
-        # Torso
-        pygame.draw.line(surface, color, (head_x, shoulder_y), (head_x, hip_y), 3)
-        
-        # Arms
-        arm_angle = 20 if direction == "right" else 160
-        r_arm_x = head_x + int(arm_length * math.cos(math.radians(arm_angle)))
-        r_arm_y = shoulder_y + int(arm_length * math.sin(math.radians(arm_angle)))
-        
-        l_arm_angle = 160 if direction == "right" else 20
-        l_arm_x = head_x + int(arm_length * math.cos(math.radians(l_arm_angle)))
-        l_arm_y = shoulder_y + int(arm_length * math.sin(math.radians(l_arm_angle)))
-        
-        pygame.draw.line(surface, color, (head_x, shoulder_y), (r_arm_x, r_arm_y), 2)
-        pygame.draw.line(surface, color, (head_x, shoulder_y), (l_arm_x, l_arm_y), 2)
-        
-        # Legs
-        r_leg_x = head_x + int(leg_length * 0.5 * math.cos(math.radians(120)))
-        r_leg_y = hip_y + int(leg_length * 0.5 * math.sin(math.radians(120)))
+    def __init__(self, scale=1.0):
+        """
+        Joints as (dx, dy, crouched) offsets and drawing operations on them
         
-        l_leg_x = head_x + int(leg_length * 0.5 * math.cos(math.radians(60)))
-        l_leg_y = hip_y + int(leg_length * 0.5 * math.sin(math.radians(60)))
+        Args:
+            scale: Render scale the pose was built at; special effects are
+                drawn at this size
+        """
+        self.joints = []
+        self.ops = []
+        self.scale = scale
         
-        pygame.draw.line(surface, color, (head_x, hip_y), (r_leg_x, r_leg_y), 2)
-        pygame.draw.line(surface, color, (head_x, hip_y), (l_leg_x, l_leg_y), 2)
+        # Filled in by finish(): (dx, dy) of each joint and whether any is crouched
+        self.offsets = ()
+        self.crouched = False
     
-    elif action == "punch":
-        # Head
-        pygame.draw.circle(surface, color, (head_x, head_y), head_radius)
+    def joint(self, dx, dy, crouched=False):
+        """
+        Add a joint and return its index
         
-        # Torso - leaning slightly
-        torso_lean = 5 if direction == "right" else -5
-        pygame.draw.line(surface, color, (head_x, shoulder_y), 
-                         (head_x + torso_lean, hip_y), 3)
+        Args:
+            dx, dy: Offset from the stickman's position
+            crouched: dy is relative to the crouched hip height instead of y
+        """
+        self.joints.append((dx, dy, crouched))
+        return len(self.joints) - 1
+    
+    def limb(self, start, length, angle, width=None, origin=None):
+        """
+        Add the joint at the end of a limb, and a line to it when width is given
         
-        # Arms - one extended for punch
-        if direction == "right":
-            # Back arm
-            l_arm_angle = 190
-            l_arm_x = head_x + int(arm_length * 0.8 * math.cos(math.radians(l_arm_angle)))
-            l_arm_y = shoulder_y + int(arm_length * 0.8 * math.sin(math.radians(l_arm_angle)))
-            pygame.draw.line(surface, color, (head_x, shoulder_y), (l_arm_x, l_arm_y), 2)
-            
-            # Punching arm - extended
-            r_arm_angle = 0
-            r_arm_length = arm_length * 1.3  # Extended for punch
-            r_arm_x = head_x + int(r_arm_length * math.cos(math.radians(r_arm_angle)))
-            r_arm_y = shoulder_y + int(r_arm_length * math.sin(math.radians(r_arm_angle)))
-            pygame.draw.line(surface, color, (head_x, shoulder_y), (r_arm_x, r_arm_y), 3)
-            
-            # Draw fist
-            pygame.draw.circle(surface, color, (r_arm_x, r_arm_y), 5)
-            
-            # Show punch effect
-            if special:
-                for i in range(3):
-                    offset = random.randint(5, 15)
-                    pygame.draw.circle(surface, YELLOW, 
-                                      (r_arm_x + offset, r_arm_y + random.randint(-5, 5)), 
-                                      random.randint(3, 8))
-        else:  # Left direction
-            # Back arm
-            r_arm_angle = -10
-            r_arm_x = head_x + int(arm_length * 0.8 * math.cos(math.radians(r_arm_angle)))
-            r_arm_y = shoulder_y + int(arm_length * 0.8 * math.sin(math.radians(r_arm_angle)))
-            pygame.draw.line(surface, color, (head_x, shoulder_y), (r_arm_x, r_arm_y), 2)
-            
-            # Punching arm - extended
-            l_arm_angle = 180
-            l_arm_length = arm_length * 1.3  # Extended for punch
-            l_arm_x = head_x + int(l_arm_length * math.cos(math.radians(l_arm_angle)))
-            l_arm_y = shoulder_y + int(l_arm_length * math.sin(math.radians(l_arm_angle)))
-            pygame.draw.line(surface, color, (head_x, shoulder_y), (l_arm_x, l_arm_y), 3)
-            
-            # Draw fist
-            pygame.draw.circle(surface, color, (l_arm_x, l_arm_y), 5)
-            
-            # Show punch effect
-            if special:
-                for i in range(3):
-                    offset = random.randint(5, 15)
-                    pygame.draw.circle(surface, YELLOW, 
-                                      (l_arm_x - offset, l_arm_y + random.randint(-5, 5)), 
-                                      random.randint(3, 8))
+        Args:
+            start: Joint the line is drawn from
+            length: Limb length in pixels
+            angle: Limb angle in degrees (a key of UNIT)
+            width: Line width, or None to add only the joint
+            origin: Joint the offset is measured from (start when None)
+        """
+        dx, dy, crouched = self.joints[start if origin is None else origin]
+        cos, sin = UNIT[angle]
+        end = self.joint(dx + int(length * cos), dy + int(length * sin), crouched)
+        if width is not None:
+            self.line(start, end, width)
+        return end
+    
+    def line(self, start, end, width):
+        self.ops.append((LINE, start, end, width))
+    
+    def finish(self):
+        self.offsets = tuple((dx, dy) for dx, dy, crouched in self.joints)
+        self.crouched = any(crouched for dx, dy, crouched in self.joints)
+        self.ops = tuple(self.ops)
+        return self
+    
+    def circle(self, joint, radius, color=None):
+        self.ops.append((CIRCLE, joint, radius, color))
+
+class Skeleton:
+    def __init__(self, height):
+        """
+        Every pose for one stickman height
         
-        # Legs - slightly bent for stability
-        r_leg_x = head_x + int(leg_length * 0.5 * math.cos(math.radians(110)))
-        r_leg_y = hip_y + int(leg_length * 0.5 * math.sin(math.radians(110)))
+        Args:
+            height: Fighter height in pixels
+        """
+        self.height = height
+        self.head_radius = int(height * 0.15)
+        self.torso_length = int(height * 0.3)
+        self.arm_length = int(height * 0.25)
+        self.leg_length = int(height * 0.4)
+        self.hip = self.head_radius * 2 + self.torso_length  # Hip offset from y
         
-        l_leg_x = head_x + int(leg_length * 0.5 * math.cos(math.radians(70)))
-        l_leg_y = hip_y + int(leg_length * 0.5 * math.sin(math.radians(70)))
+        self.poses = {}
+        for action in POSE_ACTIONS:
+            for direction in POSE_DIRECTIONS:
+                self.poses[action, direction] = self.build(action, direction)
         
-        pygame.draw.line(surface, color, (head_x + torso_lean, hip_y), (r_leg_x, r_leg_y), 2)
-        pygame.draw.line(surface, color, (head_x + torso_lean, hip_y), (l_leg_x, l_leg_y), 2)
+        # All poses' joints padded to one array for pose_joints()
+        self.pose_index = {key: i for i, key in enumerate(self.poses)}
+        joint_count = max(len(pose.joints) for pose in self.poses.values())
+        self.joint_table = np.zeros((len(self.poses), joint_count, 3))
+        for i, pose in enumerate(self.poses.values()):
+            self.joint_table[i, :len(pose.joints)] = pose.joints
     
-    elif action == "kick":
-        # Head
-        pygame.draw.circle(surface, color, (head_x, head_y), head_radius)
+    def build(self, action, direction):
+        """The joints and drawing operations of one pose"""
+        head_radius = self.head_radius
+        arm_length = self.arm_length
+        leg_length = self.leg_length
+        right = direction == "right"
         
-        # Torso - leaning for kick
-        torso_lean = 10 if direction == "right" else -10
-        pygame.draw.line(surface, color, (head_x, shoulder_y), 
-                         (head_x + torso_lean, hip_y), 3)
+        pose = Pose()
+        head = pose.joint(0, head_radius)
+        shoulder = pose.joint(0, head_radius * 2)
+        hip = pose.joint(0, self.hip)
         
-        # Arms - balancing
-        if direction == "right":
-            # Back arm
-            l_arm_angle = 150
-            l_arm_x = head_x + int(arm_length * math.cos(math.radians(l_arm_angle)))
-            l_arm_y = shoulder_y + int(arm_length * math.sin(math.radians(l_arm_angle)))
-            pygame.draw.line(surface, color, (head_x, shoulder_y), (l_arm_x, l_arm_y), 2)
+        if action == "idle":
+            pose.circle(head, head_radius)
+            pose.line(shoulder, hip, 3)
             
-            # Front arm
-            r_arm_angle = 45
-            r_arm_x = head_x + int(arm_length * math.cos(math.radians(r_arm_angle)))
-            r_arm_y = shoulder_y + int(arm_length * math.sin(math.radians(r_arm_angle)))
-            pygame.draw.line(surface, color, (head_x, shoulder_y), (r_arm_x, r_arm_y), 2)
+            # Arms
+            pose.limb(shoulder, arm_length, 20 if right else 160, 2)
+            pose.limb(shoulder, arm_length, 160 if right else 20, 2)
             
-            # Kicking leg - extended
-            r_leg_angle = 0
-            r_leg_length = leg_length * 1.3
-            r_leg_x = head_x + torso_lean + int(r_leg_length * math.cos(math.radians(r_leg_angle)))
-            r_leg_y = hip_y + int(r_leg_length * math.sin(math.radians(r_leg_angle)))
-            pygame.draw.line(surface, color, (head_x + torso_lean, hip_y), (r_leg_x, r_leg_y), 3)
+            # Legs
+            pose.limb(hip, leg_length * 0.5, 120, 2)
+            pose.limb(hip, leg_length * 0.5, 60, 2)
+        
+        elif action == "punch":
+            pose.circle(head, head_radius)
             
-            # Standing leg - bent for balance
-            l_leg_angle = 100
-            l_leg_x = head_x + torso_lean + int(leg_length * 0.8 * math.cos(math.radians(l_leg_angle)))
-            l_leg_y = hip_y + int(leg_length * 0.8 * math.sin(math.radians(l_leg_angle)))
-            pygame.draw.line(surface, color, (head_x + torso_lean, hip_y), (l_leg_x, l_leg_y), 2)
+            # Torso - leaning slightly
+            lean_hip = pose.joint(5 if right else -5, self.hip)
+            pose.line(shoulder, lean_hip, 3)
             
-            # Show kick effect
-            if special:
-                for i in range(3):
-                    offset = random.randint(5, 15)
-                    pygame.draw.circle(surface, ORANGE, 
-                                      (r_leg_x + offset, r_leg_y + random.randint(-5, 5)), 
-                                      random.randint(3, 8))
-        else:  # Left direction
-            # Back arm
-            r_arm_angle = 30
-            r_arm_x = head_x + int(arm_length * math.cos(math.radians(r_arm_angle)))
-            r_arm_y = shoulder_y + int(arm_length * math.sin(math.radians(r_arm_angle)))
-            pygame.draw.line(surface, color, (head_x, shoulder_y), (r_arm_x, r_arm_y), 2)
+            # Back arm, then the punching arm extended with a fist
+            pose.limb(shoulder, arm_length * 0.8, 190 if right else -10, 2)
+            fist = pose.limb(shoulder, arm_length * 1.3, 0 if right else 180, 3)
+            pose.circle(fist, 5)
+            pose.ops.append((SPARKS, fist, 1 if right else -1, YELLOW))
             
-            # Front arm
-            l_arm_angle = 135
-            l_arm_x = head_x + int(arm_length * math.cos(math.radians(l_arm_angle)))
-            l_arm_y = shoulder_y + int(arm_length * math.sin(math.radians(l_arm_angle)))
-            pygame.draw.line(surface, color, (head_x, shoulder_y), (l_arm_x, l_arm_y), 2)
+            # Legs - slightly bent for stability, planted under the head
+            pose.limb(lean_hip, leg_length * 0.5, 110, 2, origin=hip)
+            pose.limb(lean_hip, leg_length * 0.5, 70, 2, origin=hip)
+        
+        elif action == "kick":
+            pose.circle(head, head_radius)
             
-            # Kicking leg - extended
-            l_leg_angle = 180
-            l_leg_length = leg_length * 1.3
-            l_leg_x = head_x + torso_lean + int(l_leg_length * math.cos(math.radians(l_leg_angle)))
-            l_leg_y = hip_y + int(l_leg_length * math.sin(math.radians(l_leg_angle)))
-            pygame.draw.line(surface, color, (head_x + torso_lean, hip_y), (l_leg_x, l_leg_y), 3)
+            # Torso - leaning for kick
+            lean_hip = pose.joint(10 if right else -10, self.hip)
+            pose.line(shoulder, lean_hip, 3)
             
-            # Standing leg - bent for balance
-            r_leg_angle = 80
-            r_leg_x = head_x + torso_lean + int(leg_length * 0.8 * math.cos(math.radians(r_leg_angle)))
-            r_leg_y = hip_y + int(leg_length * 0.8 * math.sin(math.radians(r_leg_angle)))
-            pygame.draw.line(surface, color, (head_x + torso_lean, hip_y), (r_leg_x, r_leg_y), 2)
+            # Arms - balancing
+            pose.limb(shoulder, arm_length, 150 if right else 30, 2)
+            pose.limb(shoulder, arm_length, 45 if right else 135, 2)
             
-            # Show kick effect
-            if special:
-                for i in range(3):
-                    offset = random.randint(5, 15)
-                    pygame.draw.circle(surface, ORANGE, 
-                                      (l_leg_x - offset, l_leg_y + random.randint(-5, 5)), 
-                                      random.randint(3, 8))
-    
-    elif action == "block":
-        # Head
-        pygame.draw.circle(surface, color, (head_x, head_y), head_radius)
-        
-        # Torso - slightly crouched
-        torso_shrink = 0.9
-        pygame.draw.line(surface, color, (head_x, shoulder_y), 
-                         (head_x, hip_y * torso_shrink), 3)
+            # Kicking leg extended, standing leg bent for balance
+            foot = pose.limb(lean_hip, leg_length * 1.3, 0 if right else 180, 3)
+            pose.limb(lean_hip, leg_length * 0.8, 100 if right else 80, 2)
+            pose.ops.append((SPARKS, foot, 1 if right else -1, ORANGE))
         
-        # Arms - crossed for blocking
-        if direction == "right":
-            # Arm positions for right-facing block
-            r_arm_angle1 = 45
-            r_arm_x1 = head_x + int(arm_length * 0.6 * math.cos(math.radians(r_arm_angle1)))
-            r_arm_y1 = shoulder_y + int(arm_length * 0.6 * math.sin(math.radians(r_arm_angle1)))
+        elif action == "block":
+            pose.circle(head, head_radius)
             
-            r_arm_angle2 = 100
-            r_arm_x2 = r_arm_x1 + int(arm_length * 0.6 * math.cos(math.radians(r_arm_angle2)))
-            r_arm_y2 = r_arm_y1 + int(arm_length * 0.6 * math.sin(math.radians(r_arm_angle2)))
+            # Torso - slightly crouched
+            crouched_hip = pose.joint(0, 0, True)
+            pose.line(shoulder, crouched_hip, 3)
             
-            l_arm_angle1 = 135
-            l_arm_x1 = head_x + int(arm_length * 0.6 * math.cos(math.radians(l_arm_angle1)))
-            l_arm_y1 = shoulder_y + int(arm_length * 0.6 * math.sin(math.radians(l_arm_angle1)))
+            # Arms - crossed for blocking
+            elbow = pose.limb(shoulder, arm_length * 0.6, 45, 2)
+            pose.limb(elbow, arm_length * 0.6, 100, 3)
+            elbow = pose.limb(shoulder, arm_length * 0.6, 135, 2)
+            pose.limb(elbow, arm_length * 0.6, 80, 3)
             
-            l_arm_angle2 = 80
-            l_arm_x2 = l_arm_x1 + int(arm_length * 0.6 * math.cos(math.radians(l_arm_angle2)))
-            l_arm_y2 = l_arm_y1 + int(arm_length * 0.6 * math.sin(math.radians(l_arm_angle2)))
+            pose.ops.append((SHIELD, pose.joint(30 if right else -30, head_radius * 2)))
             
-        else:  # Left direction
-            # Arm positions for left-facing block
-            l_arm_angle1 = 135
-            l_arm_x1 = head_x + int(arm_length * 0.6 * math.cos(math.radians(l_arm_angle1)))
-            l_arm_y1 = shoulder_y + int(arm_length * 0.6 * math.sin(math.radians(l_arm_angle1)))
+            # Legs - slightly bent
+            pose.limb(crouched_hip, leg_length * 0.5, 110, 2)
+            pose.limb(crouched_hip, leg_length * 0.5, 70, 2)
+        
+        elif action == "special":
+            pose.circle(head, head_radius)
+            pose.ops.append((FLAMES, head))
             
-            l_arm_angle2 = 80
-            l_arm_x2 = l_arm_x1 + int(arm_length * 0.6 * math.cos(math.radians(l_arm_angle2)))
-            l_arm_y2 = l_arm_y1 + int(arm_length * 0.6 * math.sin(math.radians(l_arm_angle2)))
+            # Torso - slightly leaning back
+            lean_hip = pose.joint(-5 if right else 5, self.hip)
+            pose.line(shoulder, lean_hip, 3)
             
-            r_arm_angle1 = 45
-            r_arm_x1 = head_x + int(arm_length * 0.6 * math.cos(math.radians(r_arm_angle1)))
-            r_arm_y1 = shoulder_y + int(arm_length * 0.6 * math.sin(math.radians(r_arm_angle1)))
+            # Arms - both raised up in a power pose
+            elbow = pose.limb(shoulder, arm_length * 0.6, 30, 2)
+            pose.limb(elbow, arm_length * 0.6, -30, 2)
+            elbow = pose.limb(shoulder, arm_length * 0.6, 150, 2)
+            pose.limb(elbow, arm_length * 0.6, 210, 2)
             
-            r_arm_angle2 = 100
-            r_arm_x2 = r_arm_x1 + int(arm_length * 0.6 * math.cos(math.radians(r_arm_angle2)))
-            r_arm_y2 = r_arm_y1 + int(arm_length * 0.6 * math.sin(math.radians(r_arm_angle2)))
-        
-        # Draw arms with thicker lines for blocking
-        pygame.draw.line(surface, color, (head_x, shoulder_y), (r_arm_x1, r_arm_y1), 2)
-        pygame.draw.line(surface, color, (r_arm_x1, r_arm_y1), (r_arm_x2, r_arm_y2), 3)
-        
-        pygame.draw.line(surface, color, (head_x, shoulder_y), (l_arm_x1, l_arm_y1), 2)
-        pygame.draw.line(surface, color, (l_arm_x1, l_arm_y1), (l_arm_x2, l_arm_y2), 3)
-        
-        # Show block effect
-        if special:
-            shield_x = head_x + (30 if direction == "right" else -30)
-            pygame.draw.arc(surface, BLUE, 
-                           (shield_x - 30, shoulder_y - 30, 60, 80),
-                           math.radians(60), math.radians(300), 3)
-        
-        # Legs - slightly bent
-        hip_y = hip_y * torso_shrink
-        r_leg_x = head_x + int(leg_length * 0.5 * math.cos(math.radians(110)))
-        r_leg_y = hip_y + int(leg_length * 0.5 * math.sin(math.radians(110)))
-        
-        l_leg_x = head_x + int(leg_length * 0.5 * math.cos(math.radians(70)))
-        l_leg_y = hip_y + int(leg_length * 0.5 * math.sin(math.radians(70)))
+            # Legs - in an action stance
+            pose.limb(lean_hip, leg_length * 0.5, 120, 2)
+            pose.limb(lean_hip, leg_length * 0.5, 60, 2)
         
-        pygame.draw.line(surface, color, (head_x, hip_y), (r_leg_x, r_leg_y), 2)
-        pygame.draw.line(surface, color, (head_x, hip_y), (l_leg_x, l_leg_y), 2)
+        add_face(pose, head_radius, right)
+        return pose.finish()
     
-    elif action == "special":
-        # A dramatic special move pose
-        # Head
-        pygame.draw.circle(surface, color, (head_x, head_y), head_radius)
-        
-        # Draw flame-like effects around the stickman
-        if special:
+    def points(self, pose, x, y):
+        """Screen positions of a pose's joints for a stickman at (x, y)"""
+        if not pose.crouched:
+            return [(x + dx, y + dy) for dx, dy in pose.offsets]
+        crouched_y = (y + self.hip) * CROUCH
+        return [(x + dx, (crouched_y if crouched else y) + dy) for dx, dy, crouched in pose.joints]
+
+def add_face(pose, head_radius, right, dy=0):
+    """Add eyes and mouth to a pose whose head is centred head_radius + dy pixels down"""
+    # Eyes, drawn far side first
+    eyes_y = dy + head_radius - head_radius // 5
+    left_eye = pose.joint(-(head_radius // 3), eyes_y)
+    right_eye = pose.joint(head_radius // 3, eyes_y)
+    if not right:
+        left_eye, right_eye = right_eye, left_eye
+    pose.circle(left_eye, 2, BLACK)
+    pose.circle(right_eye, 2, BLACK)
+    
+    # Mouth
+    mouth_y = dy + head_radius + head_radius // 3
+    mouth_width = head_radius // 2
+    pose.ops.append((MOUTH, pose.joint(-(mouth_width // 2), mouth_y), pose.joint(mouth_width // 2, mouth_y),
+                     mouth_width))
+
+# Skeletons by fighter height, built on first use
+skeletons = {}
+
+def get_skeleton(height):
+    skeleton = skeletons.get(height)
+    if skeleton is None:
+        skeleton = skeletons[height] = Skeleton(height)
+    return skeleton
+
+def draw_pose(surface, pose, points, color, special):
+    """Run a pose's drawing operations on already placed joints"""
+    line = pygame.draw.line
+    circle = pygame.draw.circle
+    for op in pose.ops:
+        kind = op[0]
+        if kind == LINE:
+            line(surface, color, points[op[1]], points[op[2]], op[3])
+        elif kind == CIRCLE:
+            circle(surface, op[3] or color, points[op[1]], op[2])
+        elif kind == POLYLINE:
+            pygame.draw.lines(surface, color, False, points[op[1]:op[2]], op[3])
+        elif kind == MOUTH:
+            left, left_y = points[op[1]]
+            if special:
+                # Open mouth for special move
+                pygame.draw.ellipse(surface, BLACK, (left, left_y - 2, op[3], op[3] // 2))
+            else:
+                line(surface, BLACK, points[op[1]], points[op[2]], 1)
+        elif not special:
+            continue
+        elif kind == SPARKS:
+            # Show punch or kick effect past the fist or foot
+            x, y = points[op[1]]
+            sign = op[2]
+            scale = pose.scale
+            for i in range(3):
+                offset = random.randint(5, 15)
+                circle(surface, op[3], (x + int(sign * offset * scale), y + int(random.randint(-5, 5) * scale)),
+                       int(random.randint(3, 8) * scale))
+        elif kind == FLAMES:
+            # Flame-like effects around the stickman
+            x, y = points[op[1]]
+            scale = pose.scale
             for i in range(15):
-                flame_x = head_x + random.randint(-30, 30)
-                flame_y = head_y + random.randint(-40, 40)
-                flame_size = random.randint(5, 15)
-                
-                # Create a gradient of colors for the flame effect
-                color_value = random.randint(0, 2)
-                if color_value == 0:
-                    flame_color = RED
-                elif color_value == 1:
-                    flame_color = ORANGE
-                else:
-                    flame_color = YELLOW
-                
-                pygame.draw.circle(surface, flame_color, (flame_x, flame_y), flame_size)
-        
-        # Torso - slightly leaning back
-        torso_lean = -5 if direction == "right" else 5
-        pygame.draw.line(surface, color, (head_x, shoulder_y), 
-                        (head_x + torso_lean, hip_y), 3)
-        
-        # Arms - both raised up in a power pose
-        if direction == "right":
-            r_arm_angle1 = 30
-            r_arm_x1 = head_x + int(arm_length * 0.6 * math.cos(math.radians(r_arm_angle1)))
-            r_arm_y1 = shoulder_y + int(arm_length * 0.6 * math.sin(math.radians(r_arm_angle1)))
-            
-            r_arm_angle2 = -30
-            r_arm_x2 = r_arm_x1 + int(arm_length * 0.6 * math.cos(math.radians(r_arm_angle2)))
-            r_arm_y2 = r_arm_y1 + int(arm_length * 0.6 * math.sin(math.radians(r_arm_angle2)))
-            
-            l_arm_angle1 = 150
-            l_arm_x1 = head_x + int(arm_length * 0.6 * math.cos(math.radians(l_arm_angle1)))
-            l_arm_y1 = shoulder_y + int(arm_length * 0.6 * math.sin(math.radians(l_arm_angle1)))
-            
-            l_arm_angle2 = 210
-            l_arm_x2 = l_arm_x1 + int(arm_length * 0.6 * math.cos(math.radians(l_arm_angle2)))
-            l_arm_y2 = l_arm_y1 + int(arm_length * 0.6 * math.sin(math.radians(l_arm_angle2)))
-        else:
-            l_arm_angle1 = 150
-            l_arm_x1 = head_x + int(arm_length * 0.6 * math.cos(math.radians(l_arm_angle1)))
-            l_arm_y1 = shoulder_y + int(arm_length * 0.6 * math.sin(math.radians(l_arm_angle1)))
-            
-            l_arm_angle2 = 210
-            l_arm_x2 = l_arm_x1 + int(arm_length * 0.6 * math.cos(math.radians(l_arm_angle2)))
-            l_arm_y2 = l_arm_y1 + int(arm_length * 0.6 * math.sin(math.radians(l_arm_angle2)))
-            
-            r_arm_angle1 = 30
-            r_arm_x1 = head_x + int(arm_length * 0.6 * math.cos(math.radians(r_arm_angle1)))
-            r_arm_y1 = shoulder_y + int(arm_length * 0.6 * math.sin(math.radians(r_arm_angle1)))
-            
-            r_arm_angle2 = -30
-            r_arm_x2 = r_arm_x1 + int(arm_length * 0.6 * math.cos(math.radians(r_arm_angle2)))
-            r_arm_y2 = r_arm_y1 + int(arm_length * 0.6 * math.sin(math.radians(r_arm_angle2)))
-        
-        # Draw arms
-        pygame.draw.line(surface, color, (head_x, shoulder_y), (r_arm_x1, r_arm_y1), 2)
-        pygame.draw.line(surface, color, (r_arm_x1, r_arm_y1), (r_arm_x2, r_arm_y2), 2)
-        
-        pygame.draw.line(surface, color, (head_x, shoulder_y), (l_arm_x1, l_arm_y1), 2)
-        pygame.draw.line(surface, color, (l_arm_x1, l_arm_y1), (l_arm_x2, l_arm_y2), 2)
+                flame_x = x + int(random.randint(-30, 30) * scale)
+                flame_y = y + int(random.randint(-40, 40) * scale)
+                flame_size = int(random.randint(5, 15) * scale)
+                circle(surface, FLAME_COLORS[random.randint(0, 2)], (flame_x, flame_y), flame_size)
+        elif kind == SHIELD:
+            x, y = points[op[1]]
+            scale = pose.scale
+            pygame.draw.arc(surface, BLUE, (x - int(30 * scale), y - int(30 * scale), int(60 * scale), int(80 * scale)),
+                            SHIELD_START, SHIELD_STOP, max(1, round(3 * scale)))
+
+def draw_stickman(surface, x, y, width, height, color, action, direction, special=False):
+    """
+    Draw a stickman figure with different poses based on action
+    
+    Args:
+        surface: pygame surface to draw on
+        x, y: position of the stickman
+        width, height: dimensions of the stickman
+        color: RGB color tuple for the stickman
+        action: string indicating the action ("idle", "punch", "kick", "block", "special")
+        direction: string indicating the direction ("left" or "right")
+        special: boolean indicating if special effects should be shown
+    """
+    skeleton = get_skeleton(height)
+    pose = skeleton.poses.get((action, direction)) or skeleton.poses["idle", direction]
+    draw_pose(surface, pose, skeleton.points(pose, x, y), color, special)
+
+def pose_joints(height, x, y, actions, directions):
+    """
+    Joint positions of many stickmen of one height in one NumPy step
+    
+    Args:
+        height: Height shared by the stickmen
+        x, y: Arrays of positions
+        actions, directions: Sequences of each stickman's pose
+    
+    Returns:
+        Array of shape (count, joints, 2). Stickman i uses the first
+        len(pose.joints) rows for its pose; the rest are padding.
+    """
+    skeleton = get_skeleton(height)
+    index = skeleton.pose_index
+    poses = [index.get((action, direction), index["idle", direction])
+             for action, direction in zip(actions, directions)]
+    table = skeleton.joint_table[poses]
+    
+    x = np.asarray(x, dtype=float)[:, None]
+    y = np.asarray(y, dtype=float)[:, None]
+    base = np.where(table[:, :, 2] != 0, (y + skeleton.hip) * CROUCH, y)
+    return np.stack((x + table[:, :, 0], base + table[:, :, 1]), axis=-1)
+
+def draw_stickmen(surface, height, x, y, colors, actions, directions, specials):
+    """Draw many stickmen of one height, placing all their joints with pose_joints()"""
+    skeleton = get_skeleton(height)
+    joints = pose_joints(height, x, y, actions, directions).tolist()
+    for points, color, action, direction, special in zip(joints, colors, actions, directions, specials):
+        pose = skeleton.poses.get((action, direction)) or skeleton.poses["idle", direction]
+        draw_pose(surface, pose, points, color, special)
+
+class PoseCache:
+    def __init__(self, max_poses=128, frame_step=4):
+        """
+        Cache of stickman poses rendered once to off-screen surfaces
         
-        # Legs - in an action stance
-        r_leg_x = head_x + torso_lean + int(leg_length * 0.5 * math.cos(math.radians(120)))
-        r_leg_y = hip_y + int(leg_length * 0.5 * math.sin(math.radians(120)))
+        Args:
+            max_poses: Number of poses kept before the least recently used is evicted
+            frame_step: Animation frames that share one rendering of the random
+                special-move effects
+        """
+        self.max_poses = max_poses
+        self.frame_step = frame_step
+        self.poses = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def draw(self, surface, x, y, width, height, color, action, direction, special=False, frame=0):
+        """Same as draw_stickman, but blits a cached rendering of the pose and returns its rect"""
+        if y < 0:
+            draw_stickman(surface, x, y, width, height, color, action, direction, special)
+            return surface.get_rect()
         
-        l_leg_x = head_x + torso_lean + int(leg_length * 0.5 * math.cos(math.radians(60)))
-        l_leg_y = hip_y + int(leg_length * 0.5 * math.sin(math.radians(60)))
+        # Special effects are random, so they are only reused within a frame bucket.
+        # The block pose depends on absolute y, so y is part of the key as well.
+        key = (action, direction, color, width, height, y, special,
+               frame // self.frame_step if special else 0)
         
-        pygame.draw.line(surface, color, (head_x + torso_lean, hip_y), (r_leg_x, r_leg_y), 2)
-        pygame.draw.line(surface, color, (head_x + torso_lean, hip_y), (l_leg_x, l_leg_y), 2)
-    
-    # Draw eyes in the head
-    eye_offset = 3
-    left_eye_x = head_x - head_radius // 3
-    right_eye_x = head_x + head_radius // 3
-    eyes_y = head_y - head_radius // 5
+        sprite, dx, top = self.sprite(key, lambda: self.render(y, width, height, color, action, direction, special))
+        return surface.blit(sprite, (x + dx, top))
     
-    # Swap eyes based on direction
-    if direction == "left":
-        left_eye_x, right_eye_x = right_eye_x, left_eye_x
+    def sprite(self, key, render):
+        """The (sprite, dx, dy) cached under key, made by calling render() on a miss"""
+        pose = self.poses.get(key)
+        if pose is None:
+            self.misses += 1
+            pose = self.poses[key] = render()
+            if len(self.poses) > self.max_poses:
+                self.poses.popitem(last=False)
+        else:
+            self.hits += 1
+            self.poses.move_to_end(key)
+        return pose
     
-    # Draw eyes
-    pygame.draw.circle(surface, BLACK, (left_eye_x, eyes_y), 2)
-    pygame.draw.circle(surface, BLACK, (right_eye_x, eyes_y), 2)
+    @staticmethod
+    def render(y, width, height, color, action, direction, special):
+        """Render a pose and crop it to the pixels it touches"""
+        origin_x = height * 2
+        canvas = pygame.Surface((height * 4, y + height * 2), pygame.SRCALPHA)
+        draw_stickman(canvas, origin_x, y, width, height, color, action, direction, special)
+        sprite, left, top = crop_sprite(canvas, color)
+        return sprite, left - origin_x, top
     
-    # Draw mouth
-    mouth_y = head_y + head_radius // 3
-    mouth_width = head_radius // 2
+    def clear(self):
+        self.poses.clear()
+
+def crop_sprite(canvas, color):
+    """
+    Copy what was drawn on a transparent canvas into a color-keyed sprite
     
-    if special:
-        # Open mouth for special move
-        pygame.draw.ellipse(surface, BLACK, 
-                           (head_x - mouth_width // 2, mouth_y - 2, 
-                            mouth_width, mouth_width // 2))
-    else:
-        # Normal mouth
-        pygame.draw.line(surface, BLACK, 
-                        (head_x - mouth_width // 2, mouth_y),
-                        (head_x + mouth_width // 2, mouth_y), 1)
+    Returns:
+        (sprite, left, top), the sprite's position on the canvas
+    """
+    # Every drawn pixel is opaque, so a color-keyed copy blits identically
+    # and much faster than per-pixel alpha
+    bounds = canvas.get_bounding_rect()
+    key = (255, 0, 255) if color != (255, 0, 255) else (0, 255, 255)
+    sprite = pygame.Surface(bounds.size)
+    sprite.fill(key)
+    sprite.blit(canvas, (0, 0), bounds)
+    sprite.set_colorkey(key, pygame.RLEACCEL)
+    return sprite, bounds.x, bounds.y
+
+# Pose cache shared by every fighter
+pose_cache = PoseCache()
+
+def draw_stickman_cached(surface, x, y, width, height, color, action, direction, special=False, frame=0):
+    """Draw a stickman through the shared pose cache (see draw_stickman for arguments)"""
+    return pose_cache.draw(surface, x, y, width, height, color, action, direction, special, frame)
@@ -0,0 +1,19 @@
+# conftest.py - Run the tests headless from the repository root
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import pytest
+
+@pytest.fixture(scope="session", autouse=True)
+def pygame_display():
+    """Initialise pygame once with the dummy video driver"""
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    yield
+    pygame.quit()
@@ -0,0 +1,32 @@
+import pygame
+import pytest
+
+from constants import *
+from animation import KEYFRAMES, draw_animated, draw_animated_immediate, frame_cache
+from moves import DURATION
+
+def frame_surfaces():
+    return [pygame.Surface((900, 600)) for i in range(2)]
+
+@pytest.mark.parametrize("scale", (0.5, 1.0, 2.0))
+@pytest.mark.parametrize("action", tuple(KEYFRAMES) + ("unknown",))
+@pytest.mark.parametrize("direction", ("left", "right"))
+def test_cached_frames_match_immediate_drawing(scale, action, direction):
+    for action_time in range(DURATION.get(action, 1) + 1):
+        cached, immediate = frame_surfaces()
+        cached.fill(SKY_BLUE)
+        immediate.fill(SKY_BLUE)
+        drawn = draw_animated(cached, 200, 150, FIGHTER_WIDTH, FIGHTER_HEIGHT, BLUE, action, direction,
+                              action_time, False, scale)
+        bounds = draw_animated_immediate(immediate, 200, 150, FIGHTER_WIDTH, FIGHTER_HEIGHT, BLUE, action,
+                                         direction, action_time, False, scale)
+        assert pygame.image.tobytes(cached, "RGB") == pygame.image.tobytes(immediate, "RGB")
+        assert bounds.contains(drawn)
+
+def test_special_effects_are_reused_per_frame():
+    first, second = frame_surfaces()
+    for surface in (first, second):
+        surface.fill(SKY_BLUE)
+        draw_animated(surface, 300, 200, FIGHTER_WIDTH, FIGHTER_HEIGHT, RED, "special", "left", 5, True)
+    assert pygame.image.tobytes(first, "RGB") == pygame.image.tobytes(second, "RGB")
+    assert len(frame_cache.poses) <= frame_cache.max_poses
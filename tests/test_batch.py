@@ -0,0 +1,39 @@
+import argparse
+import sys
+
+import pytest
+
+import collision
+import constants
+import fighter
+import simulation
+from batch import apply_overrides, parse_override
+
+@pytest.fixture
+def restore_constants():
+    scalars = {module: module.BLOCK_DAMAGE_REDUCTION for module in list(sys.modules.values())
+               if hasattr(module, "BLOCK_DAMAGE_REDUCTION")}
+    damage = dict(constants.DAMAGE)
+    yield
+    for module, value in scalars.items():
+        module.BLOCK_DAMAGE_REDUCTION = value
+    constants.DAMAGE.update(damage)
+
+@pytest.mark.parametrize("text", ["DAMAGE.uppercut=10", "DAMAGE=10", "COMBO_BONUS.kick=1",
+                                  "GRAVITY=2", "DAMAGE.kick=", "DAMAGE.kick=ten"])
+def test_parse_override_rejects(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_override(text)
+
+def test_parse_override():
+    assert parse_override("DAMAGE.kick=10") == ("DAMAGE", "kick", 10.0)
+    assert parse_override("COMBO_BONUS=0.5") == ("COMBO_BONUS", None, 0.5)
+
+def test_scalar_override_reaches_star_importers(restore_constants):
+    apply_overrides([parse_override("BLOCK_DAMAGE_REDUCTION=0.5")])
+    for module in (constants, fighter, simulation, collision):
+        assert module.BLOCK_DAMAGE_REDUCTION == 0.5
+
+def test_table_override_is_shared(restore_constants):
+    apply_overrides([parse_override("DAMAGE.kick=10")])
+    assert fighter.DAMAGE["kick"] == simulation.DAMAGE["kick"] == 10
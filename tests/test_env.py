@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from env import (ACTION_COUNT, BLOCK_BIT, KICK_BIT, LEFT, LEFT_BIT, OBSERVATION_SIZE, PUNCH_BIT, RIGHT,
+                 RIGHT_BIT, SPECIAL_BIT, FightEnv, VecFightEnv, fighter_features)
+from fighter import ACTIONS, DIRECTIONS
+from replay import decode_actions
+from simulation import Simulation
+
+def fighter_state(fighter):
+    return (fighter.x, fighter.health, fighter.energy, fighter.special_meter, ACTIONS.index(fighter.action),
+            fighter.action_time, DIRECTIONS.index(fighter.direction), fighter.blocking,
+            fighter.special_ready, fighter.combo_counter, fighter.combo_timer, fighter.attack_hit)
+
+def vec_state(env, match, player):
+    return tuple(getattr(env, name)[match, player].item() for name in
+                 ("x", "health", "energy", "special_meter", "action", "action_time", "direction",
+                  "blocking", "special_ready", "combo_counter", "combo_timer", "attack_hit"))
+
+def brawl(rng, env):
+    """Input masks that walk the fighters into reach and mostly attack there, with some noise"""
+    shape = (env.num_envs, 2)
+    toward = np.where(env.x < env.x[:, ::-1], RIGHT_BIT, LEFT_BIT)
+    facing = env.direction == np.where(toward == RIGHT_BIT, RIGHT, LEFT)
+    in_reach = facing & (np.abs(env.x - env.x[:, ::-1]) < 80)
+    moves = np.array([PUNCH_BIT, KICK_BIT, KICK_BIT, SPECIAL_BIT, BLOCK_BIT, 0])
+    masks = np.where(in_reach, moves[rng.integers(len(moves), size=shape)], toward)
+    return np.where(rng.random(shape) < 0.1, rng.integers(ACTION_COUNT, size=shape), masks)
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_vec_env_matches_simulation(seed):
+    """Every match of a VecFightEnv plays out as a versus Simulation on the same inputs"""
+    num_envs, frames = 8, 2000
+    env = VecFightEnv(num_envs, max_frames=frames + 1)
+    sims = [Simulation("versus", seed=seed, effects=False) for _ in range(num_envs)]
+    rng = np.random.default_rng(seed)
+    # The first matches start low on health so knockouts and restarts come early
+    env.health[:] = 30
+    for sim in sims:
+        sim.player1.health = sim.player2.health = 30
+
+    hits = knockouts = 0
+    for frame in range(frames):
+        before = [(sim.player1.health, sim.player2.health) for sim in sims]
+        masks = brawl(rng, env)
+        observations, rewards, terminated, truncated = env.step(masks)
+        assert not truncated.any()
+
+        for match, sim in enumerate(sims):
+            sim.step(tuple(decode_actions(int(mask)) for mask in masks[match]))
+            dealt = (before[match][1] - sim.player2.health, before[match][0] - sim.player1.health)
+            hits += any(dealt)
+            expected = (dealt[0] - dealt[1]) / 100
+            if sim.over:
+                expected += 1.0 if sim.winner == "Player 1" else -1.0
+            assert rewards[match] == pytest.approx((expected, -expected))
+            assert terminated[match] == sim.over
+            if sim.over:
+                # The vectorized match has already restarted
+                knockouts += 1
+                sim.reset()
+
+            for player, fighter in enumerate((sim.player1, sim.player2)):
+                assert vec_state(env, match, player) == fighter_state(fighter), \
+                    f"match {match} player {player + 1} frame {frame}"
+            own = fighter_features(sim.player1)
+            other = fighter_features(sim.player2)
+            np.testing.assert_allclose(observations[match, 0], own + other, rtol=1e-6)
+            np.testing.assert_allclose(observations[match, 1], other + own, rtol=1e-6)
+    assert hits and knockouts
+
+def test_vec_env_restarts_finished_matches():
+    env = VecFightEnv(2, max_frames=5)
+    for _ in range(4):
+        _, _, terminated, truncated = env.step(np.zeros((2, 2), np.int64))
+        assert not truncated.any()
+    observations, _, _, truncated = env.step(np.zeros((2, 2), np.int64))
+    assert truncated.all()
+    assert (env.frame == 0).all()
+    np.testing.assert_array_equal(observations, env.reset())
+
+def test_fight_env():
+    env = FightEnv(seed=3, max_frames=100)
+    observation, _ = env.reset()
+    assert observation.shape == (OBSERVATION_SIZE,)
+    for frame in range(100):
+        observation, reward, terminated, truncated, info = env.step(0)
+        if terminated:
+            break
+    assert truncated or terminated
+    assert info["frame"] == env.sim.frame
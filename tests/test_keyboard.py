@@ -0,0 +1,42 @@
+import pygame
+
+from constants import *
+from keyboard import InputBuffer, resolve_moves
+from simulation import Simulation, PLAYER1_CONTROLS
+
+def key_event(kind, control):
+    return pygame.event.Event(kind, key=PLAYER1_CONTROLS[control])
+
+def test_tap_between_steps_counts_once_with_edges():
+    buffer = InputBuffer()
+    buffer.handle_event(key_event(pygame.KEYDOWN, "punch"))
+    buffer.handle_event(key_event(pygame.KEYUP, "punch"))
+
+    assert buffer.take(0) == {"punch"}
+    assert buffer.step_pressed[0] == {"punch"}
+    assert buffer.step_released[0] == {"punch"}
+
+    assert buffer.take(0) == set()
+    assert buffer.step_pressed[0] == buffer.step_released[0] == frozenset()
+
+def test_held_key_has_one_press_edge():
+    buffer = InputBuffer()
+    buffer.handle_event(key_event(pygame.KEYDOWN, "left"))
+    assert buffer.take(0) == {"left"}
+    assert buffer.take(0) == {"left"}
+    assert buffer.step_pressed[0] == frozenset()
+
+    buffer.handle_event(key_event(pygame.KEYUP, "left"))
+    assert buffer.take(0) == set()
+    assert buffer.step_released[0] == {"left"}
+
+def test_only_one_move_starts():
+    sim = Simulation("versus")
+    fighter = sim.player1
+    energy = fighter.energy
+    assert resolve_moves({"left", "punch", "kick"}, fighter) == {"left", "kick"}
+
+    # Called directly with several moves held, the fighter starts one and pays for one
+    sim.step(({"punch", "kick", "block"}, ()))
+    assert fighter.action == "block"
+    assert fighter.energy == energy - ENERGY_COST["block"]
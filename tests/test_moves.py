@@ -0,0 +1,17 @@
+import json
+
+import pytest
+
+from moves import MOVES_PATH, MOVES_IN_CODE, load_moves
+
+def test_moves_file_defines_the_moves_in_code():
+    assert sorted(load_moves()) == sorted(MOVES_IN_CODE)
+
+def test_new_moves_are_rejected(tmp_path):
+    with open(MOVES_PATH) as f:
+        moves = json.load(f)
+    moves["uppercut"] = dict(moves["punch"])
+    path = tmp_path / "moves.json"
+    path.write_text(json.dumps(moves))
+    with pytest.raises(ValueError, match="uppercut|exactly"):
+        load_moves(str(path))
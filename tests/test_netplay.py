@@ -0,0 +1,134 @@
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from netplay import LossyTransport, RollbackSession, random_inputs
+from simulation import Simulation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class PipeTransport:
+    """In-memory transport: what one end sends, the other receives"""
+    def __init__(self):
+        self.inbox = []
+        self.other = None
+
+    def send(self, data):
+        self.other.inbox.append(data)
+
+    def receive(self):
+        packets, self.inbox = self.inbox, []
+        return packets
+
+    def close(self):
+        pass
+
+def pipe_pair():
+    a, b = PipeTransport(), PipeTransport()
+    a.other, b.other = b, a
+    return a, b
+
+def play(seed, frames, latency=0.0, jitter=0.0, loss=0.0, max_rollback=8, recorder=None):
+    """Play both peers of a match in-process, returning the two sessions"""
+    ends = pipe_pair()
+    sessions = []
+    inputs = []
+    for player in (0, 1):
+        transport = LossyTransport(ends[player], latency, jitter, loss, seed=player + 1)
+        sessions.append(RollbackSession(Simulation("versus", seed=seed), player, transport,
+                                        max_rollback=max_rollback))
+        inputs.append(random_inputs(seed * 2 + player + 1))
+    sessions[0].sim.recorder = recorder
+
+    deadline = time.perf_counter() + 30
+    while not all(s.sim.frame >= frames or s.settled() for s in sessions):
+        assert time.perf_counter() < deadline, "peers never finished"
+        for session, source in zip(sessions, inputs):
+            if session.sim.frame < frames and not session.sim.over:
+                session.advance(source())
+            else:
+                session.linger()
+                session.rollback()
+        if latency or jitter:
+            time.sleep(0.001)
+
+    # Exchange the last inputs so both peers confirm every frame
+    while not all(s.remote_confirmed >= s.sim.frame - 1 and s.rollback_from is None for s in sessions):
+        assert time.perf_counter() < deadline, "peers never confirmed the last frames"
+        for session in sessions:
+            session.linger()
+            session.rollback()
+        time.sleep(0.001)
+    return sessions
+
+def test_lossless_peers_agree():
+    first, second = play(seed=1, frames=600)
+    assert first.sim.frame == second.sim.frame
+    assert first.sim.snapshot() == second.sim.snapshot()
+
+@pytest.mark.parametrize("seed", [2, 3])
+def test_lossy_peers_converge(seed):
+    first, second = play(seed, frames=900, latency=0.004, jitter=0.004, loss=0.2)
+    assert first.sim.frame == second.sim.frame
+    assert first.sim.snapshot() == second.sim.snapshot()
+    # The lossy link made the peers predict wrongly and roll back
+    assert first.rollbacks + second.rollbacks > 0
+
+def test_peers_agree_on_knockout():
+    first, second = play(seed=4, frames=20000, loss=0.2)
+    assert first.sim.over and second.sim.over
+    assert first.sim.winner == second.sim.winner
+    assert first.sim.frame == second.sim.frame
+    assert first.sim.snapshot() == second.sim.snapshot()
+
+class InputLog:
+    """Stands in for a replay recorder, keeping the inputs each frame was last played with"""
+    def __init__(self):
+        self.frames = {}
+
+    def record(self, sim, actions):
+        self.frames[sim.frame] = actions
+
+def test_peers_match_offline_simulation():
+    """The agreed state is the one an offline match on the same inputs reaches"""
+    log = InputLog()
+    first, second = play(seed=4, frames=600, loss=0.3, recorder=log)
+    assert first.rollbacks > 0
+    offline = Simulation("versus", seed=4)
+    while offline.frame < first.sim.frame:
+        offline.step(log.frames[offline.frame])
+    assert offline.snapshot() == first.sim.snapshot()
+
+def free_ports(count):
+    sockets = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(count)]
+    for sock in sockets:
+        sock.bind(("127.0.0.1", 0))
+    ports = [sock.getsockname()[1] for sock in sockets]
+    for sock in sockets:
+        sock.close()
+    return ports
+
+def test_two_processes_converge():
+    """Two netplay.py peers on one machine over a lossy, delayed UDP link"""
+    ports = free_ports(2)
+    peers = []
+    for player in (1, 2):
+        command = [sys.executable, "netplay.py", "--player", str(player), "--port", str(ports[player - 1]),
+                   "--peer", f"127.0.0.1:{ports[2 - player]}", "--seed", "5", "--frames", "600",
+                   "--fps", "240", "--latency", "20", "--jitter", "10", "--loss", "0.1"]
+        peers.append(subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True,
+                                      env=dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")))
+
+    checksums = []
+    for peer in peers:
+        output, _ = peer.communicate(timeout=60)
+        assert peer.returncode == 0
+        match = re.search(r"frame (\d+), state checksum ([0-9a-f]{8})", output)
+        assert match, output
+        checksums.append(match.groups())
+    assert checksums[0] == checksums[1]
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from replay import CONTROL_ACTIONS, ReplayPlayer, ReplayRecorder, decode_actions, encode_actions
+from simulation import Simulation
+
+def record(path, game_mode, seed, frames, snapshot_interval=100):
+    """Record a match with random held controls, returning the state at the start of every frame"""
+    inputs = random.Random(seed)
+    sim = Simulation(game_mode, seed=seed)
+    sim.recorder = ReplayRecorder(str(path), sim, snapshot_interval)
+    states = [sim.snapshot()]
+    while sim.frame < frames and not sim.over:
+        sim.step(tuple(frozenset(c for c in CONTROL_ACTIONS if inputs.random() < 0.2) for _ in range(2)))
+        states.append(sim.snapshot())
+    sim.recorder.close()
+    return states
+
+@pytest.fixture(params=["versus", "cpu", "solo"])
+def recording(request, tmp_path):
+    path = tmp_path / "match.sfr"
+    return path, record(path, request.param, seed=5, frames=1500)
+
+def test_encode_decode():
+    for mask in range(1 << len(CONTROL_ACTIONS)):
+        assert encode_actions(decode_actions(mask)) == mask
+    assert encode_actions(None) == 0
+
+def test_playback_matches_recording(recording):
+    path, states = recording
+    player = ReplayPlayer(str(path))
+    assert player.frame_count == len(states) - 1
+    for state in states[1:]:
+        player.step()
+        assert player.sim.snapshot() == state
+    assert player.finished
+    player.close()
+
+def test_seek(recording):
+    path, states = recording
+    player = ReplayPlayer(str(path))
+    last = len(states) - 1
+    # Forward past snapshots, back to and between them, to the start and the end
+    for frame in (250, 1020, 100, 99, 0, 1, last, 640, 640, last // 2):
+        player.seek(frame)
+        assert player.frame == frame
+        assert player.sim.snapshot() == states[frame]
+    player.close()
+
+def test_seek_without_snapshots(tmp_path):
+    path = tmp_path / "match.sfr"
+    states = record(path, "versus", seed=9, frames=300, snapshot_interval=10000)
+    (tmp_path / "match.sfr.snap").write_bytes(b"")
+    player = ReplayPlayer(str(path))
+    for frame in (200, 50, 299):
+        player.seek(frame)
+        assert player.sim.snapshot() == states[frame]
+    player.close()
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "match.sfr"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        ReplayPlayer(str(path))
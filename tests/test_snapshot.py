@@ -0,0 +1,47 @@
+from simulation import Simulation
+
+def play(sim, frames):
+    """Step a match and return the snapshot after every frame"""
+    states = []
+    for _ in range(frames):
+        sim.step()
+        states.append(sim.snapshot())
+    return states
+
+def test_restore_round_trip():
+    sim = Simulation("cpu", seed=7)
+    play(sim, 500)
+    blob = sim.snapshot()
+    sim.restore(blob)
+    assert sim.snapshot() == blob
+
+def test_restore_replays_identically():
+    sim = Simulation("cpu", seed=7)
+    play(sim, 500)
+    blob = sim.snapshot()
+    expected = play(sim, 1000)
+
+    sim.restore(blob)
+    assert play(sim, 1000) == expected
+
+def test_restore_into_fresh_simulation():
+    sim = Simulation("cpu", seed=11)
+    play(sim, 800)
+    blob = sim.snapshot()
+    expected = play(sim, 600)
+
+    other = Simulation("cpu", seed=0)
+    other.restore(blob)
+    assert other.frame == 800
+    assert play(other, 600) == expected
+    assert other.damage == sim.damage
+
+def test_restore_finished_match():
+    sim = Simulation("cpu", seed=3)
+    sim.run(18000)
+    blob = sim.snapshot()
+
+    other = Simulation("cpu", seed=3)
+    other.restore(blob)
+    assert (other.over, other.winner, other.frame) == (sim.over, sim.winner, sim.frame)
+    assert other.snapshot() == blob
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+import time
+
+from simulation import Simulation
+from spectate import SpectatorServer, SpectatorClient
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_viewer_follows_a_batched_match_to_the_ko():
+    server = SpectatorServer("127.0.0.1", 0, snapshot_interval=300, batch_frames=4)
+    server.start()
+    client = SpectatorClient()
+    thread = threading.Thread(target=asyncio.run, args=(client.watch("127.0.0.1", server.port),), daemon=True)
+    thread.start()
+    wait_for(lambda: server.viewers)
+
+    sim = Simulation("cpu", seed=3)
+    sim.spectators = server
+    server.start_match(sim)
+    sim.run(20000)
+    assert sim.over
+
+    # The match rarely ends on a full batch; its tail must still reach the viewer
+    wait_for(lambda: client.sim is not None and client.sim.frame == sim.frame)
+    assert client.sim.over and client.sim.winner == sim.winner
+    assert client.sim.snapshot() == sim.snapshot()
+
+    server.stop()
+    thread.join(5)
+    stats = server.stats()
+    assert stats["viewers"] == 0
+    viewer, = stats["per_viewer"]
+    assert viewer["bytes_per_second"] > 0 and not viewer["connected"]
+    assert "1 viewers" in server.report()
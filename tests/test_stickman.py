@@ -0,0 +1,82 @@
+import random
+
+import pygame
+import pytest
+
+from constants import *
+from stickman import PoseCache, POSE_ACTIONS, POSE_DIRECTIONS, draw_stickman
+import legacy_stickman
+
+Y = SCREEN_HEIGHT - 100
+
+def pixels(surface):
+    return pygame.surfarray.array3d(surface)
+
+def blank():
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    surface.fill(SKY_BLUE)
+    return surface
+
+@pytest.mark.parametrize("action", POSE_ACTIONS)
+@pytest.mark.parametrize("direction", POSE_DIRECTIONS)
+@pytest.mark.parametrize("special", (False, True))
+def test_cached_poses_match_immediate_drawing(action, direction, special):
+    cache = PoseCache()
+    for frame in range(cache.frame_step * 3):
+        # Special effects are random: a cache miss must draw what draw_stickman
+        # draws from the same random state, and the hits that follow within
+        # the frame bucket must show that same drawing
+        bucket = frame // cache.frame_step if special else 0
+        if frame == 0 or (special and frame % cache.frame_step == 0):
+            immediate = blank()
+            random.seed(bucket)
+            draw_stickman(immediate, 400, Y, FIGHTER_WIDTH, FIGHTER_HEIGHT, BLUE, action, direction, special)
+            expected = pixels(immediate)
+        cached = blank()
+        random.seed(bucket)
+        cache.draw(cached, 400, Y, FIGHTER_WIDTH, FIGHTER_HEIGHT, BLUE, action, direction, special, frame)
+        assert (pixels(cached) == expected).all()
+
+    buckets = 3 if special else 1
+    assert cache.misses == buckets
+    assert cache.hits == cache.frame_step * 3 - buckets
+
+def test_least_recently_used_poses_are_evicted():
+    cache = PoseCache(max_poses=3)
+    surface = blank()
+
+    def draw(action):
+        cache.draw(surface, 400, Y, FIGHTER_WIDTH, FIGHTER_HEIGHT, BLUE, action, "right")
+
+    for action in ("idle", "punch", "kick"):
+        draw(action)
+    draw("idle")  # Now the most recently used
+    draw("block")  # Evicts punch
+    assert len(cache.poses) == 3
+    assert [key[0] for key in cache.poses] == ["kick", "idle", "block"]
+
+    misses = cache.misses
+    draw("punch")
+    assert cache.misses == misses + 1
+    draw("block")
+    assert cache.misses == misses + 1
+
+@pytest.mark.parametrize("height", (90, FIGHTER_HEIGHT, 150))
+@pytest.mark.parametrize("action", POSE_ACTIONS)
+@pytest.mark.parametrize("direction", POSE_DIRECTIONS)
+@pytest.mark.parametrize("special", (False, True))
+def test_skeleton_poses_match_the_old_trigonometry(height, action, direction, special):
+    for x, y in ((400, Y), (123, 250), (700, 60)):
+        old, new = blank(), blank()
+        random.seed(height + x)
+        legacy_stickman.draw_stickman(old, x, y, FIGHTER_WIDTH, height, BLUE, action, direction, special)
+        random.seed(height + x)
+        draw_stickman(new, x, y, FIGHTER_WIDTH, height, BLUE, action, direction, special)
+        assert (pixels(old) == pixels(new)).all()
+
+def test_unknown_actions_draw_the_idle_pose():
+    # The old code drew only the face for an action it did not know
+    unknown, idle = blank(), blank()
+    draw_stickman(unknown, 400, Y, FIGHTER_WIDTH, FIGHTER_HEIGHT, BLUE, "taunt", "left")
+    draw_stickman(idle, 400, Y, FIGHTER_WIDTH, FIGHTER_HEIGHT, BLUE, "idle", "left")
+    assert (pixels(unknown) == pixels(idle)).all()
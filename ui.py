@@ -1,7 +1,70 @@
 # ui.py - UI drawing functions for the game
 
 import pygame
+from collections import OrderedDict
 from constants import *
+from keyboard import DEFAULT_BINDINGS
+
+class TextCache:
+    def __init__(self, max_entries=256):
+        """
+        Least-recently-used cache of rendered text surfaces
+        
+        Returned surfaces are shared and must not be drawn on.
+        
+        Args:
+            max_entries: Number of rendered strings kept
+        """
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.overlays = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def render(self, font, text, color, antialias=True):
+        """Cached equivalent of font.render(text, antialias, color)"""
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+    
+    def overlay(self, size, color):
+        """Cached translucent full-size fill, e.g. for dimming the screen"""
+        key = (size, color)
+        surface = self.overlays.get(key)
+        if surface is None:
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            surface.fill(color)
+            self.overlays[key] = surface
+        return surface
+    
+    def clear(self):
+        self.surfaces.clear()
+        self.overlays.clear()
+
+# Text cache shared by all UI drawing
+text_cache = TextCache()
+
+def render_text(font, text, color, antialias=True):
+    """Render text through the shared cache"""
+    return text_cache.render(font, text, color, antialias)
+
+def px(value, scale):
+    """A logical coordinate or length in render pixels"""
+    return int(value * scale)
+
+def draw_dim_overlay(surface):
+    """Darken everything drawn so far"""
+    return surface.blit(text_cache.overlay(surface.get_size(), (0, 0, 0, 150)), (0, 0))
 
 def draw_health_bar(surface, x, y, width, height, value, max_value, border_color, fill_color, bg_color):
     """
@@ -26,7 +89,7 @@ def draw_health_bar(surface, x, y, width, height, value, max_value, border_color
         pygame.draw.rect(surface, fill_color, (x, y, fill_width, height))
     
     # Draw border
-    pygame.draw.rect(surface, border_color, (x, y, width, height), 2)
+    return pygame.draw.rect(surface, border_color, (x, y, width, height), 2)
 
 def draw_special_meter(surface, x, y, width, height, value, max_value):
     """Draw special meter with flashing effect when full"""
@@ -50,69 +113,106 @@ def draw_special_meter(surface, x, y, width, height, value, max_value):
         pygame.draw.rect(surface, fill_color, (x, y, fill_width, height))
     
     # Draw border
-    pygame.draw.rect(surface, BLACK, (x, y, width, height), 2)
+    return pygame.draw.rect(surface, BLACK, (x, y, width, height), 2)
 
 def draw_combo_indicator(surface, x, y, combo_count, font):
     """Draw combo counter if combo > 1"""
     if combo_count > 1:
-        combo_text = font.render(f"{combo_count}x COMBO", True, YELLOW)
-        surface.blit(combo_text, (x, y))
+        combo_text = render_text(font, f"{combo_count}x COMBO", YELLOW)
+        return surface.blit(combo_text, (x, y))
 
-def draw_ui(surface, player1, player2, font):
-    """Draw all UI elements for the game"""
+def draw_ui(surface, player1, player2, font, scale=1.0):
+    """
+    Draw all UI elements for the game and return the rects drawn
+    
+    Args:
+        scale: Render scale; font should already be sized for it
+    """
+    rects = []
+    right = surface.get_width()
+    
     # Draw player 1 UI (left side)
-    draw_health_bar(surface, 20, 20, 200, 20, player1.health, 100, WHITE, GREEN, RED)
-    draw_health_bar(surface, 20, 50, 150, 10, player1.energy, 100, WHITE, BLUE, GRAY)
-    draw_special_meter(surface, 20, 70, 150, 10, player1.special_meter, player1.special_threshold)
+    rects.append(draw_health_bar(surface, px(20, scale), px(20, scale), px(200, scale), px(20, scale),
+                                 player1.health, 100, WHITE, GREEN, RED))
+    rects.append(draw_health_bar(surface, px(20, scale), px(50, scale), px(150, scale), px(10, scale),
+                                 player1.energy, 100, WHITE, BLUE, GRAY))
+    rects.append(draw_special_meter(surface, px(20, scale), px(70, scale), px(150, scale), px(10, scale),
+                                    player1.special_meter, player1.special_threshold))
     
     # Draw player 1 name and combo
-    p1_name = font.render("PLAYER 1", True, player1.color)
-    surface.blit(p1_name, (20, 90))
-    draw_combo_indicator(surface, 20, 120, player1.combo_counter, font)
+    p1_name = render_text(font, "PLAYER 1", player1.color)
+    rects.append(surface.blit(p1_name, (px(20, scale), px(90, scale))))
+    rects.append(draw_combo_indicator(surface, px(20, scale), px(120, scale), player1.combo_counter, font))
     
     # Draw player 2 UI (right side)
-    draw_health_bar(surface, SCREEN_WIDTH - 220, 20, 200, 20, player2.health, 100, WHITE, GREEN, RED)
-    draw_health_bar(surface, SCREEN_WIDTH - 170, 50, 150, 10, player2.energy, 100, WHITE, BLUE, GRAY)
-    draw_special_meter(surface, SCREEN_WIDTH - 170, 70, 150, 10, player2.special_meter, player2.special_threshold)
+    rects.append(draw_health_bar(surface, right - px(220, scale), px(20, scale), px(200, scale), px(20, scale),
+                                 player2.health, 100, WHITE, GREEN, RED))
+    rects.append(draw_health_bar(surface, right - px(170, scale), px(50, scale), px(150, scale), px(10, scale),
+                                 player2.energy, 100, WHITE, BLUE, GRAY))
+    rects.append(draw_special_meter(surface, right - px(170, scale), px(70, scale), px(150, scale), px(10, scale),
+                                    player2.special_meter, player2.special_threshold))
     
     # Draw player 2 name and combo
-    p2_name = font.render("PLAYER 2", True, player2.color)
+    p2_name = render_text(font, "PLAYER 2", player2.color)
     text_width = p2_name.get_width()
-    surface.blit(p2_name, (SCREEN_WIDTH - 20 - text_width, 90))
+    rects.append(surface.blit(p2_name, (right - px(20, scale) - text_width, px(90, scale))))
     
-    combo_text = font.render(f"{player2.combo_counter}x COMBO", True, YELLOW)
-    text_width = combo_text.get_width()
     if player2.combo_counter > 1:
-        surface.blit(combo_text, (SCREEN_WIDTH - 20 - text_width, 120))
+        combo_text = render_text(font, f"{player2.combo_counter}x COMBO", YELLOW)
+        text_width = combo_text.get_width()
+        rects.append(surface.blit(combo_text, (right - px(20, scale) - text_width, px(120, scale))))
+    
+    return rects
 
-def draw_menu(surface, big_font, font):
-    """Draw the main menu"""
+def draw_menu(surface, big_font, font, scale=1.0):
+    """Draw the main menu (fonts sized for the render scale)"""
+    width, height = surface.get_size()
     # Draw title
-    title_text = big_font.render("STICK FIGHTER", True, WHITE)
-    subtitle_text = font.render("2D Fighting Game", True, YELLOW)
+    title_text = render_text(big_font, "STICK FIGHTER", WHITE)
+    subtitle_text = render_text(font, "2D Fighting Game", YELLOW)
     
-    surface.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, SCREEN_HEIGHT // 4))
+    surface.blit(title_text, (width // 2 - title_text.get_width() // 2, height // 4))
     surface.blit(subtitle_text, 
-               (SCREEN_WIDTH // 2 - subtitle_text.get_width() // 2, 
-                SCREEN_HEIGHT // 4 + title_text.get_height() + 10))
+               (width // 2 - subtitle_text.get_width() // 2, 
+                height // 4 + title_text.get_height() + px(10, scale)))
     
     # Draw instructions
-    instruction_text = font.render("Press ENTER to start", True, WHITE)
+    instruction_text = render_text(font, "Press ENTER to start", WHITE)
     surface.blit(instruction_text, 
-               (SCREEN_WIDTH // 2 - instruction_text.get_width() // 2, 
-                SCREEN_HEIGHT // 2))
+               (width // 2 - instruction_text.get_width() // 2, 
+                height // 2))
     
     # Credits
-    credits_text = font.render("Created with PyGame", True, GRAY)
+    credits_text = render_text(font, "Created with PyGame", GRAY)
     surface.blit(credits_text, 
-               (SCREEN_WIDTH // 2 - credits_text.get_width() // 2, 
-                SCREEN_HEIGHT - 50))
+               (width // 2 - credits_text.get_width() // 2, 
+                height - px(50, scale)))
+
+def control_lines(number, controls):
+    """Help lines for one player's {control: key code} bindings"""
+    def key(control):
+        return pygame.key.name(controls[control]).upper()
+    
+    return [
+        f"Player {number} Controls:",
+        f"{key('left')}/{key('right')} - Move Left/Right",
+        f"{key('punch')} - Punch",
+        f"{key('kick')} - Kick",
+        f"{key('block')} - Block",
+        f"{key('special')} - Special Move"
+    ]
 
-def draw_mode_select(surface, big_font, font):
-    """Draw the game mode selection screen"""
+def draw_mode_select(surface, big_font, font, scale=1.0, bindings=DEFAULT_BINDINGS):
+    """
+    Draw the game mode selection screen (fonts sized for the render scale)
+    
+    Args:
+        bindings: Pair of {control: key code} dicts the controls help shows
+    """
+    width, height = surface.get_size()
     # Draw title
-    title_text = big_font.render("SELECT MODE", True, WHITE)
-    surface.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, SCREEN_HEIGHT // 4))
+    title_text = render_text(big_font, "SELECT MODE", WHITE)
+    surface.blit(title_text, (width // 2 - title_text.get_width() // 2, height // 4))
     
     # Draw mode options
     options = [
@@ -120,69 +220,53 @@ def draw_mode_select(surface, big_font, font):
         "2. VERSUS MODE - 2 Player Battle"
     ]
     
-    y_offset = SCREEN_HEIGHT // 2
+    y_offset = height // 2
     for option in options:
-        option_text = font.render(option, True, YELLOW)
+        option_text = render_text(font, option, YELLOW)
         surface.blit(option_text, 
-                   (SCREEN_WIDTH // 2 - option_text.get_width() // 2, y_offset))
-        y_offset += 50
+                   (width // 2 - option_text.get_width() // 2, y_offset))
+        y_offset += px(50, scale)
     
     # Draw controls info
-    controls_p1 = [
-        "Player 1 Controls:",
-        "A/D - Move Left/Right",
-        "R - Punch",
-        "T - Kick",
-        "Y - Block",
-        "F - Special Move"
-    ]
-    
-    controls_p2 = [
-        "Player 2 Controls:",
-        "←/→ - Move Left/Right",
-        "Num 1 - Punch",
-        "Num 2 - Kick",
-        "Num 3 - Block",
-        "Num 0 - Special Move"
-    ]
+    controls_p1 = control_lines(1, bindings[0])
+    controls_p2 = control_lines(2, bindings[1])
     
     # Draw P1 controls
-    y_offset = SCREEN_HEIGHT * 2 // 3 + 20
+    y_offset = height * 2 // 3 + px(20, scale)
     for line in controls_p1:
-        text = font.render(line, True, BLUE)
-        surface.blit(text, (SCREEN_WIDTH // 4 - text.get_width() // 2, y_offset))
-        y_offset += 30
+        text = render_text(font, line, BLUE)
+        surface.blit(text, (width // 4 - text.get_width() // 2, y_offset))
+        y_offset += px(30, scale)
     
     # Draw P2 controls
-    y_offset = SCREEN_HEIGHT * 2 // 3 + 20
+    y_offset = height * 2 // 3 + px(20, scale)
     for line in controls_p2:
-        text = font.render(line, True, RED)
-        surface.blit(text, (SCREEN_WIDTH * 3 // 4 - text.get_width() // 2, y_offset))
-        y_offset += 30
+        text = render_text(font, line, RED)
+        surface.blit(text, (width * 3 // 4 - text.get_width() // 2, y_offset))
+        y_offset += px(30, scale)
     
     # Back instruction
-    back_text = font.render("Press ESC to go back", True, WHITE)
-    surface.blit(back_text, (SCREEN_WIDTH // 2 - back_text.get_width() // 2, SCREEN_HEIGHT - 50))
+    back_text = render_text(font, "Press ESC to go back", WHITE)
+    surface.blit(back_text, (width // 2 - back_text.get_width() // 2, height - px(50, scale)))
 
-def draw_game_over(surface, winner, big_font, font):
-    """Draw the game over screen"""
+def draw_game_over(surface, winner, big_font, font, scale=1.0):
+    """Draw the game over screen (fonts sized for the render scale)"""
+    width, height = surface.get_size()
     # Darkened overlay
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 150))
-    surface.blit(overlay, (0, 0))
+    draw_dim_overlay(surface)
     
     # Draw game over text
-    game_over_text = big_font.render("GAME OVER", True, WHITE)
+    game_over_text = render_text(big_font, "GAME OVER", WHITE)
     surface.blit(game_over_text, 
-               (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, 
-                SCREEN_HEIGHT // 3))
+               (width // 2 - game_over_text.get_width() // 2, 
+                height // 3))
     
     # Draw winner
     color = BLUE if winner == "Player 1" else RED
-    winner_text = big_font.render(f"{winner} WINS!", True, color)
+    winner_text = render_text(big_font, f"{winner} WINS!", color)
     surface.blit(winner_text, 
-               (SCREEN_WIDTH // 2 - winner_text.get_width() // 2, 
-                SCREEN_HEIGHT // 2))
+               (width // 2 - winner_text.get_width() // 2, 
+                height // 2))
     
     # Draw instructions
     instructions = [
@@ -191,8 +275,8 @@ def draw_game_over(surface, winner, big_font, font):
         "Press ESC to quit"
     ]
     
-    y_offset = SCREEN_HEIGHT * 2 // 3
+    y_offset = height * 2 // 3
     for line in instructions:
-        text = font.render(line, True, WHITE)
-        surface.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, y_offset))
-        y_offset += 40
\ No newline at end of file
+        text = render_text(font, line, WHITE)
+        surface.blit(text, (width // 2 - text.get_width() // 2, y_offset))
+        y_offset += px(40, scale)
\ No newline at end of file